@@ -1,15 +1,29 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import os
-import requests
-import zipfile
-import io
-import xml.etree.ElementTree as ET
-from dotenv import load_dotenv
 import plotly.graph_objects as go
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from credit_monitor.accounts import FEATURES, extract_accounts, ratios_from_accounts
+from credit_monitor.corp_codes import CorpMaster, corp_master_info
+from credit_monitor.audit import audit_opinion
+from credit_monitor.dart import fetch_financial_data, get_corp_status
+from credit_monitor.dart_client import TransportError, quota
+from credit_monitor.industry_index import IndustryIndex, build_industry_index, save_company
+from credit_monitor.industry_index import apply_corp_changes as apply_index_changes
+from credit_monitor.metrics import metrics
+from credit_monitor.model import load_api_key, load_model
+from credit_monitor.peer_buckets import PeerBuckets
+from credit_monitor.peers import get_similar_recommends
+from credit_monitor.result_cache import DiagnosisCache, diagnosis_key
+from credit_monitor.scoring import DANGER_LIMIT, SAFE_LIMIT, band_of, score_one
+from credit_monitor.screening import screen_companies
+from credit_monitor.search import CorpSearchIndex, split_queries
+from credit_monitor.snapshot import RiskSnapshot
+from credit_monitor.snapshot import apply_corp_changes as apply_snapshot_changes
+from credit_monitor.stress import THRESHOLDS, build_axes, current_index, minimal_changes, score_grid
+from credit_monitor.trend import STREAK_ALERT, fetch_trend, risk_streak
 
 # 1. 페이지 설정
 st.set_page_config(page_title="AI 기업 신용 신호등 (Ultimate)", page_icon="🚦", layout="wide")
@@ -50,265 +64,416 @@ st.markdown("""
 
 @st.cache_resource
 def load_system():
-    load_dotenv()
-    api_key = os.getenv('DART_API_KEY')
+    api_key = load_api_key()
     try:
-        model = joblib.load('bankruptcy_model_final_ratio.pkl')
+        model = load_model()
         return api_key, model, "Success"
     except Exception as e:
         return api_key, None, str(e)
 
-@st.cache_data
-def get_corp_code_map(api_key):
-    url = "https://opendart.fss.or.kr/api/corpCode.xml"
-    params = {'crtfc_key': api_key}
+@st.cache_resource
+def get_corp_master(api_key):
+    # 로컬 저장본(.npy)이 있으면 재다운로드/재파싱 없이 바로 읽음 (이후 변경분만 제자리 반영)
     try:
-        r = requests.get(url, params=params)
-        with zipfile.ZipFile(io.BytesIO(r.content)) as z:
-            with z.open('CORPCODE.xml') as f:
-                tree = ET.parse(f)
-                root = tree.getroot()
-                data = []
-                for child in root:
-                    corp_code = child.find('corp_code').text
-                    stock_code = child.find('stock_code').text
-                    corp_name = child.find('corp_name').text
-                    if stock_code is not None and len(stock_code.strip()) >= 5:
-                        data.append({
-                            'code': stock_code.strip().zfill(6), # 6자리 강제 맞춤 (005930 등)
-                            'dart': corp_code, 
-                            'name': corp_name
-                        })
-        return pd.DataFrame(data)
-    except Exception as e:
+        return CorpMaster(api_key)
+    except Exception:
         return None
 
-def fetch_financial_data(api_key, dart_code, target_year):
-    """최신 분기보고서(3분기 -> 반기 -> 1분기) 우선 조회, 없으면 사업보고서 조회"""
-    log = []
-    
-    # 보고서 코드: 3분기(11014), 반기(11012), 1분기(11013), 사업보고서(11011)
-    # 유정아, 가장 최신인 3분기부터 순서대로 리스트를 만들었어!
-    report_codes = [
-        ('11014', '3분기보고서'), 
-        ('11012', '반기보고서'), 
-        ('11013', '1분기보고서'), 
-        ('11011', '사업보고서')
-    ]
-    
-    current_year = datetime.now().year
-    # 올해(2025)부터 작년(2024)까지 뒤짐
-    for year in [current_year, current_year - 1]:
-        for code, name in report_codes:
-            url = "https://opendart.fss.or.kr/api/fnlttMultiAcnt.json"
-            params = {
-                'crtfc_key': api_key, 
-                'corp_code': dart_code,
-                'bsns_year': str(year), 
-                'reprt_code': code
-            }
-            
-            try:
-                res = requests.get(url, params=params, timeout=5)
-                data = res.json()
-                
-                if data.get('status') == '000':
-                    log.append(f"✅ {year}년 {name} 발견")
-                    return pd.DataFrame(data['list']), year, name, log
-                else:
-                    # status가 000이 아니면 데이터가 아직 없는 거니까 로그만 남기고 다음으로!
-                    log.append(f"❌ {year}년 {name}: {data.get('message')}")
-            except Exception as e:
-                log.append(f"⚠️ {year}년 {name} 통신오류: {str(e)}")
-    
-    return None, None, None, log
-
+def sync_corp_master(master, check_now=False):
+    """확인 주기가 지났으면(check_now면 바로) 상장사 변경 확인 -> 변경분을 업종 인덱스/스냅샷에 반영하고 딸린 캐시만 비움"""
+    diff = master.refresh(check_now)
+    if diff:
+        apply_index_changes(diff)
+        apply_snapshot_changes(diff)
+        load_industry_index.clear()
+        load_risk_snapshot.clear()
+        load_peer_buckets.clear()
+    return diff
 
-def get_audit_opinion(api_key, dart_code, business_year):
-    """감사의견 조회 - 실용적 버전"""
-    
-    try:
-        # 1. 기업개황 API 조회
-        url = "https://opendart.fss.or.kr/api/company.json"
-        params = {'crtfc_key': api_key, 'corp_code': dart_code}
-        res = requests.get(url, params=params, timeout=5)
-        data = res.json()
-        
-        if data.get('status') == '000':
-            opinion = data.get('adt_opnn', '').strip()
-            
-            if opinion and opinion not in ['-', 'null', '']:
-                opinion = opinion.replace('\n', ' ').strip()
-                
-                if '의견거절' in opinion or '거절' in opinion:
-                    return "의견거절"
-                elif '부적정' in opinion:
-                    return "부적정"
-                elif '한정' in opinion:
-                    return "한정"
-                elif '적정' in opinion:
-                    return "적정"
-                else:
-                    return opinion[:50]
-        
-        # 2. 기업개황에 없으면 사업보고서 링크 제공
-        report_year = business_year + 1
-        list_url = "https://opendart.fss.or.kr/api/list.json"
-        list_params = {
-            'crtfc_key': api_key,
-            'corp_code': dart_code,
-            'bgn_de': f'{report_year}0101',
-            'end_de': f'{report_year}1231',
-            'pblntf_ty': 'A',
-            'page_count': 100
-        }
-        
-        list_res = requests.get(list_url, params=list_params, timeout=10)
-        list_data = list_res.json()
-        
-        if list_data.get('status') == '000':
-            reports = list_data.get('list', [])
-            
-            for report in reports:
-                report_nm = report.get('report_nm', '')
-                if '사업보고서' in report_nm and '정정' not in report_nm:
-                    rcept_no = report.get('rcept_no')
-                    # ✅ 사용자가 직접 확인하도록 링크 제공
-                    return f"미제공 ({business_year}년 사업보고서 제출됨)"
-        
-        return "정보 없음"
-        
-    except Exception as e:
-        return "조회 실패"
+def describe_changes(diff):
+    return f"신규 상장 {len(diff['added'])} · 상장폐지 {len(diff['removed'])} · 이름/코드 변경 {len(diff['renamed'])}"
 
-def get_corp_status(api_key, dart_code):
-    """기업 개황 정보를 통해 업종명과 업종코드를 가져옴"""
-    url = "https://opendart.fss.or.kr/api/company.json"
-    params = {'crtfc_key': api_key, 'corp_code': dart_code}
-    try:
-        res = requests.get(url, params=params, timeout=5)
-        data = res.json()
-        if data.get('status') == '000':
-            return data
-    except:
-        return None
-    return None
-
-def get_val_ts(df_in, kws):
-    for k in kws:
-        rows = df_in[df_in['account_nm'].str.replace(' ', '').str.contains(k, na=False)]
-        if not rows.empty:
-            val = str(rows.iloc[0]['thstrm_amount']).replace(',', '').strip()
-            return float(val) if val else 0.0
-    return 0.0
-
-def get_similar_recommends(api_key, corp_map_df, current_corp_name, current_industry_code, limit=4):
-    """같은 업종 코드 기업 중 안정성 높은 기업 추천 (앞 2자리 매칭)"""
-    
-    if not current_industry_code or current_industry_code == '알수없음':
-        st.info("🔍 업종 정보가 없어 전체 기업에서 추천합니다.")
-        candidates = corp_map_df[corp_map_df['name'] != current_corp_name].sample(min(15, len(corp_map_df)))
+@st.cache_resource
+def load_industry_index():
+    """로컬 업종 인덱스를 메모리에 올림 (인덱스 갱신 후 clear 필요)"""
+    return IndustryIndex.load()
+
+@st.cache_resource(ttl=3600)
+def load_risk_snapshot():
+    """야간 배치(python -m credit_monitor snapshot)가 만든 위험 스냅샷"""
+    return RiskSnapshot.load()
+
+@st.cache_resource(ttl=3600)
+def load_peer_buckets():
+    """업종 버킷(5/3/2자리) + 규모 구간 -> 추천 후보 (업종별 후보는 한 번 계산해서 재사용)"""
+    return PeerBuckets(load_industry_index(), load_risk_snapshot())
+
+def render_audit_box(audit, found_year, failed=False):
+    """감사의견 박스 (적정/한정/부적정/의견거절에 따라 색상 변경)
+
+    audit: 감사의견 테이블 레코드 (year, opinion, auditor) - 없으면 None
+    """
+    if not audit:
+        audit_result = "조회 실패" if failed else "정보 없음"
     else:
-        # ✅ 업종 코드 앞 2자리 추출 (대분류)
-        industry_prefix = current_industry_code[:2] if len(current_industry_code) >= 2 else current_industry_code
-        
-        st.info(f"🔍 업종 대분류 {industry_prefix}로 시작하는 기업을 검색 중...")
-        same_industry = []
-        
-        # 샘플 150개로 확대 (앞 2자리만 매칭하니 더 많이 체크)
-        sample_size = min(150, len(corp_map_df) - 1)
-        sample_corps = corp_map_df[corp_map_df['name'] != current_corp_name].sample(sample_size)
-        
-        checked_count = 0
-        for _, row in sample_corps.iterrows():
-            try:
-                url = "https://opendart.fss.or.kr/api/company.json"
-                params = {'crtfc_key': api_key, 'corp_code': row['dart']}
-                res = requests.get(url, params=params, timeout=2)
-                data = res.json()
-                
-                checked_count += 1
-                
-                if data.get('status') == '000':
-                    induty_code = data.get('induty_code', '')
-                    
-                    # ✅ 앞 2자리만 비교
-                    if induty_code and induty_code[:2] == industry_prefix:
-                        same_industry.append(row)
-                        
-                        if len(same_industry) >= 20:
-                            break
-                
-                # 진행상황 표시 (매 30개마다)
-                if checked_count % 30 == 0:
-                    st.text(f"📊 {checked_count}개 검색 완료... (발견: {len(same_industry)}개)")
-                    
-            except:
-                continue
-        
-        if len(same_industry) >= 5:
-            st.success(f"✅ 유사 업종 기업 {len(same_industry)}개 발견 (업종코드 {industry_prefix}XX)")
-            candidates = pd.DataFrame(same_industry)
+        # 분기보고서 기준 진단이면 직전 사업연도 감사의견이 표시됨
+        found_year = audit['year']
+        audit_result = audit['opinion'] + (f" ({audit['auditor']})" if audit.get('auditor') else "")
+    if not audit:
+        bg_color = "#f0f2f6"
+        border_color = "#bdc3c7"
+        text_color = "#7f8c8d"
+        icon = "⚪"
+        msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 감사의견 정보를 확인할 수 없습니다."
+    elif audit['opinion'] == "적정":
+        bg_color = "#e8f4f8"
+        border_color = "#3498db"
+        text_color = "#2980b9"
+        icon = "🔵"
+        msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 회계 투명성이 확인되었습니다. 재무제표를 신뢰할 수 있습니다."
+    elif audit['opinion'] == "한정":
+        bg_color = "#fff3cd"
+        border_color = "#f39c12"
+        text_color = "#856404"
+        icon = "🟡"
+        msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 일부 회계처리에 한정사항이 있습니다. 주의가 필요합니다."
+    else:  # 부적정, 의견거절
+        bg_color = "#fdecea"
+        border_color = "#e74c3c"
+        text_color = "#c0392b"
+        icon = "🔴"
+        msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 심각한 회계 문제가 발견되었습니다. 투자에 각별한 주의가 필요합니다."
+
+    # 2. 커스텀 HTML 박스 출력
+    st.markdown(f"""
+        <div style="
+            background-color: {bg_color};
+            border-left: 5px solid {border_color};
+            padding: 15px;
+            border-radius: 5px;
+            color: {text_color};
+            margin-bottom: 20px;
+        ">
+            <span style="font-size: 20px; margin-right: 10px;">{icon}</span>
+            {msg}
+        </div>
+    """, unsafe_allow_html=True)
+
+def render_trend_chart(ts_results):
+    """최근 5개년 매출/자본/부채 차트 + (채점 결과가 있으면) 연도별 부도 확률 궤적"""
+    if ts_results and len(ts_results) >= 2:
+        df_ts = pd.DataFrame(ts_results).sort_values('year')
+        chart_col, risk_col = st.columns(2) if 'prob' in df_ts else (st.container(), None)
+
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=df_ts['year'], 
+            y=df_ts['sales'], 
+            name='매출(억)', 
+            marker_color='rgba(52, 152, 219, 0.6)'
+        ))
+        fig.add_trace(go.Scatter(
+            x=df_ts['year'], 
+            y=df_ts['equity'], 
+            name='자본(억)', 
+            line=dict(color='green', width=3),
+            mode='lines+markers'
+        ))
+        fig.add_trace(go.Scatter(
+            x=df_ts['year'], 
+            y=df_ts['debt'], 
+            name='부채(억)', 
+            line=dict(color='red', width=3),
+            mode='lines+markers'
+        ))
+
+        fig.update_layout(
+            title=f"최근 {len(ts_results)}개년 재무 추이",
+            xaxis_title="연도",
+            yaxis_title="금액 (억원)",
+            hovermode="x unified",
+            height=400
+        )
+
+        with chart_col:
+            st.plotly_chart(fig, use_container_width=True)
+        if risk_col is not None:
+            with risk_col:
+                render_risk_trajectory(df_ts)
+            streak = risk_streak(ts_results)
+            if streak >= STREAK_ALERT:
+                first = df_ts['year'].iloc[-1 - streak]
+                st.error(f"📉 부도 확률이 {streak}년 연속 상승 중입니다 ({first}년 {df_ts['prob'].iloc[-1 - streak]:.1f}% → "
+                         f"{df_ts['year'].iloc[-1]}년 {df_ts['prob'].iloc[-1]:.1f}%). 누적되는 악화 추세에 주의하세요.")
+    else:
+        st.warning(f"⚠️ 차트 표시를 위한 충분한 데이터가 없습니다. (조회된 연도: {len(ts_results)}개)")
+
+def render_risk_trajectory(df_ts):
+    """연도별 부도 확률 + 신호등 등급 궤적 (안전/주의 경계선 표시)"""
+    band_colors = {'안전': '#2ecc71', '주의': '#f39c12', '위험': '#e74c3c'}
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_ts['year'],
+        y=df_ts['prob'],
+        name='부도 확률(%)',
+        line=dict(color='gray', width=2),
+        mode='lines+markers+text',
+        marker=dict(size=14, color=[band_colors[b] for b in df_ts['band']]),
+        text=df_ts['band'],
+        textposition='top center',
+        customdata=df_ts[['부채비율', '영업이익률', '순이익률', 'ROA']],
+        hovertemplate="%{x}년 %{y:.1f}% (%{text})<br>부채비율 %{customdata[0]:.1f}%, 영업이익률 %{customdata[1]:.1f}%"
+                      "<br>순이익률 %{customdata[2]:.1f}%, ROA %{customdata[3]:.1f}%<extra></extra>",
+    ))
+    fig.add_hline(y=SAFE_LIMIT, line_dash='dash', line_color=band_colors['안전'], annotation_text=f"안전 {SAFE_LIMIT:.0f}%")
+    fig.add_hline(y=DANGER_LIMIT, line_dash='dash', line_color=band_colors['위험'], annotation_text=f"위험 {DANGER_LIMIT:.0f}%")
+    fig.update_layout(
+        title="연도별 부도 위험 궤적",
+        xaxis_title="연도",
+        yaxis_title="부도 확률 (%)",
+        yaxis=dict(range=[0, 105]),
+        xaxis=dict(tickmode='array', tickvals=df_ts['year']),
+        showlegend=False,
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_stress_grid(ratio_values):
+    """현재 비율 주변 what-if 격자 채점 (같은 비율이면 재사용 - 슬라이더를 움직일 때는 다시 계산하지 않음)"""
+    ratios = dict(zip(FEATURES, ratio_values))
+    axes = build_axes(ratios)
+    grid, lines = score_grid(model, axes, ratios)
+    return axes, grid, lines
+
+def stress_heatmap(axes, grid, dims, idx, base):
+    """비율 두 개를 축으로 한 등급 경계 히트맵 (나머지 두 비율은 슬라이더 값에 고정)"""
+    d0, d1 = dims
+    z = grid[tuple(slice(None) if k in dims else i for k, i in enumerate(idx))]
+    # 10% / 70% 경계에서 색이 끊기도록 계단형 색상
+    colorscale = [[0, '#2ecc71'], [SAFE_LIMIT / 100, '#2ecc71'], [SAFE_LIMIT / 100, '#f9d56e'],
+                  [DANGER_LIMIT / 100, '#f39c12'], [DANGER_LIMIT / 100, '#e74c3c'], [1, '#c0392b']]
+    fig = go.Figure(go.Heatmap(
+        x=axes[d0], y=axes[d1], z=z.T, zmin=0, zmax=100, colorscale=colorscale,
+        colorbar=dict(title='부도확률(%)'),
+        hovertemplate=f"{FEATURES[d0]} %{{x:.1f}}%<br>{FEATURES[d1]} %{{y:.1f}}%<br>부도 확률 %{{z:.1f}}%<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(x=[axes[d0][base[d0]]], y=[axes[d1][base[d1]]], mode='markers', name='현재',
+                             marker=dict(symbol='x', size=12, color='black')))
+    fig.add_trace(go.Scatter(x=[axes[d0][idx[d0]]], y=[axes[d1][idx[d1]]], mode='markers', name='시나리오',
+                             marker=dict(symbol='circle-open', size=16, color='black', line=dict(width=3))))
+    fig.update_layout(xaxis_title=f"{FEATURES[d0]} (%)", yaxis_title=f"{FEATURES[d1]} (%)", height=380,
+                      showlegend=False, margin=dict(t=30))
+    st.plotly_chart(fig, use_container_width=True, key=f"stress_map_{d0}{d1}")
+
+@st.fragment
+def render_stress_test(ratios, dart_code):
+    """What-if 스트레스 테스트 (슬라이더를 움직이면 이 부분만 다시 그림, DART/모델 호출 없음)"""
+    axes, grid, lines = load_stress_grid(tuple(float(ratios[f]) for f in FEATURES))
+    base = current_index(axes, ratios)
+    st.caption(f"현재 비율 주변 {grid.size:,}개 시나리오를 한 번에 채점해 두었습니다. 슬라이더는 계산된 격자에서 바로 읽어옵니다.")
+
+    slider_cols = st.columns(4)
+    idx = []
+    for d, (feature, axis) in enumerate(zip(FEATURES, axes)):
+        with slider_cols[d]:
+            idx.append(st.select_slider(
+                feature, options=list(range(len(axis))), value=base[d],
+                format_func=lambda i, axis=axis: f"{axis[i]:.1f}%", key=f"stress_{dart_code}_{feature}"
+            ))
+    idx = tuple(idx)
+    prob = float(grid[idx])
+    st.metric("시나리오 부도 확률", f"{prob:.1f}% ({band_of(prob)})", delta=f"{prob - grid[base]:+.1f}%p", delta_color="inverse")
+
+    map_left, map_right = st.columns(2)
+    with map_left:
+        stress_heatmap(axes, grid, (0, 1), idx, base)
+    with map_right:
+        stress_heatmap(axes, grid, (2, 3), idx, base)
+
+    # 10% / 70% 경계를 넘는 데 필요한 최소 변화량 (현재값 기준)
+    for threshold in THRESHOLDS:
+        found = minimal_changes(axes, grid, lines, ratios, threshold)
+        goal = f"{threshold:.0f}% 아래로 내려가려면" if found['direction'] == 'down' else f"{threshold:.0f}% 이상이 되는 지점 (남은 여유)"
+        single = " / ".join(
+            f"{f} {delta:+.1f}%p" if delta is not None else f"{f} 범위 밖" for f, delta in found['single'].items()
+        )
+        st.markdown(f"**부도 확률 {goal}** — 하나만 바꾸면: {single}")
+        if found['combined']:
+            combined = ", ".join(f"{f} {found['combined'][f]:+.1f}%p" for f in FEATURES if abs(found['combined'][f]) > 1e-9)
+            st.caption(f"네 비율을 같이 바꾸면 가장 가까운 조합: {combined or '변화 없음'} → {found['combined']['prob']:.1f}%")
         else:
-            st.warning(f"⚠️ 유사 업종 기업이 {len(same_industry)}개뿐이어서 전체에서 추천합니다.")
-            candidates = corp_map_df[corp_map_df['name'] != current_corp_name].sample(min(20, len(corp_map_df)))
+            st.caption("격자 범위 안에서는 이 경계를 넘는 조합이 없습니다.")
+
+def render_recommends(recoms, notes):
+    """추천 기업 카드 4개"""
+    for kind, note in notes:
+        getattr(st, kind)(note)
     
-    # 재무 분석
-    recom_results = []
-    for _, row in candidates.iterrows():
-        try:
-            df_sub, f_y, r_n, _ = fetch_financial_data(api_key, row['dart'], datetime.now().year - 1)
-            
-            if df_sub is not None:
-                df_t = df_sub[df_sub['fs_div'] == 'CFS'] if 'fs_div' in df_sub.columns and not df_sub[df_sub['fs_div'] == 'CFS'].empty else df_sub
-                a = get_val_ts(df_t, ['자산총계'])
-                l = get_val_ts(df_t, ['부채총계'])
-                e = get_val_ts(df_t, ['자본총계'])
-                s = get_val_ts(df_t, ['매출액'])
-                
-                if e != 0 and a != 0 and s != 0:
-                    d_r = (l / e) * 100
-                    o_m = (get_val_ts(df_t, ['영업이익']) / s) * 100
-                    n_m = (get_val_ts(df_t, ['당기순이익']) / s) * 100
-                    roa_v = (get_val_ts(df_t, ['당기순이익']) / a) * 100
-                    
-                    in_df = pd.DataFrame({'부채비율': [d_r], '영업이익률': [o_m], '순이익률': [n_m], 'ROA': [roa_v]})
-                    prob = model.predict_proba(in_df)[0][1] * 100
-                    
-                    recom_results.append({
-                        'name': row['name'],
-                        'code': row['code'],
-                        'prob': prob,
-                        'debt': d_r
-                    })
-                    
-                if len(recom_results) >= limit + 2:
-                    break
-        except Exception as e:
+    if recoms:
+        rec_cols = st.columns(4)
+        for idx, item in enumerate(recoms):
+            with rec_cols[idx]:
+                # 카드 형태로 예쁘게 출력
+                st.markdown(f"""
+                <div style="background-color:#f0f2f6; padding:15px; border-radius:10px; border-top:5px solid #2ecc71;">
+                    <h4 style="margin:0;">{item['name']}</h4>
+                    <code style="font-size:12px;">{item['code']}</code>
+                    <p style="margin:10px 0 0 0; font-size:14px; color:#555;">부도 위험도</p>
+                    <h3 style="margin:0; color:#2ecc71;">{item['prob']:.1f}%</h3>
+                </div>
+                """, unsafe_allow_html=True)
+    else:
+        st.write("유사 기업 데이터를 불러오는 데 실패했습니다.")
+
+@st.cache_resource
+def load_search_index(_corp_map_df, corp_version):
+    """사이드바 검색용 이름/초성/코드 인덱스 (상장사 목록이 바뀔 때만 다시 만듦)"""
+    return CorpSearchIndex(_corp_map_df)
+
+def pick_company(code):
+    """검색 결과 선택 -> 메인 입력창에 코드를 넣고 바로 진단"""
+    st.session_state['compare_mode'] = False
+    st.session_state['code_input'] = code
+    st.session_state['run_diagnosis'] = True
+
+# 비교 모드 최대 기업 수 (DART 일괄 조회 한 묶음)
+MAX_COMPARE = 100
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def compare_companies(codes, corp_version):
+    """여러 기업 비교 - 최신 보고서를 100개씩 묶어 한 번에 조회하고 비율 추출/채점도 한 번에 (입력 순서 유지)"""
+    rows = corp_map_df[corp_map_df['code'].isin(codes)]
+    result = screen_companies(api_key, model, rows)
+    return result.set_index('code').loc[list(codes)].reset_index()
+
+def render_compare_mode():
+    """여러 기업 비교 모드 - 신호등 표(정렬 가능) + 부채비율 vs 영업이익률 산점도"""
+    text = st.text_area(
+        f"종목코드 또는 종목명 (쉼표/줄바꿈으로 구분, 최대 {MAX_COMPARE}개)",
+        placeholder="005930, SK하이닉스\n현대차", key="compare_input"
+    )
+    if st.button("📋 비교 시작", use_container_width=True) and text.strip():
+        found, missing = load_search_index(corp_map_df, corp_version).resolve(split_queries(text))
+        if missing:
+            st.warning(f"⚠️ 찾지 못한 종목: {', '.join(missing)}")
+        if len(found) > MAX_COMPARE:
+            st.warning(f"⚠️ 한 번에 {MAX_COMPARE}개까지만 비교합니다. 앞의 {MAX_COMPARE}개만 사용합니다.")
+        st.session_state['compare_codes'] = tuple(item['code'] for item in found[:MAX_COMPARE])
+    codes = st.session_state.get('compare_codes')
+    if not codes:
+        return
+
+    started = time.perf_counter()
+    with st.spinner(f"📡 {len(codes)}개 기업 최신 보고서 일괄 조회 중..."):
+        with metrics.stage('compare'):
+            result = compare_companies(codes, corp_version)
+    ok = result[result['error'].fillna('') == '']
+    st.caption(f"{len(codes)}개 기업 중 {len(ok)}개 진단 완료 ({time.perf_counter() - started:.1f}초)")
+    failed = result[result['error'].fillna('') != '']
+    if not failed.empty:
+        st.warning("⚠️ " + ", ".join(f"{r['name']}({r['error']})" for r in failed.to_dict('records')))
+    if ok.empty:
+        return
+
+    lights = {'안전': '🟢 안전', '주의': '🟡 주의', '위험': '🔴 위험'}
+    table = pd.DataFrame({
+        '신호등': ok['band'].map(lights),
+        '종목명': ok['name'],
+        '종목코드': ok['code'],
+        '기준 보고서': ok['year'].astype(int).astype(str) + '년 ' + ok['report'],
+        '부도 확률': ok['prob'],
+        '부채비율': ok['부채비율'],
+        '영업이익률': ok['영업이익률'],
+        '순이익률': ok['순이익률'],
+        'ROA': ok['ROA'],
+        '감사의견': ok['audit'].replace('', '-'),
+    }).sort_values('부도 확률', ascending=False)
+    percent = st.column_config.NumberColumn(format="%.1f%%")
+    st.dataframe(
+        table, hide_index=True, use_container_width=True,
+        column_config={
+            '부도 확률': st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+            '부채비율': percent, '영업이익률': percent, '순이익률': percent, 'ROA': percent,
+        },
+    )
+
+    # 부채비율 vs 영업이익률 (등급별 색상) - 자본잠식(999%)은 오른쪽 끝에 모아서 표시
+    band_colors = {'안전': '#2ecc71', '주의': '#f39c12', '위험': '#e74c3c'}
+    fig = go.Figure()
+    for band, color in band_colors.items():
+        part = ok[ok['band'] == band]
+        if part.empty:
             continue
-    
-    return sorted(recom_results, key=lambda x: x['prob'])[:limit]
+        fig.add_trace(go.Scatter(
+            x=part['부채비율'], y=part['영업이익률'], mode='markers+text', name=band,
+            text=part['name'], textposition='top center',
+            marker=dict(size=12, color=color, line=dict(width=1, color='white')),
+            customdata=part[['prob']],
+            hovertemplate="%{text}<br>부채비율 %{x:.1f}%<br>영업이익률 %{y:.1f}%<br>부도 확률 %{customdata[0]:.1f}%<extra></extra>",
+        ))
+    fig.update_layout(
+        title="부채비율 vs 영업이익률 (색: 신호등 등급)",
+        xaxis_title="부채비율 (%)",
+        yaxis_title="영업이익률 (%)",
+        height=500
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_resource
+def get_panel_pool():
+    """감사의견/추이/추천 패널을 백그라운드에서 계산할 작업 풀 (세션 간 공유)"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix='panel')
+
+@st.cache_resource
+def get_diagnosis_cache():
+    """완료된/진행 중인 진단 결과 (세션 간 공유, 새 보고서가 나오면 자동으로 새로 계산)"""
+    return DiagnosisCache()
+
+def recommend_after_corp_info(api_key, corp_map_df, corp_name, dart_code, stock_code, corp_info_future, buckets):
+    """기업개황(업종코드)을 받은 뒤 추천 기업 계산 -> (recoms, notes, industry_code, industry_name)"""
+    industry_code = None
+    industry_name = "동일 업종"
+    corp_info = corp_info_future.result()
+    if corp_info:
+        save_company(dart_code, stock_code, corp_name, corp_info)
+        # induty_code는 숫자 코드 (예: 201)
+        industry_code = corp_info.get('induty_code', '알수없음')
+        # induty_nm은 실제 이름 (예: 기초 화학물질 제조업)
+        industry_name = corp_info.get('induty_nm', f"업종코드 {industry_code}")
+    recoms, notes = get_similar_recommends(
+        api_key, model, corp_map_df, corp_name, industry_code, buckets, current_code=stock_code
+    )
+    return recoms, notes, industry_code, industry_name
+
 
 # ---------------------------------------------------------
 # 4. 시스템 로드 및 사이드바
 # ---------------------------------------------------------
 api_key, model, status = load_system()
-corp_map_df = None
+corp_master, corp_map_df, corp_version = None, None, 0
 
 if api_key:
     with st.sidebar:
         with st.spinner("📡 기업 리스트 로딩 중..."):
-            corp_map_df = get_corp_code_map(api_key)
+            with metrics.stage('corp_map'):
+                corp_master = get_corp_master(api_key)
+                if corp_master is not None:
+                    sync_corp_master(corp_master)
+                    corp_map_df, corp_version = corp_master.frame, corp_master.version
             
-    # 사이드바 종목 검색창
+    # 사이드바 종목 검색창 (이름/초성/종목코드, 오타 허용) - 결과를 누르면 바로 진단
     st.sidebar.markdown("### 🔍 종목 찾기")
-    search_query = st.sidebar.text_input("종목명 입력", placeholder="예: 삼성전자", key="sidebar_search")
+    search_query = st.sidebar.text_input("종목명 입력", placeholder="예: 삼성전자, ㅅㅅㅈㅈ, 005930", key="sidebar_search")
     if search_query and corp_map_df is not None:
-        search_results = corp_map_df[corp_map_df['name'].str.contains(search_query, na=False, case=False)]
-        if not search_results.empty:
+        search_results = load_search_index(corp_map_df, corp_version).search(search_query, limit=8)
+        if search_results:
             st.sidebar.info(f"📌 '{search_query}' 검색결과")
-            for i, row in search_results.head(5).iterrows():
-                st.sidebar.code(f"{row['code']}  # {row['name']}")
+            for item in search_results:
+                st.sidebar.button(
+                    f"{item['name']}  ({item['code']}) · {item['match']}", key=f"pick_{item['code']}",
+                    on_click=pick_company, args=(item['code'],), use_container_width=True
+                )
         else:
             st.sidebar.error("❌ 일치하는 종목 없음")
 
@@ -319,8 +484,30 @@ st.sidebar.divider()
 if status == "Success":
     st.sidebar.subheader("📡 엔진 상태")
     st.sidebar.success("AI 모델 로드 완료")
+    if api_key and corp_map_df is not None and st.sidebar.button("🏭 업종 인덱스 갱신", use_container_width=True):
+        bar = st.sidebar.progress(0.0, text="업종 인덱스 갱신 중...")
+        n = build_industry_index(api_key, corp_map_df, progress=lambda i, total: bar.progress(i / total))
+        load_industry_index.clear()
+        load_peer_buckets.clear()
+        st.sidebar.success(f"✅ {n}개 기업 업종 정보 갱신 (총 {len(load_industry_index())}개)")
+    if corp_master is not None:
+        info = corp_master_info()
+        checked = datetime.fromtimestamp(info['checked_at']).strftime('%m-%d %H:%M') if info.get('checked_at') else '-'
+        st.sidebar.caption(f"🏢 상장사 목록 v{corp_version} · {len(corp_master):,}개 · 변경 확인 {checked}")
+        if st.sidebar.button("🏢 상장사 변경 확인", use_container_width=True):
+            with st.sidebar.spinner("corpCode.xml 변경 확인 중..."):
+                diff = sync_corp_master(corp_master, check_now=True)
+            if corp_master.last_error:
+                st.sidebar.error(f"⚠️ 확인 실패: {corp_master.last_error}")
+            elif diff:
+                st.sidebar.success(f"✅ {describe_changes(diff)}")
+            else:
+                st.sidebar.info("변경 없음")
+    # 결과/인덱스 캐시만 비움 - 상장사 목록(로컬 저장본 + 메모리 표)은 그대로 유지
     if st.sidebar.button("🔄 시스템 리셋", use_container_width=True):
-        st.cache_resource.clear()
+        for cached in (load_system, load_industry_index, load_risk_snapshot, load_peer_buckets,
+                       load_search_index, get_diagnosis_cache):
+            cached.clear()
         st.cache_data.clear()
         st.rerun()
 else:
@@ -330,14 +517,23 @@ else:
 # 5. 메인 화면
 # ---------------------------------------------------------
 st.title("🚦 기업 부도 위험 진단")
-st.info("💡 사이드바에서 종목명을 검색해 코드를 확인한 뒤 입력하세요.")
-
-col1, col2 = st.columns([3, 1])
-with col1:
-    user_input = st.text_input("종목코드 입력", placeholder="예: 005930")
-with col2:
-    st.write("") ; st.write("")
-    search_btn = st.button("🔍 진단 시작", use_container_width=True)
+st.info("💡 사이드바에서 종목명을 검색해 고르거나, 종목코드를 직접 입력하세요. 여러 기업은 비교 모드에서 한 번에 볼 수 있습니다.")
+
+compare_mode = st.toggle("📋 여러 기업 비교 모드", key="compare_mode")
+if compare_mode:
+    # 여러 종목을 한 번에 조회/채점 (단일 진단의 추이/추천 패널은 돌리지 않음)
+    if corp_map_df is not None:
+        render_compare_mode()
+    user_input, search_btn = None, False
+else:
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        user_input = st.text_input("종목코드 입력", placeholder="예: 005930", key="code_input")
+    with col2:
+        st.write("") ; st.write("")
+        search_btn = st.button("🔍 진단 시작", use_container_width=True)
+    # 사이드바 검색 결과를 누른 경우에도 진단 실행
+    search_btn = st.session_state.pop('run_diagnosis', False) or search_btn
 
 # 버튼 클릭 전에도 변수가 존재하도록 미리 선언해줘!
 industry_name = "해당" 
@@ -358,296 +554,250 @@ if search_btn and user_input:
         st.error(f"❌ 종목코드 '{user_input_clean}'을 찾을 수 없습니다.")
         st.info("💡 **사이드바에서 종목명으로 검색**해 정확한 6자리 코드를 확인해주세요.")
         
-        # 유사 코드 제안
+        # 유사 코드/이름 제안 (검색 인덱스 재사용)
         if len(user_input.strip()) > 0:
-            similar = corp_map_df[corp_map_df['code'].str.contains(user_input.strip())]
-            if not similar.empty:
-                st.write("🔍 **입력하신 숫자가 포함된 종목:**")
-                for _, row in similar.head(5).iterrows():
-                    st.code(f"{row['code']}  # {row['name']}")
+            similar = load_search_index(corp_map_df, corp_version).search(user_input.strip(), limit=5)
+            if similar:
+                st.write("🔍 **입력하신 내용과 비슷한 종목:**")
+                for item in similar:
+                    st.code(f"{item['code']}  # {item['name']}")
         st.stop()
         
     dart_code = found.iloc[0]['dart']
     corp_name = found.iloc[0]['name']
     
-    # ✅ 업종명 가져오기
-    industry_code = None
-    industry_name = "동일 업종"
+    # 이번 진단의 단계별 소요시간 (사이드바 성능 패널에 표시)
+    timings = {}
+    st.session_state['last_timings'] = timings
     
-    corp_info = get_corp_status(api_key, dart_code)
-    if corp_info:
-        # induty_code는 숫자 코드 (예: 201)
-        industry_code = corp_info.get('induty_code', '알수없음')
-        # induty_nm은 실제 이름 (예: 기초 화학물질 제조업)
-        industry_name = corp_info.get('induty_nm', f"업종코드 {industry_code}")
+    # ✅ 같은 기업 + 같은 최신 보고서 기준 진단은 세션 간에 공유 (진행 중인 계산도 같이 기다림)
+    pool = get_panel_pool()
+    results = get_diagnosis_cache()
+    key = diagnosis_key(api_key, dart_code)
+    
+    # ✅ 업종 정보(기업개황)와 재무제표를 동시에 조회 - 신호등은 재무제표만 있으면 바로 표시
+    corp_info_future = results.get_or_submit(key, 'corp_info', lambda: pool.submit(get_corp_status, api_key, dart_code))
     
     # 데이터 스캔
     with st.spinner(f"📡 '{corp_name}' 분석 중..."):
         current_year = datetime.now().year
         
         # ✅ fetch_financial_data는 이미 최신 사업보고서를 찾아줌
-        df, found_year, report_name, logs = fetch_financial_data(api_key, dart_code, current_year)
-        
-        # 2. 재무 데이터 스캔 결과 처리
-        if df is not None:
-            audit_result = get_audit_opinion(api_key, dart_code, found_year)
+        with metrics.stage('fetch', timings):
+            try:
+                df, found_year, report_name, logs = results.get_or_submit(
+                    key, 'fetch', lambda: pool.submit(fetch_financial_data, api_key, dart_code, current_year)
+                ).result()
+            except TransportError as e:
+                # 통신 오류는 결과로 남기지 않음 -> 다음 진단 때 다시 조회
+                df, found_year, report_name, logs = None, None, None, e.log
+                st.error("📡 DART 통신 오류로 재무제표를 불러오지 못했습니다. 잠시 후 다시 진단해 주세요.")
+    
+    # ✅ 선택 패널(감사의견, 5개년 추이, 추천 기업)은 백그라운드에서 동시에 계산하고 도착하는 대로 채움
+    panels_started = time.perf_counter()
+    panels = {}
+    if df is not None:
+        panels[results.get_or_submit(key, 'audit', lambda: pool.submit(audit_opinion, api_key, dart_code, found_year))] = 'audit'
+        panels[results.get_or_submit(key, 'trend', lambda: pool.submit(fetch_trend, api_key, dart_code, found_year, model=model))] = 'trend'
+    panels[results.get_or_submit(key, 'peers', lambda: pool.submit(
+        recommend_after_corp_info, api_key, corp_map_df, corp_name, dart_code, user_input_clean,
+        corp_info_future, load_peer_buckets()
+    ))] = 'peers'
+    
+    # 2. 재무 데이터 스캔 결과 처리
+    if df is not None:
+        st.write("") 
+        with st.container():
+
+            # [기본 데이터 추출 및 비율 계산] - 계정 6개를 한 번에 추출 (CFS 우선)
+            with metrics.stage('extract', timings):
+                accounts = extract_accounts(df)
+                ratios = ratios_from_accounts(accounts)
+            debt_ratio = ratios['부채비율']
+            op_margin = ratios['영업이익률']
+            net_margin = ratios['순이익률']
+            roa = ratios['ROA']
+
+            with metrics.stage('score', timings):
+                risk_prob, risk_band = score_one(model, ratios)
+            render_started = time.perf_counter()
+
+            reasons = []
+            if debt_ratio > 200: reasons.append("부채비율 200% 초과 (재무 건전성 악화)")
+            if op_margin < 0: reasons.append("영업이익 적자 (수익성 저하)")
+            if net_margin < 0: reasons.append("당기순이익 적자 (결손금 누적)")
+
+            # ---------------------------------------------------------
+            # 5. 결과 시각화
+            st.divider()
+            st.subheader(f"📊 {corp_name} ({found_year}년 {report_name})")
             
-            # --- 기존 데이터 추출 로직들 ---
-            df_t = df[df['fs_div'] == 'CFS'] if 'fs_div' in df.columns and not df[df['fs_div'] == 'CFS'].empty else df
-            assets = get_val_ts(df_t, ['자산총계'])
-            # ... (중략) ...
-
-            # --- 심층 분석 리포트 구역 (전체 가로폭 사용!) ---
-            st.write("") 
-            with st.container():
-
-                # [기본 데이터 추출 및 비율 계산] - (이 부분은 유정이 코드와 동일)
-                df_t = df[df['fs_div'] == 'CFS'] if 'fs_div' in df.columns and not df[df['fs_div'] == 'CFS'].empty else df
-                assets = get_val_ts(df_t, ['자산총계'])
-                liabilities = get_val_ts(df_t, ['부채총계'])
-                equity = get_val_ts(df_t, ['자본총계'])
-                sales = get_val_ts(df_t, ['매출액', '영업수익', '수익(매출액)'])
-                op_profit = get_val_ts(df_t, ['영업이익'])
-                net_profit = get_val_ts(df_t, ['당기순이익'])
-
-                debt_ratio = (liabilities / equity * 100) if equity != 0 else 999
-                op_margin = (op_profit / sales * 100) if sales != 0 else 0
-                net_margin = (net_profit / sales * 100) if sales != 0 else 0
-                roa = (net_profit / assets * 100) if assets != 0 else 0
-
-                input_df = pd.DataFrame({'부채비율': [debt_ratio], '영업이익률': [op_margin], '순이익률': [net_margin], 'ROA': [roa]})
-                risk_prob = model.predict_proba(input_df)[0][1] * 100
-
-                reasons = []
-                if debt_ratio > 200: reasons.append("부채비율 200% 초과 (재무 건전성 악화)")
-                if op_margin < 0: reasons.append("영업이익 적자 (수익성 저하)")
-                if net_margin < 0: reasons.append("당기순이익 적자 (결손금 누적)")
-
-                # ---------------------------------------------------------
-                # 5. 결과 시각화
-                st.divider()
-                st.subheader(f"📊 {corp_name} ({found_year}년 {report_name})")
-                
-                # [A] 상단 구역: 신호등(좌) + 핵심지표(우)
-                col_top_left, col_top_right = st.columns([1.5, 2])
-                
-                with col_top_left:
-                    # 신호등 로직
-                    if risk_prob < 10.0:
-                        red_class, orange_class, green_class = "", "", "green"
-                        status_text, status_color = "안전", "#2ecc71"
-                    elif risk_prob < 70.0:
-                        red_class, orange_class, green_class = "", "orange", ""
-                        status_text, status_color = "주의", "#f39c12"
-                    else:
-                        red_class, orange_class, green_class = "red", "", ""
-                        status_text, status_color = "위험", "#e74c3c"
-                    
-                    traffic_html = f"""
-                    <div style="text-align:center; padding: 10px 0px;">
-                        <div class="traffic-light-body">
-                            <div class="light {red_class}"></div>
-                            <div class="light {orange_class}"></div>
-                            <div class="light {green_class}"></div>
-                        </div>
-                        <p style="margin-top:10px; font-size:24px; font-weight:bold; color:{status_color};">{status_text}</p>
-                    </div>
-                    """
-                    st.markdown(traffic_html, unsafe_allow_html=True)
-
-                with col_top_right:
-                    # [진단 결과 텍스트]
-                    if risk_prob < 10.0: t, info_type = "안전", "success"
-                    elif risk_prob < 70.0: t, info_type = "주의", "warning"
-                    else: t, info_type = "위험", "error"
-                    
-                    st.info(f"**진단결과: {t}**")
-                    st.write(f"부도 확률 예측: **{risk_prob:.2f}%**")
-
-                    if reasons:
-                        with st.expander("🧐 주요 위험 요인 분석"):
-                            for r in reasons:
-                                st.write(f"• {r}")
-
-            # [B] 하단 구역: 감사의견, 심층 분석 리포트 (전체 가로폭 사용!)
-            st.write("") # 약간의 여백
-            with st.container():
-                st.markdown("### 🧐 AI 심층 분석 리포트")
-                
-                # 1. 감사의견을 전체 가로폭으로 먼저 배치 (rc1, rc2 나누기 전!)
-                # audit_result 값은 위에서 미리 받아왔다고 가정할게!
-                # 여기서 이제 audit_result를 마음껏 쓸 수 있어!
-                if "정보 없음" in audit_result or "조회 실패" in audit_result:
-                    bg_color = "#f0f2f6"
-                    border_color = "#bdc3c7"
-                    text_color = "#7f8c8d"
-                    icon = "⚪"
-                    msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 감사의견 정보를 확인할 수 없습니다."
-                elif "적정" in audit_result:
-                    bg_color = "#e8f4f8"
-                    border_color = "#3498db"
-                    text_color = "#2980b9"
-                    icon = "🔵"
-                    msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 회계 투명성이 확인되었습니다. 재무제표를 신뢰할 수 있습니다."
-                elif "한정" in audit_result:
-                    bg_color = "#fff3cd"
-                    border_color = "#f39c12"
-                    text_color = "#856404"
-                    icon = "🟡"
-                    msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 일부 회계처리에 한정사항이 있습니다. 주의가 필요합니다."
-                else:  # 부적정, 의견거절 등
-                    bg_color = "#fdecea"
-                    border_color = "#e74c3c"
-                    text_color = "#c0392b"
-                    icon = "🔴"
-                    msg = f"<b>감사의견 ({found_year}년 기준):</b> {audit_result} — 심각한 회계 문제가 발견되었습니다. 투자에 각별한 주의가 필요합니다."
+            # [A] 상단 구역: 신호등(좌) + 핵심지표(우)
+            col_top_left, col_top_right = st.columns([1.5, 2])
+            
+            with col_top_left:
+                # 신호등 로직
+                if risk_band == "안전":
+                    red_class, orange_class, green_class = "", "", "green"
+                    status_text, status_color = "안전", "#2ecc71"
+                elif risk_band == "주의":
+                    red_class, orange_class, green_class = "", "orange", ""
+                    status_text, status_color = "주의", "#f39c12"
+                else:
+                    red_class, orange_class, green_class = "red", "", ""
+                    status_text, status_color = "위험", "#e74c3c"
                 
-                # 2. 커스텀 HTML 박스 출력
-                st.markdown(f"""
-                    <div style="
-                        background-color: {bg_color};
-                        border-left: 5px solid {border_color};
-                        padding: 15px;
-                        border-radius: 5px;
-                        color: {text_color};
-                        margin-bottom: 20px;
-                    ">
-                        <span style="font-size: 20px; margin-right: 10px;">{icon}</span>
-                        {msg}
+                traffic_html = f"""
+                <div style="text-align:center; padding: 10px 0px;">
+                    <div class="traffic-light-body">
+                        <div class="light {red_class}"></div>
+                        <div class="light {orange_class}"></div>
+                        <div class="light {green_class}"></div>
                     </div>
-                """, unsafe_allow_html=True)
+                    <p style="margin-top:10px; font-size:24px; font-weight:bold; color:{status_color};">{status_text}</p>
+                </div>
+                """
+                st.markdown(traffic_html, unsafe_allow_html=True)
+
+            with col_top_right:
+                # [진단 결과 텍스트]
+                t = risk_band
+                info_type = {"안전": "success", "주의": "warning", "위험": "error"}[risk_band]
                 
-                st.write("") # 감사의견과 하단 리포트 사이 살짝 여백
-                # 넓게 깔아주는 리포트 칸
-                rc1, rc2 = st.columns(2)
-                with rc1:
-                    st.markdown("#### 🔍 재무 건전성 요약")
-                    if debt_ratio > 200: 
-                        st.error(f"⚠️ **부채비율({debt_ratio:.1f}%) 높음**: 타인 자본 의존도가 높아 재무 구조 개선이 시급합니다.")
-                    else: 
-                        st.success(f"✅ **부채비율({debt_ratio:.1f}%) 안정**: 매우 건전한 자본 구조를 가지고 있어 외부 충격에 강합니다.")
-                    
-                    if op_margin < 0: 
-                        st.error(f"⚠️ **영업적자({op_margin:.1f}%)**: 본업에서 손실이 발생하고 있어 경쟁력 확보가 필요합니다.")
-                    else: 
-                        st.success(f"✅ **영업이익률({op_margin:.1f}%)**: 안정적인 영업 활동을 통해 꾸준한 수익을 창출하고 있습니다.")
-                
-                with rc2:
-                    st.markdown("#### ⚖️ 기업 유형 진단")
-                    if debt_ratio <= 100 and op_margin >= 5: 
-                        st.info("🌟 **[초우량 기업]**\n\n돈도 잘 벌고 빚도 없는 완벽한 상태입니다. 투자 가치가 매우 높은 'Cash Cow'형 기업입니다.")
-                    elif debt_ratio <= 100 and op_margin < 5: 
-                        st.warning("💰 **[자산가형 기업]**\n\n수익성은 다소 낮으나 재무적으로 매우 안정적입니다. 당장의 위기에는 강한 타입입니다.")
-                    elif debt_ratio > 100 and op_margin >= 5: 
-                        st.warning("🏃 **[성장형 기업]**\n\n부채를 레버리지로 활용해 높은 수익을 내고 있습니다. 공격적인 투자가 진행 중인 상태입니다.")
-                    else: 
-                        st.error("🚨 **[위험군 기업]**\n\n수익성이 낮은데 빚까지 많아 구조조정이 시급할 수 있습니다. 각별한 주의가 필요합니다.")
-
-                # --- [2] 핵심 지표 메트릭 (차트 바로 위로 이동!) ---
-                st.write("") # 리포트와 메트릭 사이 여백
-                st.divider() # 얇은 구분선 하나 넣어주면 더 깔끔해!
-                cols = st.columns(4)
-                cols[0].metric("부채비율", f"{debt_ratio:.1f}%")
-                cols[1].metric("영업이익률", f"{op_margin:.1f}%")
-                cols[2].metric("순이익률", f"{net_margin:.1f}%")
-                cols[3].metric("ROA", f"{roa:.1f}%")
-
-            # [5개년 트렌드 차트]
-            st.divider()
-            st.subheader("📈 최근 5개년 재무 추이")
+                st.info(f"**진단결과: {t}**")
+                st.write(f"부도 확률 예측: **{risk_prob:.2f}%**")
+
+                if reasons:
+                    with st.expander("🧐 주요 위험 요인 분석"):
+                        for r in reasons:
+                            st.write(f"• {r}")
+
+        # [What-if] 비율을 바꾸면 신호등이 어떻게 바뀌는지 (이미 받은 재무제표 비율 기준, 추가 조회 없음)
+        with st.expander("🧪 What-if 스트레스 테스트 (부채비율이 얼마나 줄어야 초록불이 될까?)"):
+            render_stress_test(ratios, dart_code)
+
+        # [B] 하단 구역: 감사의견, 심층 분석 리포트 (전체 가로폭 사용!)
+        st.write("") # 약간의 여백
+        with st.container():
+            st.markdown("### 🧐 AI 심층 분석 리포트")
             
-            # ✅ 변수 선언
-            years_to_check = [found_year - i for i in range(0, 5)]
-            ts_results = []
+            # 1. 감사의견을 전체 가로폭으로 먼저 배치 (rc1, rc2 나누기 전!) - 도착 전까지는 자리만 잡아둠
+            audit_slot = st.empty()
+            audit_slot.info("⏳ 감사의견 조회 중...")
             
-            for y in years_to_check:
-                # 각 연도별로 사업보고서 조회
-                url = "https://opendart.fss.or.kr/api/fnlttMultiAcnt.json"
-                params = {
-                    'crtfc_key': api_key,
-                    'corp_code': dart_code,
-                    'bsns_year': str(y),
-                    'reprt_code': '11011'
-                }
-                
-                try:
-                    res = requests.get(url, params=params, timeout=5)
-                    data = res.json()
-                    
-                    if data.get('status') == '000':
-                        df_y = pd.DataFrame(data['list'])
-                        df_target = df_y[df_y['fs_div'] == 'CFS'] if 'fs_div' in df_y.columns and not df_y[df_y['fs_div'] == 'CFS'].empty else df_y
-                        
-                        ts_results.append({
-                            'year': y,
-                            'sales': get_val_ts(df_target, ['매출액', '영업수익']) / 100000000,
-                            'equity': get_val_ts(df_target, ['자본총계']) / 100000000,
-                            'debt': get_val_ts(df_target, ['부채총계']) / 100000000
-                        })
-                except:
-                    pass
-
-            if ts_results and len(ts_results) >= 2:
-                df_ts = pd.DataFrame(ts_results).sort_values('year')
+            st.write("") # 감사의견과 하단 리포트 사이 살짝 여백
+            # 넓게 깔아주는 리포트 칸
+            rc1, rc2 = st.columns(2)
+            with rc1:
+                st.markdown("#### 🔍 재무 건전성 요약")
+                if debt_ratio > 200: 
+                    st.error(f"⚠️ **부채비율({debt_ratio:.1f}%) 높음**: 타인 자본 의존도가 높아 재무 구조 개선이 시급합니다.")
+                else: 
+                    st.success(f"✅ **부채비율({debt_ratio:.1f}%) 안정**: 매우 건전한 자본 구조를 가지고 있어 외부 충격에 강합니다.")
                 
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=df_ts['year'], 
-                    y=df_ts['sales'], 
-                    name='매출(억)', 
-                    marker_color='rgba(52, 152, 219, 0.6)'
-                ))
-                fig.add_trace(go.Scatter(
-                    x=df_ts['year'], 
-                    y=df_ts['equity'], 
-                    name='자본(억)', 
-                    line=dict(color='green', width=3),
-                    mode='lines+markers'
-                ))
-                fig.add_trace(go.Scatter(
-                    x=df_ts['year'], 
-                    y=df_ts['debt'], 
-                    name='부채(억)', 
-                    line=dict(color='red', width=3),
-                    mode='lines+markers'
-                ))
-                
-                fig.update_layout(
-                    title=f"최근 {len(ts_results)}개년 재무 추이",
-                    xaxis_title="연도",
-                    yaxis_title="금액 (억원)",
-                    hovermode="x unified",
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.warning(f"⚠️ 차트 표시를 위한 충분한 데이터가 없습니다. (조회된 연도: {len(ts_results)}개)")
-
-            # 7. 실시간 우량 종목 추천 (유정이가 말한 핵심 기능!)
+                if op_margin < 0: 
+                    st.error(f"⚠️ **영업적자({op_margin:.1f}%)**: 본업에서 손실이 발생하고 있어 경쟁력 확보가 필요합니다.")
+                else: 
+                    st.success(f"✅ **영업이익률({op_margin:.1f}%)**: 안정적인 영업 활동을 통해 꾸준한 수익을 창출하고 있습니다.")
+            
+            with rc2:
+                st.markdown("#### ⚖️ 기업 유형 진단")
+                if debt_ratio <= 100 and op_margin >= 5: 
+                    st.info("🌟 **[초우량 기업]**\n\n돈도 잘 벌고 빚도 없는 완벽한 상태입니다. 투자 가치가 매우 높은 'Cash Cow'형 기업입니다.")
+                elif debt_ratio <= 100 and op_margin < 5: 
+                    st.warning("💰 **[자산가형 기업]**\n\n수익성은 다소 낮으나 재무적으로 매우 안정적입니다. 당장의 위기에는 강한 타입입니다.")
+                elif debt_ratio > 100 and op_margin >= 5: 
+                    st.warning("🏃 **[성장형 기업]**\n\n부채를 레버리지로 활용해 높은 수익을 내고 있습니다. 공격적인 투자가 진행 중인 상태입니다.")
+                else: 
+                    st.error("🚨 **[위험군 기업]**\n\n수익성이 낮은데 빚까지 많아 구조조정이 시급할 수 있습니다. 각별한 주의가 필요합니다.")
+
+            # --- [2] 핵심 지표 메트릭 (차트 바로 위로 이동!) ---
+            st.write("") # 리포트와 메트릭 사이 여백
+            st.divider() # 얇은 구분선 하나 넣어주면 더 깔끔해!
+            cols = st.columns(4)
+            cols[0].metric("부채비율", f"{debt_ratio:.1f}%")
+            cols[1].metric("영업이익률", f"{op_margin:.1f}%")
+            cols[2].metric("순이익률", f"{net_margin:.1f}%")
+            cols[3].metric("ROA", f"{roa:.1f}%")
+
+        # [5개년 트렌드 차트]
         st.divider()
-        st.subheader(f"🌟 '{corp_name}' 대비 안정성이 높은 추천 기업")
+        st.subheader("📈 최근 5개년 재무 추이")
+        trend_slot = st.empty()
+        trend_slot.info("⏳ 최근 5개년 사업보고서 조회 중...")
+        metrics.record_stage('render', time.perf_counter() - render_started, timings)
+
+    # 7. 실시간 우량 종목 추천 (유정이가 말한 핵심 기능!)
+    st.divider()
+    st.subheader(f"🌟 '{corp_name}' 대비 안정성이 높은 추천 기업")
+    peer_slot = st.empty()
+    peer_slot.info("🚀 실시간 기업 분석 중...")
+    
+    # 먼저 끝나는 패널부터 표시
+    for future in as_completed(panels):
+        kind = panels[future]
+        metrics.record_stage(f'panel_{kind}', time.perf_counter() - panels_started, timings)
+        try:
+            result = future.result()
+        except Exception as e:
+            metrics.record_error(f'panel_{kind}', e)
+            result = None
         
-        if industry_code and industry_code != '알수없음':
-            st.caption(f"업종 코드 {industry_code}({industry_name}) 내 기업들을 분석하여 재무 안정성이 높은 기업을 선별했습니다.")
+        if kind == 'audit':
+            with audit_slot.container():
+                render_audit_box(result, found_year, failed=future.exception() is not None)
+        elif kind == 'trend':
+            with trend_slot.container():
+                if future.exception() is not None:
+                    st.warning("📡 통신 오류로 재무 추이를 불러오지 못했습니다. 다시 진단하면 새로 조회합니다.")
+                else:
+                    render_trend_chart(result or [])
         else:
-            st.caption("상장 기업들을 분석하여 재무 안정성이 높은 기업을 선별했습니다.")
-        
-        with st.spinner("🚀 실시간 기업 분석 중..."):
-            recoms = get_similar_recommends(api_key, corp_map_df, corp_name, industry_code)
-            
-            if recoms:
-                rec_cols = st.columns(4)
-                for idx, item in enumerate(recoms):
-                    with rec_cols[idx]:
-                        # 카드 형태로 예쁘게 출력
-                        st.markdown(f"""
-                        <div style="background-color:#f0f2f6; padding:15px; border-radius:10px; border-top:5px solid #2ecc71;">
-                            <h4 style="margin:0;">{item['name']}</h4>
-                            <code style="font-size:12px;">{item['code']}</code>
-                            <p style="margin:10px 0 0 0; font-size:14px; color:#555;">부도 위험도</p>
-                            <h3 style="margin:0; color:#2ecc71;">{item['prob']:.1f}%</h3>
-                        </div>
-                        """, unsafe_allow_html=True)
-            else:
-                st.write("유사 기업 데이터를 불러오는 데 실패했습니다.")
\ No newline at end of file
+            with peer_slot.container():
+                if result is None:
+                    st.write("유사 기업 데이터를 불러오는 데 실패했습니다.")
+                    continue
+                recoms, notes, industry_code, industry_name = result
+                if industry_code and industry_code != '알수없음':
+                    st.caption(f"업종 코드 {industry_code}({industry_name}) 내 기업들을 분석하여 재무 안정성이 높은 기업을 선별했습니다.")
+                else:
+                    st.caption("상장 기업들을 분석하여 재무 안정성이 높은 기업을 선별했습니다.")
+                render_recommends(recoms, notes)
+
+# ---------------------------------------------------------
+# 6. 성능 패널 (사이드바, 디버그용)
+# ---------------------------------------------------------
+with st.sidebar.expander("🛠 성능 패널"):
+    last_timings = st.session_state.get('last_timings')
+    if last_timings:
+        st.markdown("**마지막 진단 단계별 소요시간**")
+        st.dataframe(
+            pd.DataFrame([{'단계': k, 'ms': round(v * 1000, 1)} for k, v in last_timings.items()]),
+            hide_index=True, use_container_width=True
+        )
+    
+    snap = metrics.snapshot()
+    if snap['endpoints']:
+        st.markdown("**DART 엔드포인트별 (프로세스 누적)**")
+        st.dataframe(pd.DataFrame([
+            {
+                '엔드포인트': ep,
+                '요청': m['latency']['count'],
+                'p50 ms': round(m['latency']['p50'] * 1000),
+                'p95 ms': round(m['latency']['p95'] * 1000),
+                '캐시': m['cache_hits'],
+                '013': m['dart_status'].get('013', 0),
+                '020': m['dart_status'].get('020', 0),
+                '재시도': m['retries'],
+                'KB': round(m['bytes'] / 1024),
+            }
+            for ep, m in snap['endpoints'].items()
+        ]), hide_index=True, use_container_width=True)
+    st.caption(f"오늘 DART 호출 {quota.used():,} / {quota.budget():,}건 (배치 예산 {quota.budget(background=True):,}건)")
+    if metrics.quota_errors():
+        st.error(f"🚨 DART 한도 초과(020) 응답 {metrics.quota_errors()}건")
+    if snap['errors']:
+        st.caption("오류: " + ", ".join(f"{k} {v}건" for k, v in snap['errors'].items()))
+    
+    st.download_button("📄 JSON", metrics.to_json(), file_name="metrics.json", mime="application/json")
+    st.download_button("📈 Prometheus", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
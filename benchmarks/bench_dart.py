@@ -0,0 +1,177 @@
+"""오프라인 성능 벤치마크 (가상 DART 사용, 네트워크/API 키 불필요)
+
+    python benchmarks/bench_dart.py
+    python benchmarks/bench_dart.py --latency 0.08 --jitter 0.04 --repeat 5 --json bench.json
+    python benchmarks/bench_dart.py --fixtures fixtures/dart   # 녹화한 응답 재생
+
+측정 항목
+- cold_start : 모델 로드 + 상장사 목록(corpCode.xml) 다운로드/파싱
+- diagnosis  : 기업개황 + 최신 보고서 조회 + 계정 추출 + 채점 + 감사의견
+- trend      : 최근 5개년 사업보고서 추이
+- peers      : 동일 업종 추천 (업종 인덱스 사용)
+- bulk       : --bulk개 기업 일괄 진단 (screen_companies)
+매 반복마다 HTTP 캐시를 비워서 네트워크(가상 지연)가 포함된 값을 잰다.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="가상 DART 기반 오프라인 벤치마크")
+    p.add_argument('--companies', type=int, default=2500, help="가상 상장사 수")
+    p.add_argument('--bulk', type=int, default=1000, help="일괄 진단 기업 수")
+    p.add_argument('--repeat', type=int, default=5, help="시나리오별 반복 횟수")
+    p.add_argument('--latency', type=float, default=0.05, help="요청당 고정 지연(초)")
+    p.add_argument('--jitter', type=float, default=0.02, help="요청당 추가 무작위 지연 최대값(초)")
+    p.add_argument('--error-rate', type=float, default=0.0, help="통신 오류 비율")
+    p.add_argument('--quota-error-rate', type=float, default=0.0, help="'020' 한도 초과 응답 비율")
+    p.add_argument('--rps', type=float, default=0, help="초당 요청 제한 (0이면 제한 없음)")
+    p.add_argument('--fixtures', help="녹화된 응답 디렉터리 (없는 요청은 가상 데이터로 응답)")
+    p.add_argument('--only', nargs='*', help="실행할 시나리오만 지정")
+    p.add_argument('--json', help="결과를 JSON 파일로 저장 (CI 비교용)")
+    return p.parse_args(argv)
+
+
+def summarize(name, samples, calls, items=1):
+    arr = np.asarray(samples, dtype=float)
+    return {
+        'scenario': name,
+        'runs': len(arr),
+        'p50_ms': float(np.percentile(arr, 50) * 1000),
+        'p95_ms': float(np.percentile(arr, 95) * 1000),
+        'mean_ms': float(arr.mean() * 1000),
+        'throughput_per_s': float(items * len(arr) / arr.sum()) if arr.sum() else 0.0,
+        'dart_calls_per_run': calls / max(len(arr), 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # 저장소/제한 설정은 credit_monitor import 전에 정해야 적용됨
+    data_dir = tempfile.mkdtemp(prefix='credit_bench_')
+    os.environ['CREDIT_MONITOR_DATA_DIR'] = data_dir
+    os.environ['DART_MAX_RPS'] = str(args.rps)
+    sys.path.insert(0, ROOT)
+
+    from credit_monitor import fake_dart, http_cache
+    from credit_monitor.accounts import extract_accounts, ratios_from_accounts
+    from credit_monitor.corp_codes import load_corp_code_map
+    from credit_monitor.dart import fetch_financial_data, get_audit_opinion, get_corp_status
+    from credit_monitor.dart_client import TransportError
+    from credit_monitor.industry_index import IndustryIndex, build_industry_index
+    from credit_monitor.model import load_model
+    from credit_monitor.peer_buckets import PeerBuckets
+    from credit_monitor.peers import get_similar_recommends
+    from credit_monitor.scoring import score_one
+    from credit_monitor.screening import screen_companies
+    from credit_monitor.snapshot import RiskSnapshot
+    from credit_monitor.trend import fetch_trend
+
+    fake = fake_dart.install(
+        fixtures=args.fixtures,
+        synthetic=fake_dart.SyntheticDart(args.companies),
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, quota_error_rate=args.quota_error_rate,
+    )
+    api_key = 'offline-bench'
+    rng = random.Random(0)
+    wanted = set(args.only or ['cold_start', 'diagnosis', 'trend', 'peers', 'bulk'])
+    results = []
+
+    def run(name, fn, items=1, reps=args.repeat, setup=None):
+        if name not in wanted:
+            return
+        samples, calls = [], 0
+        for _ in range(reps):
+            if setup:
+                setup()
+            http_cache.clear()
+            before = fake.calls
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+            calls += fake.calls - before
+        results.append(summarize(name, samples, calls, items))
+        r = results[-1]
+        print(f"{name:<11} p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  "
+              f"{r['throughput_per_s']:9.2f}/s  DART {r['dart_calls_per_run']:.0f}회", file=sys.stderr)
+
+    def wipe_corp_codes():
+        shutil.rmtree(os.path.join(data_dir, 'corp_codes'), ignore_errors=True)
+
+    try:
+        run('cold_start', lambda: (load_model(), load_corp_code_map(api_key)), setup=wipe_corp_codes)
+
+        model = load_model()
+        corp_map = load_corp_code_map(api_key)
+        codes = corp_map.sample(n=min(len(corp_map), 1000), random_state=0)
+
+        def diagnosis():
+            row = codes.iloc[rng.randrange(len(codes))]
+            try:
+                get_corp_status(api_key, row['dart'])
+                df, year, _, _ = fetch_financial_data(api_key, row['dart'], None)
+            except TransportError:
+                return  # --error-rate로 주입한 통신 오류
+            if df is not None:
+                score_one(model, ratios_from_accounts(extract_accounts(df)))
+                get_audit_opinion(api_key, row['dart'], year)
+
+        run('diagnosis', diagnosis)
+
+        def trend():
+            row = codes.iloc[rng.randrange(len(codes))]
+            try:
+                fetch_trend(api_key, row['dart'], time.localtime().tm_year - 1)
+            except TransportError:
+                pass
+
+        run('trend', trend)
+
+        if 'peers' in wanted:
+            build_industry_index(api_key, corp_map)
+        industry_index = IndustryIndex.load()
+        buckets = PeerBuckets(industry_index, RiskSnapshot([]))
+
+        def peers():
+            row = codes.iloc[rng.randrange(len(codes))]
+            info = industry_index.industry_of(row['dart'])
+            try:
+                get_similar_recommends(
+                    api_key, model, corp_map, row['name'], info['induty_code'] if info else None,
+                    buckets, current_code=row['code'],
+                )
+            except TransportError:
+                pass
+
+        run('peers', peers)
+
+        bulk = corp_map.head(args.bulk)
+        run('bulk', lambda: screen_companies(api_key, model, bulk), items=len(bulk), reps=max(1, args.repeat // 2))
+    finally:
+        fake_dart.uninstall()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'config': {k: v for k, v in vars(args).items() if k != 'json'},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""AI 기업 신용 신호등 - Streamlit 화면과 분리된 공용 모듈 모음"""
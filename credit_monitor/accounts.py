@@ -0,0 +1,153 @@
+"""재무제표 계정 한 번에 추출하기 (get_val_ts 반복 스캔 대체)
+
+account_nm 공백 제거는 프레임당 한 번만 하고, 필요한 계정 전체를 별칭 표로 매칭한다.
+여러 기업 x 여러 연도를 이어붙인 프레임도 groupby 한 번으로 줄일 수 있다.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 계정 -> 별칭 (앞에 있을수록 우선)
+ACCOUNT_ALIASES = {
+    'assets': ('자산총계',),
+    'liabilities': ('부채총계',),
+    'equity': ('자본총계',),
+    'sales': ('매출액', '영업수익', '수익(매출액)'),
+    'op_profit': ('영업이익',),
+    'net_profit': ('당기순이익',),
+}
+ACCOUNTS = tuple(ACCOUNT_ALIASES)
+
+# 모델 입력 컬럼 (학습 때와 같은 이름/순서)
+FEATURES = ('부채비율', '영업이익률', '순이익률', 'ROA')
+
+# (계정, 별칭, 우선순위) 평탄화 - 모듈 로드 때 한 번만 만든다
+_ALIAS_TABLE = [
+    (account, alias.replace(' ', ''), priority)
+    for account, aliases in ACCOUNT_ALIASES.items()
+    for priority, alias in enumerate(aliases)
+]
+
+
+@lru_cache(maxsize=4096)
+def is_relevant(account_nm):
+    """계정명이 추출 대상 계정(별칭 하나라도 포함)인지 - 계정명 종류는 많지 않아서 결과를 캐시"""
+    nm = str(account_nm).replace(' ', '')
+    return any(alias in nm for _, alias, _ in _ALIAS_TABLE)
+
+
+def parse_amount(values):
+    """'1,234,567' 같은 문자열 컬럼 -> float (빈 값/파싱 불가는 0)"""
+    s = pd.Series(values).astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(s, errors='coerce').fillna(0.0).astype(float)
+
+
+def select_cfs(df, keys=()):
+    """그룹별로 연결재무제표(CFS)가 있으면 CFS만, 없으면 전체 사용"""
+    if 'fs_div' not in df.columns or df.empty:
+        return df
+    is_cfs = df['fs_div'].eq('CFS')
+    if keys:
+        has_cfs = is_cfs.groupby([df[k] for k in keys]).transform('any')
+    else:
+        has_cfs = pd.Series(is_cfs.any(), index=df.index)
+    return df[is_cfs | ~has_cfs]
+
+
+def get_val_ts(df_in, kws):
+    """계정명 키워드(앞에 있을수록 우선)로 당기 금액 한 건 조회 - 단건용, 대량은 extract_accounts_batch"""
+    for k in kws:
+        rows = df_in[df_in['account_nm'].str.replace(' ', '').str.contains(k, na=False)]
+        if not rows.empty:
+            val = str(rows.iloc[0]['thstrm_amount']).replace(',', '').strip()
+            return float(val) if val else 0.0
+    return 0.0
+
+
+def extract_accounts_batch(frame, keys=(), amount_col='thstrm_amount'):
+    """여러 기업/연도 재무제표 long 프레임 -> keys별 계정 값 한 행씩
+
+    반환 컬럼: keys + ACCOUNTS (찾지 못한 계정은 0.0)
+    """
+    keys = list(keys)
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=keys + list(ACCOUNTS))
+
+    df = select_cfs(frame, keys)
+    # 계정명은 종류가 적으니 고유값에서만 별칭을 찾고 행에는 코드로 펼침 (범주형이면 기존 코드 그대로)
+    if isinstance(df['account_nm'].dtype, pd.CategoricalDtype):
+        codes, names = df['account_nm'].cat.codes.to_numpy(), df['account_nm'].cat.categories
+    else:
+        codes, names = pd.factorize(df['account_nm'])
+    names = pd.Index(names).astype(str).str.replace(' ', '', regex=False)
+    if pd.api.types.is_numeric_dtype(df[amount_col]):
+        amount = df[amount_col].fillna(0.0).to_numpy(float)  # statements long 프레임은 이미 숫자
+    else:
+        amount = parse_amount(df[amount_col].to_numpy()).to_numpy()
+    pos = np.arange(len(df))
+
+    parts = []
+    for account, alias, priority in _ALIAS_TABLE:
+        hit_name = np.append(np.asarray(names.str.contains(alias, regex=False), bool), False)
+        hit = hit_name[codes]  # 코드 -1(빈 계정명)은 마지막 False로
+        if not hit.any():
+            continue
+        part = {k: df[k].to_numpy()[hit] for k in keys}
+        part.update(account=account, priority=priority, pos=pos[hit], value=amount[hit])
+        parts.append(pd.DataFrame(part))
+
+    if keys:
+        groups = df[keys].drop_duplicates().reset_index(drop=True)
+    else:
+        groups = pd.DataFrame(index=[0])
+    if not parts:
+        out = groups.copy()
+        for account in ACCOUNTS:
+            out[account] = 0.0
+        return out
+
+    hits = pd.concat(parts, ignore_index=True)
+    # 별칭 우선순위 -> 원래 행 순서대로 정렬 후 그룹/계정별 첫 행 채택 (get_val_ts와 같은 규칙)
+    hits = hits.sort_values(['priority', 'pos'], kind='stable')
+    hits = hits.drop_duplicates(keys + ['account'], keep='first')
+    if keys:
+        wide = hits.pivot(index=keys, columns='account', values='value').reset_index()
+        out = groups.merge(wide, on=keys, how='left')
+    else:
+        out = pd.DataFrame([hits.set_index('account')['value'].to_dict()])
+    for account in ACCOUNTS:
+        out[account] = out[account].fillna(0.0).astype(float) if account in out else 0.0
+    return out[keys + list(ACCOUNTS)]
+
+
+def extract_accounts(df):
+    """재무제표 한 건(DataFrame 또는 statements.Statement) -> {'assets': ..., 'liabilities': ..., ...}"""
+    if df is None or df.empty:
+        return {account: 0.0 for account in ACCOUNTS}
+    if not isinstance(df, pd.DataFrame):
+        return df.accounts()
+    row = extract_accounts_batch(df).iloc[0]
+    return {account: float(row[account]) for account in ACCOUNTS}
+
+
+def add_ratios(acc):
+    """계정 프레임에 모델 입력 비율 4개(FEATURES)를 벡터 연산으로 추가
+
+    자본 0이면 부채비율 999, 매출/자산 0이면 해당 비율 0 (기존 화면 로직과 동일)
+    """
+    out = acc.copy()
+    a, l, e = out['assets'].to_numpy(float), out['liabilities'].to_numpy(float), out['equity'].to_numpy(float)
+    s, op, net = out['sales'].to_numpy(float), out['op_profit'].to_numpy(float), out['net_profit'].to_numpy(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['부채비율'] = np.where(e != 0, l / np.where(e != 0, e, 1) * 100, 999.0)
+        out['영업이익률'] = np.where(s != 0, op / np.where(s != 0, s, 1) * 100, 0.0)
+        out['순이익률'] = np.where(s != 0, net / np.where(s != 0, s, 1) * 100, 0.0)
+        out['ROA'] = np.where(a != 0, net / np.where(a != 0, a, 1) * 100, 0.0)
+    return out
+
+
+def ratios_from_accounts(acc):
+    """계정 dict 한 건 -> 비율 dict (부채비율, 영업이익률, 순이익률, ROA)"""
+    row = add_ratios(pd.DataFrame([acc])).iloc[0]
+    return {f: float(row[f]) for f in FEATURES}
@@ -0,0 +1,243 @@
+"""감사의견 로컬 테이블 (정기보고서 '회계감사인의 명칭 및 감사의견')
+
+- accnutAdtorNmNdAdtOpinion.json: 사업보고서 한 건에 당기/전기/전전기 감사인과 감사의견이 같이 들어 있음
+  -> 기업마다 요청 한 번으로 3개 사업연도, 여러 기업은 병렬로 한 번에
+- 감사의견은 적정/한정/부적정/의견거절로 정리해서 SQLite(audit_opinion.db)에 저장
+- 화면 감사의견 박스와 일괄 진단은 로컬 테이블만 읽고, 없는 기업/연도만 조회
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from .dart_client import TransportError, background, dart_get_many
+from .filing_calendar import period_ended
+from .storage import connect
+
+AUDIT_DB = 'audit_opinion.db'
+ENDPOINT = 'accnutAdtorNmNdAdtOpinion.json'
+
+# 심각한 순서 (한 연도에 감사의견이 여러 줄이면 가장 나쁜 것 채택)
+OPINIONS = ('적정', '한정', '부적정', '의견거절')
+
+# 감사의견이 없던 조회는 이 기간 동안 다시 묻지 않음 (사업보고서가 아직 안 나온 경우 등)
+RECHECK_DAYS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_opinion (
+    corp_code   TEXT NOT NULL,
+    year        INTEGER NOT NULL,
+    opinion     TEXT,
+    raw_opinion TEXT,
+    auditor     TEXT,
+    rcept_no    TEXT,
+    updated_at  TEXT,
+    PRIMARY KEY (corp_code, year)
+);
+CREATE TABLE IF NOT EXISTS audit_checked (
+    corp_code  TEXT NOT NULL,
+    bsns_year  INTEGER NOT NULL,
+    checked_at TEXT,
+    PRIMARY KEY (corp_code, bsns_year)
+);
+"""
+
+_lock = threading.Lock()
+
+
+def _open():
+    conn = connect(AUDIT_DB)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def normalize_opinion(text):
+    """'적정의견', '한정 의견', '의견 거절' 등 -> 적정/한정/부적정/의견거절 (알 수 없으면 '')"""
+    t = (text or '').replace(' ', '')
+    if '거절' in t:
+        return '의견거절'
+    if '부적정' in t:
+        return '부적정'
+    if '한정' in t:
+        return '한정'
+    if '적정' in t:
+        return '적정'
+    return ''
+
+
+def _period_back(label):
+    """응답의 bsns_year('제56기(당기)', '제55기(전기)' ...) -> 사업연도보다 몇 년 전인지"""
+    label = label or ''
+    if '전전기' in label:
+        return 2
+    if '전기' in label:
+        return 1
+    return 0
+
+
+def _records(data, bsns_year):
+    """응답 하나 -> {(corp_code, year): 레코드} (같은 연도가 여러 줄이면 가장 나쁜 의견)"""
+    out = {}
+    for row in data.get('list', []):
+        back = _period_back(row.get('bsns_year'))
+        opinion = normalize_opinion(row.get('adt_opinion'))
+        key = (row.get('corp_code'), bsns_year - back)
+        rec = {
+            'corp_code': key[0], 'year': key[1], 'opinion': opinion,
+            'raw_opinion': (row.get('adt_opinion') or '').strip(), 'auditor': (row.get('adtor') or '').strip(),
+            'rcept_no': row.get('rcept_no', ''), 'back': back,
+        }
+        old = out.get(key)
+        if old is None or _severity(opinion) > _severity(old['opinion']):
+            out[key] = rec
+    return out
+
+
+def _severity(opinion):
+    return OPINIONS.index(opinion) if opinion in OPINIONS else -1
+
+
+def save_opinions(records):
+    """레코드 저장 - 당기 값은 덮어쓰고, 전기/전전기 값은 그 연도 당기 값이 없을 때만"""
+    if not records:
+        return 0
+    now = datetime.now().isoformat(timespec='seconds')
+    rows = [(r['corp_code'], r['year'], r['opinion'], r['raw_opinion'], r['auditor'], r['rcept_no'], now)
+            for r in records]
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany("INSERT OR REPLACE INTO audit_opinion VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [row for row, r in zip(rows, records) if r['back'] == 0])
+            conn.executemany("INSERT OR IGNORE INTO audit_opinion VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [row for row, r in zip(rows, records) if r['back'] != 0])
+            conn.commit()
+        finally:
+            conn.close()
+    return len(records)
+
+
+def fetch_audit_opinions(api_key, corp_codes, bsns_year, timeout=10):
+    """기업 목록의 bsns_year 사업보고서 감사의견 조회 + 저장 (기업별 요청을 병렬로)
+
+    반환값: (저장한 레코드 수, 통신 오류가 난 corp_code 집합)
+    """
+    corp_codes = list(dict.fromkeys(corp_codes))
+    responses = dart_get_many([
+        (ENDPOINT, {'crtfc_key': api_key, 'corp_code': corp, 'bsns_year': str(bsns_year), 'reprt_code': '11011'})
+        for corp in corp_codes
+    ], timeout=timeout)
+    records, failed, checked = [], set(), []
+    for corp, data in zip(corp_codes, responses):
+        if isinstance(data, Exception):
+            failed.add(corp)
+            continue
+        checked.append(corp)
+        if data.get('status') == '000':
+            records.extend(_records(data, int(bsns_year)).values())
+    now = datetime.now().isoformat(timespec='seconds')
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany("INSERT OR REPLACE INTO audit_checked VALUES (?, ?, ?)",
+                             [(corp, int(bsns_year), now) for corp in checked])
+            conn.commit()
+        finally:
+            conn.close()
+    return save_opinions(records), failed
+
+
+def refresh_audit_opinions(api_key, corp_codes, years, recheck_days=RECHECK_DAYS):
+    """테이블에 없는 (기업, 연도)만 조회 - 사업보고서 한 건이 3개 연도를 덮으니 최근 연도부터 3년씩 묶음
+
+    끝나지 않은 사업연도와 최근 recheck_days 안에 이미 물어본 (기업, 사업연도)는 건너뜀
+    반환값: (조회한 요청 수, 통신 오류가 난 corp_code 집합)
+    """
+    years = sorted({int(y) for y in years if period_ended(int(y), '11011')}, reverse=True)
+    corp_codes = list(dict.fromkeys(corp_codes))
+    if not years or not corp_codes:
+        return 0, set()
+    cutoff = (datetime.now() - timedelta(days=recheck_days)).isoformat(timespec='seconds')
+    conn = _open()
+    try:
+        have = set(conn.execute(
+            "SELECT corp_code, year FROM audit_opinion WHERE year BETWEEN ? AND ? "
+            f"AND corp_code IN ({', '.join('?' * len(corp_codes))})",
+            [years[-1], years[0]] + corp_codes,
+        ))
+        recent = set(conn.execute("SELECT corp_code, bsns_year FROM audit_checked WHERE checked_at >= ?", (cutoff,)))
+    finally:
+        conn.close()
+
+    # 사업연도별로 조회할 기업 모으기
+    todo = {}
+    for corp in corp_codes:
+        covered = set()
+        for year in years:
+            if (corp, year) in have or year in covered:
+                continue
+            # 그 연도 사업보고서가 전기/전전기까지 같이 채움
+            covered.update((year, year - 1, year - 2))
+            if (corp, year) not in recent:
+                todo.setdefault(year, []).append(corp)
+    failed = set()
+    for bsns_year, corps in todo.items():
+        failed |= fetch_audit_opinions(api_key, corps, bsns_year)[1]
+    return sum(len(c) for c in todo.values()), failed
+
+
+def load_opinions(corp_codes=None, years=None):
+    """로컬 테이블 -> corp_code/year/opinion/raw_opinion/auditor 프레임 (네트워크 호출 없음)"""
+    sql, params = "SELECT corp_code, year, opinion, raw_opinion, auditor FROM audit_opinion", []
+    if corp_codes is not None:
+        params = list(dict.fromkeys(corp_codes))
+        sql += f" WHERE corp_code IN ({', '.join('?' * len(params))})"
+    conn = _open()
+    try:
+        frame = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    if years is not None:
+        frame = frame[frame['year'].isin({int(y) for y in years})]
+    return frame.reset_index(drop=True)
+
+
+def latest_opinions(corp_codes, year):
+    """기업별 year 이하 가장 최근 사업연도 감사의견 -> {corp_code: 레코드} (로컬 테이블만)"""
+    frame = load_opinions(corp_codes)
+    frame = frame[(frame['year'] <= int(year)) & (frame['opinion'] != '')]
+    frame = frame.sort_values('year', ascending=False).drop_duplicates('corp_code')
+    return {r['corp_code']: r for r in frame.to_dict('records')}
+
+
+def audit_opinion(api_key, dart_code, business_year):
+    """진단 화면용: business_year 이하 가장 최근 감사의견 레코드 (없으면 None)
+
+    테이블에 있으면 네트워크 호출 없이, 없을 때만 사업보고서 한 건(3개 연도)을 조회해서 채움
+    가장 최근 끝난 사업연도 보고서가 아직 안 나왔으면(1~3월) 그 전 사업연도 보고서로 직전 의견을 채움
+    조회가 통신 오류로 끝나면 TransportError (예전 의견을 최신인 것처럼 보여주지 않음)
+    """
+    years = [int(business_year), int(business_year) - 1]
+    newest = max(y for y in years if period_ended(y, '11011'))
+    found = latest_opinions([dart_code], business_year).get(dart_code)
+    if found is None or found['year'] < newest:
+        _, failed = refresh_audit_opinions(api_key, [dart_code], years)
+        found = latest_opinions([dart_code], business_year).get(dart_code)
+        if not failed and (found is None or found['year'] < newest - 1):
+            _, failed = refresh_audit_opinions(api_key, [dart_code], [newest - 1])
+            found = latest_opinions([dart_code], business_year).get(dart_code)
+        if failed:
+            raise TransportError(f"{dart_code} 감사의견 조회 통신 오류")
+    return found
+
+
+@background()
+def build_audit_table(api_key, corp_map, years, batch=100, progress=None):
+    """상장사 전체 감사의견 일괄 구축/증분 갱신 (야간 배치) -> 조회한 요청 수"""
+    darts = list(corp_map['dart'])
+    done = 0
+    for start in range(0, len(darts), batch):
+        done += refresh_audit_opinions(api_key, darts[start:start + batch], years)[0]
+        if progress:
+            progress(min(start + batch, len(darts)), len(darts))
+    return done
@@ -0,0 +1,238 @@
+"""명령줄 실행 (Streamlit 없이 배치 작업용)
+
+    python -m credit_monitor screen codes.txt -o result.csv
+    python -m credit_monitor index
+    python -m credit_monitor snapshot [--full]
+    python -m credit_monitor audit [--years 3]
+    python -m credit_monitor corp-codes [--force]
+    python -m credit_monitor export-model [--check-only]
+    python -m credit_monitor watch codes.txt [--once] [--interval 600] [--events events.jsonl] [--webhook URL]
+
+screen: 종목코드 파일(한 줄에 하나, 또는 code 컬럼이 있는 CSV)을 읽어
+묶음 단위로 병렬 진단하고, 묶음이 끝날 때마다 결과를 파일에 이어 쓴다.
+중간에 끊겨도 다시 실행하면 이미 결과가 있는 종목은 건너뛴다.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .audit import build_audit_table
+from .corp_codes import corp_master_info, load_corp_code_map, refresh_corp_codes
+from .dart_client import QuotaExceeded, background, quota
+from .industry_index import apply_corp_changes as apply_index_changes
+from .industry_index import build_industry_index
+from .forest import NumpyForest, export_forest, verify_parity
+from .model import COMPACT_MODEL_PATH, MODEL_PATH, load_api_key, load_model, load_sklearn_model
+from .screening import RESULT_COLUMNS, screen_companies
+from .snapshot import apply_corp_changes as apply_snapshot_changes
+from .snapshot import build_snapshot
+from .watchlist import JsonlSink, WebhookSink, poll, set_watchlist
+
+
+def read_codes(path):
+    """종목코드 목록 파일 -> 6자리 코드 리스트 (중복 제거, 순서 유지)"""
+    if path.endswith('.csv'):
+        codes = pd.read_csv(path, dtype=str)['code'].dropna().tolist()
+    else:
+        with open(path, encoding='utf-8') as f:
+            codes = [line.split('#')[0].strip() for line in f]
+    return list(dict.fromkeys(c.strip().zfill(6) for c in codes if c.strip()))
+
+
+def _require_api_key():
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("DART_API_KEY가 설정되지 않았습니다.")
+    return api_key
+
+
+def _checkpoint_path(output):
+    # parquet은 이어쓰기가 안 되니 진행 중에는 CSV에 쌓고 마지막에 변환
+    return output + '.partial.csv' if output.endswith('.parquet') else output
+
+
+def _done_codes(checkpoint):
+    if not os.path.exists(checkpoint):
+        return set()
+    return set(pd.read_csv(checkpoint, dtype={'code': str}, usecols=['code'])['code'])
+
+
+def run_screen(args):
+    api_key = _require_api_key()
+    model = load_model()
+    corp_map = load_corp_code_map(api_key)
+
+    codes = read_codes(args.codes)
+    checkpoint = _checkpoint_path(args.output)
+    done = _done_codes(checkpoint)
+    todo = corp_map[corp_map['code'].isin(codes) & ~corp_map['code'].isin(done)]
+    todo = todo.set_index('code').loc[[c for c in codes if c in set(todo['code'])]].reset_index()
+
+    unknown = set(codes) - set(corp_map['code'])
+    if unknown:
+        print(f"⚠️ 종목코드 {len(unknown)}개는 상장사 목록에 없어 건너뜀", file=sys.stderr)
+    print(f"📡 전체 {len(codes)}개 중 완료 {len(done)}개, 남은 {len(todo)}개", file=sys.stderr)
+
+    retry = 0
+    for start in range(0, len(todo), args.batch):
+        batch = todo.iloc[start:start + args.batch]
+        result = screen_companies(api_key, model, batch, max_workers=args.workers)
+        # 통신 오류/한도로 실패한 기업은 완료로 기록하지 않음 (다시 실행하면 그 기업만 다시 조회)
+        # '재무제표 없음'만 확정된 결과로 남김
+        failed = result['error'] == '조회 실패'
+        retry += int(failed.sum())
+        result = result[~failed]
+        # 한도/예산 소진이면 여기서 멈춤 (다음 실행 때 이어서)
+        stop = not quota.available(background=True)
+        write_header = not os.path.exists(checkpoint)
+        result.to_csv(checkpoint, mode='a', header=write_header, index=False, columns=RESULT_COLUMNS)
+        if stop:
+            print(f"⛔ DART 호출 한도/예산 소진 - 중단 (오늘 {quota.used()}건 사용, 다시 실행하면 이어서 진행)", file=sys.stderr)
+            return
+        print(f"✅ {min(start + args.batch, len(todo))}/{len(todo)} 완료", file=sys.stderr)
+
+    if retry:
+        # 체크포인트를 남겨 둬야 다시 실행할 때 실패한 기업만 이어서 조회함
+        print(f"⚠️ 통신 오류 {retry}개 기업은 결과에서 빠짐 - 다시 실행하면 그 기업만 다시 조회", file=sys.stderr)
+        return
+    if checkpoint != args.output and os.path.exists(checkpoint):
+        pd.read_csv(checkpoint, dtype={'code': str, 'dart': str}).to_parquet(args.output, index=False)
+        os.remove(checkpoint)
+    print(f"📁 결과 저장: {args.output}", file=sys.stderr)
+
+
+def run_index(args):
+    api_key = _require_api_key()
+    corp_map = load_corp_code_map(api_key)
+    n = build_industry_index(
+        api_key, corp_map, max_age_days=args.max_age_days,
+        progress=lambda i, total: print(f"\r🏭 {i}/{total}", end='', file=sys.stderr),
+    )
+    print(f"\n✅ {n}개 기업 업종 정보 갱신", file=sys.stderr)
+
+
+def run_snapshot(args):
+    api_key = _require_api_key()
+    n = build_snapshot(
+        api_key, load_model(), load_corp_code_map(api_key), full=args.full,
+        progress=lambda i, total: print(f"\r📊 {i}/{total}", end='', file=sys.stderr),
+    )
+    print(f"\n✅ {n}개 기업 스냅샷 갱신", file=sys.stderr)
+
+
+def run_audit(args):
+    api_key = _require_api_key()
+    last = datetime.now().year - 1
+    n = build_audit_table(
+        api_key, load_corp_code_map(api_key), [last - i for i in range(args.years)],
+        progress=lambda i, total: print(f"\r🧾 {i}/{total}", end='', file=sys.stderr),
+    )
+    print(f"\n✅ 감사의견 {n}건 조회", file=sys.stderr)
+
+
+def run_corp_codes(args):
+    api_key = _require_api_key()
+    _, diff = refresh_corp_codes(api_key, force=args.force)
+    info = corp_master_info()
+    if not diff:
+        print(f"✅ 상장사 목록 v{info.get('version', 0)} 변경 없음 ({info.get('rows', 0)}개)", file=sys.stderr)
+        return
+    # 업종 인덱스/스냅샷에도 변경분만 반영 (화면은 변경 기록을 읽어서 메모리 표에 반영)
+    apply_index_changes(diff)
+    apply_snapshot_changes(diff)
+    print(f"✅ 상장사 목록 v{info['version']}: 신규 상장 {len(diff['added'])}, 상장폐지 {len(diff['removed'])}, "
+          f"이름/코드 변경 {len(diff['renamed'])}", file=sys.stderr)
+    for r in diff['renamed']:
+        print(f"   {r['old_name']}({r['old_code']}) → {r['name']}({r['code']})", file=sys.stderr)
+
+
+def run_export_model(args):
+    model = load_sklearn_model(args.pkl)
+    if not args.check_only:
+        export_forest(model, args.output)
+        print(f"📦 {args.output} 저장 ({os.path.getsize(args.output) / 1024:.0f} KB)", file=sys.stderr)
+    ok, diff, n = verify_parity(model, NumpyForest.load(args.output))
+    print(f"{'✅' if ok else '❌'} predict_proba 비교 {n:,}건, 최대 오차 {diff:.3g}", file=sys.stderr)
+    if not ok:
+        sys.exit(1)
+
+
+def run_watch(args):
+    api_key = _require_api_key()
+    model = load_model()
+    n = set_watchlist(load_corp_code_map(api_key), read_codes(args.codes))
+    sinks = [JsonlSink(args.events)] + ([WebhookSink(args.webhook)] if args.webhook else [])
+    print(f"👀 관심 기업 {n}개 감시 시작", file=sys.stderr)
+    while True:
+        try:
+            events = poll(api_key, model)
+        except QuotaExceeded as e:
+            print(f"⛔ {e}", file=sys.stderr)
+            events = []
+        for event in events:
+            for sink in sinks:
+                sink.emit(event)
+            print(f"🚨 {event['name']}({event['code']}) {event['old_band']} → {event['new_band']} "
+                  f"({event['old_prob']:.1f}% → {event['new_prob']:.1f}%, {event['year']}년 {event['report']})", file=sys.stderr)
+        print(f"✅ {datetime.now():%H:%M:%S} 확인 완료 (등급 변경 {len(events)}건)", file=sys.stderr)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m credit_monitor', description="AI 기업 신용 신호등 배치 도구")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('screen', help="종목코드 목록 일괄 진단")
+    p.add_argument('codes', help="종목코드 파일 (한 줄에 하나, 또는 code 컬럼 CSV)")
+    p.add_argument('-o', '--output', default='screen_result.csv', help="결과 파일 (.csv 또는 .parquet)")
+    p.add_argument('--batch', type=int, default=50, help="체크포인트 단위 기업 수")
+    p.add_argument('--workers', type=int, default=8, help="동시 조회 기업 수")
+    p.set_defaults(func=run_screen)
+
+    p = sub.add_parser('index', help="업종 인덱스 구축/증분 갱신")
+    p.add_argument('--max-age-days', type=int, default=90)
+    p.set_defaults(func=run_index)
+
+    p = sub.add_parser('snapshot', help="상장사 전체 위험 스냅샷 구축/증분 갱신 (야간 배치)")
+    p.add_argument('--full', action='store_true', help="변경 여부와 상관없이 전체 재계산")
+    p.set_defaults(func=run_snapshot)
+
+    p = sub.add_parser('audit', help="상장사 전체 감사의견 테이블 구축/증분 갱신 (없는 기업/연도만 조회)")
+    p.add_argument('--years', type=int, default=3, help="직전 사업연도부터 몇 개년")
+    p.set_defaults(func=run_audit)
+
+    p = sub.add_parser('corp-codes', help="상장사 고유번호 목록 변경 확인 (신규 상장/상장폐지/이름 변경만 반영)")
+    p.add_argument('--force', action='store_true', help="조건부 요청 없이 다시 받아서 비교")
+    p.set_defaults(func=run_corp_codes)
+
+    p = sub.add_parser('export-model', help="pkl 모델을 numpy 배열(.npz)로 변환하고 예측값 일치 확인")
+    p.add_argument('--pkl', default=MODEL_PATH)
+    p.add_argument('-o', '--output', default=COMPACT_MODEL_PATH)
+    p.add_argument('--check-only', action='store_true', help="변환 없이 기존 .npz와 비교만")
+    p.set_defaults(func=run_export_model)
+
+    p = sub.add_parser('watch', help="관심 기업 공시 감시 - 새 보고서가 나오면 다시 채점하고 등급 변경 알림")
+    p.add_argument('codes', help="관심 종목코드 파일 (한 줄에 하나, 또는 code 컬럼 CSV)")
+    p.add_argument('--interval', type=int, default=600, help="확인 주기(초)")
+    p.add_argument('--once', action='store_true', help="한 번만 확인하고 종료 (cron 등에서 실행할 때)")
+    p.add_argument('--events', default='watch_events.jsonl', help="등급 변경 이벤트 기록 파일")
+    p.add_argument('--webhook', help="등급 변경 이벤트를 POST할 URL")
+    p.set_defaults(func=run_watch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 배치 작업은 모두 백그라운드 예산으로 (화면 진단용 호출 여유를 남겨 둠)
+    with background():
+        args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""DART 고유번호(CORPCODE.xml) 스트리밍 로더 + 컬럼형 로컬 저장
+
+- ElementTree 전체 트리 대신 iterparse로 한 노드씩 읽고 바로 clear
+- 상장사(종목코드 있는 기업)만 고정폭 numpy 배열(code/dart/name)에 담음
+- 결과는 .npy 파일로 저장해 두고 다음 시작 때는 mmap으로 바로 읽음
+- 다운로드 시 ETag/Last-Modified와 zip 해시를 기록해 내용이 같으면 재파싱 생략
+- 상장사 목록이 실제로 바뀌었을 때만 버전을 올리고 변경분(신규 상장/상장폐지/이름·종목코드 변경)을
+  changes.jsonl에 남김 -> 메모리의 표와 업종 인덱스/스냅샷은 변경분만 제자리 반영
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .dart_client import DART_API, send_request
+from .metrics import metrics
+from .storage import data_path
+
+CORP_CODE_URL = DART_API + "corpCode.xml"
+COLUMNS = ('code', 'dart', 'name')
+CHANGES_FILE = 'changes.jsonl'
+
+# 변경 확인 주기 (시간)
+CHECK_HOURS = 24
+
+# 확인이 실패했을 때 다시 시도하기까지 (초) - 매 화면 갱신마다 다운로드를 붙잡지 않도록
+RETRY_SECONDS = 600
+
+
+def _store_dir():
+    path = data_path('corp_codes')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_meta():
+    try:
+        with open(os.path.join(_store_dir(), 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta):
+    path = os.path.join(_store_dir(), 'meta.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def parse_corp_code_xml(fileobj):
+    """CORPCODE.xml 스트림 -> {'code', 'dart', 'name'} numpy 배열 (상장사만)"""
+    codes, darts, names = [], [], []
+    for _, elem in ET.iterparse(fileobj, events=('end',)):
+        if elem.tag != 'list':
+            continue
+        corp_code = stock_code = corp_name = None
+        for child in elem:
+            if child.tag == 'stock_code':
+                stock_code = child.text
+            elif child.tag == 'corp_code':
+                corp_code = child.text
+            elif child.tag == 'corp_name':
+                corp_name = child.text
+        if stock_code is not None and len(stock_code.strip()) >= 5:
+            codes.append(stock_code.strip().zfill(6))  # 6자리 강제 맞춤 (005930 등)
+            darts.append(corp_code)
+            names.append(corp_name or '')
+        elem.clear()
+    return {
+        'code': np.array(codes, dtype='<U6'),
+        'dart': np.array(darts, dtype='<U8'),
+        'name': np.array(names, dtype=str),
+    }
+
+
+def save_columns(columns, meta):
+    # 임시 파일에 쓰고 교체 -> 이미 mmap으로 열어 둔 이전 배열은 그대로 유효
+    d = _store_dir()
+    for col in COLUMNS:
+        path = os.path.join(d, f'{col}.npy')
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, columns[col])
+        os.replace(path + '.tmp', path)
+    _write_meta(meta)
+
+
+def load_columns():
+    """저장된 컬럼 배열을 mmap으로 읽기 (없으면 None)"""
+    d = _store_dir()
+    try:
+        return {col: np.load(os.path.join(d, f'{col}.npy'), mmap_mode='r') for col in COLUMNS}
+    except (OSError, ValueError):
+        return None
+
+
+def to_frame(columns):
+    """mmap 배열 -> 프레임 (고정폭 문자열 배열을 그대로 넘겨 한 번만 변환, 파이썬 객체 배열로 먼저 복사하지 않음)
+
+    화면에서 표를 직접 고치는 곳은 없고, 변경분 반영(apply_diff)도 복사본에서 하므로 읽기 전용 변환이면 충분
+    """
+    return pd.DataFrame({col: columns[col] for col in COLUMNS}, copy=False)
+
+
+def diff_columns(old, new):
+    """이전/새 상장사 배열 -> 변경분 (DART 고유번호 기준)
+
+    반환값: {'added': [{code, dart, name}], 'removed': [...],
+             'renamed': [{code, dart, name, old_code, old_name}]}  (이름 또는 종목코드가 바뀐 기업)
+    """
+    before = {d: (c, n) for c, d, n in zip(*(np.asarray(old[col]).tolist() for col in COLUMNS))}
+    after = {d: (c, n) for c, d, n in zip(*(np.asarray(new[col]).tolist() for col in COLUMNS))}
+    diff = {'added': [], 'removed': [], 'renamed': []}
+    for dart, (code, name) in after.items():
+        if dart not in before:
+            diff['added'].append({'code': code, 'dart': dart, 'name': name})
+        elif before[dart] != (code, name):
+            old_code, old_name = before[dart]
+            diff['renamed'].append({'code': code, 'dart': dart, 'name': name, 'old_code': old_code, 'old_name': old_name})
+    diff['removed'] = [{'code': c, 'dart': d, 'name': n} for d, (c, n) in before.items() if d not in after]
+    return diff
+
+
+def has_changes(diff):
+    return bool(diff) and any(diff[k] for k in ('added', 'removed', 'renamed'))
+
+
+def apply_diff(frame, diff):
+    """상장사 표에 변경분만 반영한 새 프레임 (전체를 다시 만들지 않음, 기존 순서 유지)"""
+    gone = {r['dart'] for r in diff['removed']}
+    out = frame[~frame['dart'].isin(gone)].copy() if gone else frame.copy()
+    if diff['renamed']:
+        pos = pd.Series(range(len(out)), index=out['dart'].to_numpy())
+        for r in diff['renamed']:
+            if r['dart'] in pos.index:
+                i = pos[r['dart']]
+                out.iloc[i, out.columns.get_loc('code')] = r['code']
+                out.iloc[i, out.columns.get_loc('name')] = r['name']
+    if diff['added']:
+        out = pd.concat([out, pd.DataFrame(diff['added'], columns=list(COLUMNS))], ignore_index=True)
+    return out.reset_index(drop=True)
+
+
+def _log_changes(version, diff):
+    entry = {'version': version, 'time': time.time(), **{k: diff[k] for k in ('added', 'removed', 'renamed')}}
+    with open(os.path.join(_store_dir(), CHANGES_FILE), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def load_changes(since_version=0):
+    """since_version 이후의 변경 기록 목록 (오래된 순)"""
+    try:
+        with open(os.path.join(_store_dir(), CHANGES_FILE), encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+    return [e for e in entries if e['version'] > since_version]
+
+
+def corp_master_info():
+    """저장본 메타 (version, downloaded_at, checked_at, rows ...) - 없으면 빈 dict"""
+    return _read_meta() or {}
+
+
+def refresh_corp_codes(api_key, force=False):
+    """corpCode.xml 조건부 다운로드 -> 바뀌었을 때만 파싱, 상장사 목록이 바뀌었을 때만 저장
+
+    zip이 바뀌어도(비상장 법인 변경 등) 상장사 변경분이 없으면 버전과 배열은 그대로 두고 메타만 갱신
+    force=True면 조건부 헤더/해시 비교 없이 다시 받아서 파싱 (변경분 계산은 동일)
+    반환값: (columns, diff) - 상장사 변경이 없으면 diff는 None (처음 받은 경우는 전부 added)
+    """
+    meta = _read_meta() or {}
+    old = load_columns()
+    # 조건부 헤더는 로컬 배열이 실제로 읽힐 때만 (메타만 남아 있으면 304에 빈 본문이 와서 복구 불가)
+    headers = {}
+    if not force and old is not None and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if not force and old is not None and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    start = time.perf_counter()
+    r = send_request(CORP_CODE_URL, {'crtfc_key': api_key}, timeout=60, headers=headers)
+    metrics.record_request('corpCode.xml', time.perf_counter() - start, http_status=r.status_code, nbytes=len(r.content))
+    if not force and r.status_code == 304 and old is not None:
+        meta['checked_at'] = time.time()
+        _write_meta(meta)
+        return old, None
+
+    digest = hashlib.sha1(r.content).hexdigest()
+    if not force and old is not None and digest == meta.get('sha1'):
+        meta['checked_at'] = time.time()
+        _write_meta(meta)
+        return old, None
+
+    with zipfile.ZipFile(io.BytesIO(r.content)) as z:
+        with z.open('CORPCODE.xml') as f:
+            columns = parse_corp_code_xml(f)
+    diff = diff_columns(old if old is not None else {col: [] for col in COLUMNS}, columns)
+    now = time.time()
+    meta.update({
+        'etag': r.headers.get('ETag'),
+        'last_modified': r.headers.get('Last-Modified'),
+        'sha1': digest,
+        'downloaded_at': now,
+        'checked_at': now,
+    })
+    if old is not None and not has_changes(diff):
+        _write_meta(meta)
+        return old, None
+    meta['version'] = meta.get('version', 0) + 1
+    meta['rows'] = int(len(columns['code']))
+    meta['changed_at'] = now
+    save_columns(columns, meta)
+    _log_changes(meta['version'], diff)
+    return columns, diff
+
+
+def load_corp_code_map(api_key, max_age_hours=CHECK_HOURS):
+    """상장사 고유번호 표 (code, dart, name)
+
+    로컬 저장본이 max_age_hours 이내에 확인된 것이면 네트워크 없이 바로 반환
+    """
+    meta = _read_meta()
+    columns = load_columns()
+    if columns is not None and meta and time.time() - meta.get('checked_at', 0) < max_age_hours * 3600:
+        return to_frame(columns)
+    try:
+        columns, _ = refresh_corp_codes(api_key)
+    except Exception:
+        if columns is None:
+            raise
+        # 다운로드 실패해도 예전 저장본이 있으면 그걸로 계속 동작
+    return to_frame(columns)
+
+
+class CorpMaster:
+    """메모리 상주 상장사 표 + 버전 (세션 간 공유)
+
+    확인 주기(max_age_hours)가 지났을 때만 corpCode.xml을 조건부로 확인하고,
+    상장사 변경분이 있으면 표에 제자리 반영해서 버전을 올림 (표 전체를 다시 읽지 않음)
+    검색 인덱스 등 표에 딸린 캐시는 version을 키로 쓰면 바뀐 때만 다시 만들어짐
+    """
+
+    def __init__(self, api_key, max_age_hours=CHECK_HOURS):
+        self.api_key = api_key
+        self.max_age_hours = max_age_hours
+        self.frame = load_corp_code_map(api_key, max_age_hours)
+        self.version = corp_master_info().get('version', 0)
+        self.last_diff = None
+        self.last_error = None
+        self._retry_at = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def due(self):
+        if time.time() < self._retry_at:
+            return False
+        return time.time() - corp_master_info().get('checked_at', 0) >= self.max_age_hours * 3600
+
+    def refresh(self, check_now=False):
+        """주기가 지났으면(check_now면 바로) 변경 확인 -> 반영한 변경분 (없으면 None)
+
+        다른 프로세스(CLI 배치 등)가 먼저 받아 둔 변경분도 변경 기록에서 읽어서 반영
+        """
+        with self._lock:
+            if check_now or self.due():
+                try:
+                    refresh_corp_codes(self.api_key)
+                    self.last_error = None
+                except Exception as e:
+                    # 확인 실패해도 지금 표로 계속 동작
+                    self.last_error = str(e)
+                    self._retry_at = time.time() + RETRY_SECONDS
+            pending = load_changes(self.version)
+            if not pending:
+                return None
+            diff = merge_changes(pending)
+            self.frame = apply_diff(self.frame, diff)
+            self.version = pending[-1]['version']
+            self.last_diff = diff
+            return diff
+
+
+def merge_changes(entries):
+    """여러 버전의 변경 기록 -> 한 번에 반영할 변경분 (같은 기업은 마지막 상태 기준)"""
+    state = {}
+    for entry in entries:
+        for kind in ('removed', 'added', 'renamed'):
+            for rec in entry[kind]:
+                prev = state.get(rec['dart'])
+                if kind == 'removed':
+                    # 이번 구간에 새로 상장했다가 폐지되었으면 없던 일로
+                    state[rec['dart']] = None if prev and prev[0] == 'added' else ('removed', rec)
+                elif kind == 'added' and prev and prev[0] == 'removed':
+                    state[rec['dart']] = ('renamed', {**rec, 'old_code': prev[1]['code'], 'old_name': prev[1]['name']})
+                elif kind == 'renamed' and prev and prev[0] in ('added', 'renamed'):
+                    base = prev[1] if prev[0] == 'renamed' else {'old_code': None, 'old_name': None}
+                    state[rec['dart']] = (prev[0], {**rec, 'old_code': base.get('old_code'), 'old_name': base.get('old_name')})
+                else:
+                    state[rec['dart']] = (kind, rec)
+    diff = {'added': [], 'removed': [], 'renamed': []}
+    for item in state.values():
+        if item is not None:
+            kind, rec = item
+            diff[kind].append({k: v for k, v in rec.items() if kind == 'renamed' or k in COLUMNS})
+    return diff
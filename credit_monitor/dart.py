@@ -0,0 +1,160 @@
+"""OpenDART 조회 함수 모음 (Streamlit 없이 배치 작업에서도 import 가능)"""
+from datetime import datetime, timedelta
+
+from .audit import audit_opinion
+from .dart_client import TransportError, dart_get, dart_get_first
+from .filing_calendar import predict_latest
+from .statements import Statement
+
+
+def fetch_financial_data(api_key, dart_code, target_year):
+    """최신 분기보고서(3분기 -> 반기 -> 1분기) 우선 조회, 없으면 사업보고서 조회
+
+    반환값: (Statement, 사업연도, 보고서명, 로그) - 못 찾으면 (None, None, None, 로그)
+    찾지 못했는데 통신 오류가 난 후보가 있으면 TransportError (로그는 e.log)
+    """
+    log = []
+    
+    # 보고서 코드: 3분기(11014), 반기(11012), 1분기(11013), 사업보고서(11011)
+    # 유정아, 가장 최신인 3분기부터 순서대로 리스트를 만들었어!
+    report_codes = [
+        ('11014', '3분기보고서'), 
+        ('11012', '반기보고서'), 
+        ('11013', '1분기보고서'), 
+        ('11011', '사업보고서')
+    ]
+    
+    current_year = datetime.now().year
+    report_names = dict(report_codes)
+    # 공시 목록(list.json)과 법정 제출기한으로 가장 최신 보고서를 예측해서 그것 하나만 먼저 조회
+    # 빗나가면 나머지 후보(보고 기간이 끝난 것만)를 한꺼번에 보내고 가장 최신 순위의 성공 응답을 채택
+    filed = filed_reports(api_key, dart_code)
+    probes = [(year, code, report_names[code])
+              for year, code in predict_latest([current_year, current_year - 1], filed)]
+    calls = [
+        ("fnlttMultiAcnt.json", {
+            'crtfc_key': api_key, 
+            'corp_code': dart_code,
+            'bsns_year': str(year), 
+            'reprt_code': code
+        })
+        for year, code, name in probes
+    ]
+    
+    hit, data, results = dart_get_first(calls[:1], timeout=5)
+    if hit is None and len(calls) > 1:
+        rest_hit, data, rest = dart_get_first(calls[1:], timeout=5)
+        hit = None if rest_hit is None else rest_hit + 1
+        results = results + rest
+    for (year, code, name), r in zip(probes, results):
+        if isinstance(r, Exception):
+            log.append(f"⚠️ {year}년 {name} 통신오류: {str(r)}")
+        elif r.get('status') == '000':
+            log.append(f"✅ {year}년 {name} 발견")
+        else:
+            # status가 000이 아니면 데이터가 아직 없는 거니까 로그만 남기고 다음으로!
+            log.append(f"❌ {year}년 {name}: {r.get('message')}")
+    
+    if hit is not None:
+        year, code, name = probes[hit]
+        return Statement.from_response(data, dart_code, year, code), year, name, log
+    if any(isinstance(r, Exception) for r in results):
+        raise TransportError(f"{dart_code} 재무제표 조회 통신 오류", log)
+    return None, None, None, log
+
+
+def get_audit_opinion(api_key, dart_code, business_year):
+    """감사의견 (적정/한정/부적정/의견거절) - 로컬 감사의견 테이블 우선, 없을 때만 사업보고서 감사의견 조회"""
+    try:
+        found = audit_opinion(api_key, dart_code, business_year)
+    except Exception:
+        return "조회 실패"
+    return found['opinion'] if found else "정보 없음"
+
+
+def get_corp_status(api_key, dart_code):
+    """기업 개황 정보를 통해 업종명과 업종코드를 가져옴 (통신 오류는 TransportError)"""
+    params = {'crtfc_key': api_key, 'corp_code': dart_code}
+    try:
+        data = dart_get("company.json", params, timeout=5)
+    except Exception as e:
+        raise TransportError(f"{dart_code} 기업개황 조회 통신 오류: {e}") from e
+    if data.get('status') == '000':
+        return data
+    return None
+
+
+# 정기공시 보고서명 -> 보고서 코드
+PERIODIC_REPORTS = [
+    ('사업보고서', '11011'),
+    ('반기보고서', '11012'),
+    ('분기보고서', '11013'),  # 1분기/3분기 구분은 제출 월로 판단 (periodic_report_code 참고)
+]
+
+
+def periodic_report_code(report_nm, rcept_dt):
+    """공시 보고서명 -> (사업연도, reprt_code). 정기보고서가 아니면 None
+
+    예) '사업보고서 (2024.12)' -> (2024, '11011'), '분기보고서 (2025.09)' -> (2025, '11014')
+    """
+    for keyword, code in PERIODIC_REPORTS:
+        if keyword in report_nm:
+            break
+    else:
+        return None
+    period = report_nm[report_nm.find('(') + 1:report_nm.find(')')] if '(' in report_nm else ''
+    try:
+        year, month = int(period[:4]), int(period[5:7])
+    except ValueError:
+        # 보고서명에 기간이 없으면 접수일 기준 (사업보고서는 전년도분)
+        year, month = int(rcept_dt[:4]), int(rcept_dt[4:6])
+        if code == '11011':
+            year -= 1
+    if code == '11013' and month >= 7:
+        code = '11014'
+    return year, code
+
+
+def fetch_filings(api_key, bgn_de, end_de, corp_code=None, pblntf_ty='A', max_pages=100, use_cache=True):
+    """공시검색(list.json) 전체 페이지 조회 -> 공시 dict 리스트
+
+    corp_code 없이 시장 전체를 조회할 때는 DART 제한(3개월)에 맞춰 기간을 나눠서 조회
+    방금 올라온 공시를 봐야 하는 감시(폴링)에서는 use_cache=False
+    """
+    start = datetime.strptime(bgn_de, '%Y%m%d')
+    end = datetime.strptime(end_de, '%Y%m%d')
+    step = 365 * 10 if corp_code else 89
+    filings = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=step))
+        for page in range(1, max_pages + 1):
+            params = {
+                'crtfc_key': api_key,
+                'bgn_de': start.strftime('%Y%m%d'),
+                'end_de': window_end.strftime('%Y%m%d'),
+                'pblntf_ty': pblntf_ty,
+                'page_no': page,
+                'page_count': 100,
+            }
+            if corp_code:
+                params['corp_code'] = corp_code
+            data = dart_get("list.json", params, timeout=10, use_cache=use_cache)
+            if data.get('status') != '000':
+                break
+            filings.extend(data.get('list', []))
+            if page >= int(data.get('total_page', 1)):
+                break
+        start = window_end + timedelta(days=1)
+    return filings
+
+
+def filed_reports(api_key, dart_code, today=None):
+    """최근 15개월 정기공시 목록 -> 제출된 (사업연도, reprt_code) 집합 (조회 실패 시 빈 집합)"""
+    today = today or datetime.now()
+    try:
+        filings = fetch_filings(api_key, (today - timedelta(days=460)).strftime('%Y%m%d'),
+                                today.strftime('%Y%m%d'), corp_code=dart_code, max_pages=2)
+    except Exception:
+        return set()
+    found = (periodic_report_code(f.get('report_nm', ''), f.get('rcept_dt', '')) for f in filings)
+    return {r for r in found if r is not None}
@@ -0,0 +1,320 @@
+"""OpenDART 공용 HTTP 클라이언트 (동시 조회 엔진)
+
+- requests.Session 하나를 공유해서 keep-alive 커넥션 재사용
+- 제한된 크기의 스레드 풀로 여러 요청을 병렬 처리
+- 호스트별 토큰 버킷 요청 제한, 5xx/타임아웃은 지수 백오프(+지터) 재시도
+- '020'(한도 초과)은 바로 중단, 일일 호출 수는 로컬 DB에 기록해서 화면/배치 예산을 나눔
+- 응답은 http_cache(디스크)에 보고서 종류별 TTL로 저장해 재조회 시 네트워크 생략
+"""
+import atexit
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import http_cache
+from .metrics import metrics
+from .storage import connect
+
+DART_API = "https://opendart.fss.or.kr/api/"
+
+MAX_WORKERS = int(os.getenv('DART_MAX_WORKERS', '8'))
+MAX_RPS = float(os.getenv('DART_MAX_RPS', '10'))
+MAX_BURST = float(os.getenv('DART_MAX_BURST', '0')) or MAX_RPS
+MAX_RETRIES = int(os.getenv('DART_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.getenv('DART_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = 8.0
+# DART 일일 한도 20,000건 중 배치/백그라운드 작업이 쓸 수 있는 비율 (나머지는 화면 진단용으로 남겨 둠)
+DAILY_LIMIT = int(os.getenv('DART_DAILY_LIMIT', '20000'))
+BACKGROUND_SHARE = float(os.getenv('DART_BACKGROUND_SHARE', '0.7'))
+# '020'(요청 제한 초과)을 받으면 이 시간 동안 요청을 보내지 않음
+QUOTA_COOLDOWN = 60
+
+
+class QuotaExceeded(Exception):
+    """DART 요청 한도 초과('020') 또는 오늘 예산 소진 - 재시도 없이 바로 중단"""
+
+
+class TransportError(Exception):
+    """통신 오류 때문에 결과를 확정하지 못함 ('데이터 없음'과 구분 - 이런 결과는 캐시하지 않음)"""
+
+    def __init__(self, message, log=None):
+        super().__init__(message)
+        self.log = log or []
+
+
+_priority = contextvars.ContextVar('dart_priority', default='interactive')
+
+
+@contextmanager
+def background():
+    """with background(): 안의 DART 호출은 백그라운드 우선순위/예산으로 처리 (배치, 인덱스/스냅샷 구축)
+
+    함수 데코레이터로도 사용 가능: @background()
+    """
+    token = _priority.set('background')
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_background():
+    return _priority.get() == 'background'
+
+
+class TokenBucket:
+    """호스트별 토큰 버킷 (초당 rate개 보충, 최대 burst개)
+
+    백그라운드 요청은 버킷에 reserve 비율만큼은 남겨 두고 가져가서 화면 진단 요청이 밀리지 않게 함
+    """
+
+    def __init__(self, rate, burst=None, reserve=0.3):
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.reserve = self.burst * reserve
+        self._state = {}  # host -> (tokens, 마지막 보충 시각)
+        self._lock = threading.Lock()
+
+    def wait(self, host, background=False):
+        if self.rate <= 0:
+            return
+        need = 1.0 + (self.reserve if background else 0.0)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._state.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= need:
+                    self._state[host] = (tokens - 1.0, now)
+                    return
+                self._state[host] = (tokens, now)
+                delay = (need - tokens) / self.rate
+            time.sleep(delay)
+
+
+class DailyQuota:
+    """오늘 DART 호출 수 (SQLite에 저장 - 재시작해도, 앱/배치 여러 프로세스가 같이 써도 이어서 셈)"""
+
+    FLUSH_EVERY = 20
+
+    def __init__(self, limit, background_share):
+        self.limit = limit
+        self.background_share = background_share
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._day = None
+        self._base = 0      # 저장소에 기록된 오늘 호출 수
+        self._pending = 0   # 아직 저장 안 한 호출 수
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect('quota.db')
+            self._conn.execute("CREATE TABLE IF NOT EXISTS daily_calls (day TEXT PRIMARY KEY, calls INTEGER NOT NULL)")
+        return self._conn
+
+    def _flush(self):
+        conn = self._db()
+        with conn:
+            if self._pending:
+                conn.execute(
+                    "INSERT INTO daily_calls (day, calls) VALUES (?, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET calls = calls + excluded.calls",
+                    (self._day, self._pending),
+                )
+            row = conn.execute("SELECT calls FROM daily_calls WHERE day = ?", (self._day,)).fetchone()
+        self._base = row[0] if row else 0
+        self._pending = 0
+
+    def _roll(self):
+        today = datetime.now().strftime('%Y%m%d')
+        if today != self._day:
+            if self._day is not None:
+                self._flush()
+            self._day = today
+            self._flush()
+
+    def used(self):
+        with self._lock:
+            self._roll()
+            return self._base + self._pending
+
+    def budget(self, background=False):
+        return int(self.limit * (self.background_share if background else 1.0))
+
+    def _check(self, background):
+        if time.time() < self.blocked_until:
+            raise QuotaExceeded("DART 요청 한도 초과 - 잠시 후 다시 시도하세요")
+        self._roll()
+        used, budget = self._base + self._pending, self.budget(background)
+        if used >= budget:
+            kind = '백그라운드' if background else '일일'
+            raise QuotaExceeded(f"오늘 DART {kind} 호출 예산 소진 ({used}/{budget})")
+
+    def available(self, background=False):
+        with self._lock:
+            try:
+                self._check(background)
+            except QuotaExceeded:
+                return False
+            return True
+
+    def acquire(self, background=False):
+        """요청 한 건 보내기 전에 호출 - 예산 확인과 카운트를 한 번에 (안 되면 QuotaExceeded)"""
+        with self._lock:
+            self._check(background)
+            self._pending += 1
+            if self._pending >= self.FLUSH_EVERY:
+                self._flush()
+
+    def block(self, seconds=QUOTA_COOLDOWN):
+        self.blocked_until = time.time() + seconds
+
+    def flush(self):
+        with self._lock:
+            if self._day is not None:
+                self._flush()
+
+
+def _make_session():
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    return s
+
+
+session = _make_session()
+limiter = TokenBucket(MAX_RPS, MAX_BURST)
+quota = DailyQuota(DAILY_LIMIT, BACKGROUND_SHARE)
+atexit.register(quota.flush)
+_http_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='dart-http')
+
+
+def _backoff(attempt):
+    """지수 백오프 + 지터 (0.5, 1, 2, 4초 ... 의 50~100%)"""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def send_request(endpoint, params, timeout=5, headers=None):
+    """DART 요청 한 건 -> requests.Response (제한기/일일 예산/재시도 적용)
+
+    5xx, 타임아웃, 연결 오류는 백오프 후 최대 MAX_RETRIES번 재시도, 그래도 실패하면 마지막 예외를 그대로 전달
+    """
+    url = endpoint if endpoint.startswith('http') else DART_API + endpoint
+    host = urlparse(url).netloc
+    name = url.rsplit('/', 1)[-1]  # 지표는 엔드포인트 이름으로 기록
+    bg = is_background()
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.wait(host, bg)
+        quota.acquire(bg)
+        start = time.perf_counter()
+        try:
+            res = session.get(url, params=params, headers=headers, timeout=timeout)
+            if res.status_code >= 500:
+                raise requests.HTTPError(f"HTTP {res.status_code}", response=res)
+            return res
+        except (requests.Timeout, requests.ConnectionError, requests.HTTPError) as e:
+            status = e.response.status_code if e.response is not None else None
+            metrics.record_request(name, time.perf_counter() - start, http_status=status)
+            if attempt >= MAX_RETRIES:
+                metrics.record_error(name, e)
+                raise
+            metrics.record_retry(name)
+            time.sleep(_backoff(attempt))
+
+
+def dart_get(endpoint, params, timeout=5, use_cache=True):
+    """DART API 한 건 조회 -> JSON dict (통신 오류는 재시도 후 예외 전달, 한도 초과는 QuotaExceeded)"""
+    if use_cache:
+        cached = http_cache.get(endpoint, params)
+        if cached is not None:
+            metrics.record_cache_hit(endpoint)
+            return cached
+    start = time.perf_counter()
+    res = send_request(endpoint, params, timeout)
+    try:
+        data = res.json()
+    except Exception as e:
+        metrics.record_request(endpoint, time.perf_counter() - start, http_status=res.status_code)
+        metrics.record_error(endpoint, e)
+        raise
+    status = data.get('status') if isinstance(data, dict) else None
+    metrics.record_request(
+        endpoint, time.perf_counter() - start, http_status=res.status_code,
+        dart_status=status, nbytes=len(res.content),
+    )
+    if status == '020':
+        # 한도 초과 - 더 보내 봐야 같은 응답이니 잠시 전체 요청 중단
+        quota.block()
+        e = QuotaExceeded(data.get('message') or "DART 요청 한도 초과")
+        metrics.record_error(endpoint, e)
+        raise e
+    if use_cache and isinstance(data, dict):
+        http_cache.put(endpoint, params, data)
+    return data
+
+
+def _submit(pool, fn, *args):
+    # 작업 스레드에서도 호출한 쪽의 우선순위(background 여부)를 그대로 쓰도록 컨텍스트 복사
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _safe_get(endpoint, params, timeout):
+    try:
+        return dart_get(endpoint, params, timeout)
+    except Exception as e:
+        return e
+
+
+def dart_get_many(calls, timeout=5):
+    """[(endpoint, params), ...]를 병렬 조회 -> 같은 순서의 결과 리스트 (실패 건은 Exception 객체)"""
+    futures = [_submit(_http_pool, _safe_get, ep, p, timeout) for ep, p in calls]
+    return [f.result() for f in futures]
+
+
+def dart_get_first(calls, timeout=5):
+    """우선순위 순서의 후보들을 한꺼번에 보내고, status '000'인 가장 앞 순위 응답을 반환
+
+    반환값: (index, data, results)  - 성공이 없으면 index, data는 None
+    results에는 앞 순위부터 확인한 응답들(dict 또는 Exception)이 담김
+    """
+    futures = [_submit(_http_pool, _safe_get, ep, p, timeout) for ep, p in calls]
+    results = []
+    for i, f in enumerate(futures):
+        data = f.result()
+        results.append(data)
+        if isinstance(data, dict) and data.get('status') == '000':
+            # 더 낮은 순위는 필요 없으니 아직 시작 안 한 요청은 취소
+            for rest in futures[i + 1:]:
+                rest.cancel()
+            return i, data, results
+    return None, None, results
+
+
+def run_parallel(fn, items, max_workers=MAX_WORKERS):
+    """items 각각에 fn을 병렬 적용 -> 같은 순서의 결과 리스트 (예외는 None)
+
+    HTTP 풀과 분리된 작업 풀을 써서, fn 안에서 다시 dart_get_many를 불러도 막히지 않음
+    """
+    def _call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            metrics.record_error(getattr(fn, '__name__', 'run_parallel'), e)
+            return None
+
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='dart-job') as pool:
+        return [f.result() for f in [_submit(pool, _call, item) for item in items]]
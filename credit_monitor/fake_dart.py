@@ -0,0 +1,310 @@
+"""네트워크 없이 돌리는 OpenDART 대역 (벤치마크 / 오프라인 점검용)
+
+공유 세션(dart_client.session)에 transport adapter로 끼워 넣으면
+corpCode.xml, company.json, fnlttMultiAcnt.json, list.json, accnutAdtorNmNdAdtOpinion.json 요청을
+- 녹화해 둔 응답(fixture 디렉터리)으로 재생하거나
+- 고정 시드로 만든 가상 기업 데이터로 응답한다.
+지연시간, 통신 오류 비율, 한도 초과('020') 비율을 설정할 수 있다.
+
+    from credit_monitor import fake_dart
+    fake = fake_dart.install(latency=0.05, error_rate=0.01)
+    ...
+    fake_dart.uninstall()
+"""
+import io
+import json
+import os
+import random
+import threading
+import time
+import zipfile
+from datetime import datetime
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from .http_cache import cache_key
+
+DART_PREFIX = "https://opendart.fss.or.kr/"
+
+_INDUSTRIES = ['264', '26110', '212', '10301', '47111', '41221', '58221', '20111']
+
+
+class SyntheticDart:
+    """고정 시드 가상 상장사 n_companies개 (corp_code 00000001 ~)"""
+
+    def __init__(self, n_companies=2500, seed=0):
+        self.n = n_companies
+        self.seed = seed
+
+    def corp_code(self, i):
+        return f'{i:08d}'
+
+    def _rng(self, *key):
+        return random.Random(hash((self.seed,) + key) & 0xFFFFFFFF)
+
+    def corp_zip(self):
+        parts = ['<?xml version="1.0" encoding="UTF-8"?><result>']
+        for i in range(1, self.n + 1):
+            parts.append(
+                f'<list><corp_code>{self.corp_code(i)}</corp_code><corp_name>가상기업{i}</corp_name>'
+                f'<corp_eng_name>Company {i}</corp_eng_name><stock_code>{i:06d}</stock_code>'
+                f'<modify_date>20240101</modify_date></list>'
+            )
+            # 비상장 기업도 섞어 둠 (실제 파일처럼 대부분은 종목코드가 없음)
+            parts.append(
+                f'<list><corp_code>{90000000 + i:08d}</corp_code><corp_name>비상장{i}</corp_name>'
+                f'<corp_eng_name>x</corp_eng_name><stock_code> </stock_code><modify_date>20240101</modify_date></list>'
+            )
+        parts.append('</result>')
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr('CORPCODE.xml', ''.join(parts))
+        return buf.getvalue()
+
+    def company(self, corp_code):
+        i = int(corp_code)
+        if not 1 <= i <= self.n:
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        return {
+            'status': '000', 'message': '정상', 'corp_code': corp_code, 'corp_name': f'가상기업{i}',
+            'stock_code': f'{i:06d}', 'induty_code': _INDUSTRIES[i % len(_INDUSTRIES)], 'induty_nm': '가상업종',
+            'adt_opnn': '',
+        }
+
+    def is_filed(self, year, reprt_code, today=None):
+        """(year, reprt_code) 보고서가 이미 나왔는지 (가상 기업은 모두 법정 기한 직전에 제출, filings와 같은 날짜)"""
+        today = today or datetime.now()
+        filed_on = {
+            '11013': (year, 5, 13), '11012': (year, 8, 12), '11014': (year, 11, 12), '11011': (year + 1, 3, 20),
+        }[reprt_code]
+        return today >= datetime(*filed_on)
+
+    def _values(self, i, year):
+        rng = self._rng(i, year)
+        assets = rng.randint(1_000, 90_000)
+        debt = rng.randint(100, assets)
+        sales = rng.randint(100, 50_000)
+        return [
+            ('자산총계', assets), ('부채총계', debt), ('자본총계', assets - debt), ('매출액', sales),
+            ('영업이익', rng.randint(-sales // 5, sales // 4)), ('당기순이익', rng.randint(-sales // 5, sales // 5)),
+        ]
+
+    def statement_rows(self, corp_code, year, reprt_code):
+        i = int(corp_code)
+        # 사업보고서는 실제 응답처럼 전기/전전기 금액도 같이 채움
+        periods = [('thstrm_amount', year)]
+        if reprt_code == '11011':
+            periods += [('frmtrm_amount', year - 1), ('bfefrmtrm_amount', year - 2)]
+        columns = [(col, self._values(i, y)) for col, y in periods]
+        rows = []
+        for fs_div in ('CFS', 'OFS'):
+            for n, (account_nm, _) in enumerate(columns[0][1]):
+                row = {
+                    'rcept_no': f'{year + 1}0315{i:06d}', 'bsns_year': str(year), 'stock_code': f'{i:06d}',
+                    'reprt_code': reprt_code, 'corp_code': corp_code, 'fs_div': fs_div, 'fs_nm': fs_div,
+                    'sj_div': 'BS' if account_nm.endswith('총계') else 'IS', 'account_nm': account_nm,
+                    'currency': 'KRW',
+                }
+                for col, values in columns:
+                    row[col] = f'{values[n][1] * 100_000_000:,}'
+                rows.append(row)
+        return rows
+
+    def financials(self, params):
+        year = int(params['bsns_year'])
+        reprt_code = params['reprt_code']
+        if not self.is_filed(year, reprt_code):
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        rows = []
+        for corp_code in str(params['corp_code']).split(','):
+            if 1 <= int(corp_code) <= self.n:
+                rows.extend(self.statement_rows(corp_code, year, reprt_code))
+        if not rows:
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        return {'status': '000', 'message': '정상', 'list': rows}
+
+    def audit_opinions(self, params):
+        """accnutAdtorNmNdAdtOpinion.json: 사업보고서 한 건에 당기/전기/전전기 감사의견 (가끔 비적정)"""
+        corp_code, year = params.get('corp_code', ''), int(params['bsns_year'])
+        i = int(corp_code) if corp_code.isdigit() else 0
+        if not 1 <= i <= self.n or not self.is_filed(year, '11011'):
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        rows = []
+        for back, label in enumerate(('당기', '전기', '전전기')):
+            roll = self._rng(i, year - back, 7).random()
+            opinion = '의견거절' if roll < 0.01 else '한정의견' if roll < 0.04 else '적정의견'
+            rows.append({
+                'rcept_no': f'{year + 1}0320{i:06d}', 'corp_cls': 'Y', 'corp_code': corp_code,
+                'corp_name': f'가상기업{i}', 'bsns_year': f'제{year - back - 1970}기({label})',
+                'adtor': f'가상회계법인{i % 4}', 'adt_opinion': opinion,
+            })
+        return {'status': '000', 'message': '정상', 'list': rows}
+
+    def filings(self, params):
+        """list.json: 기간 안에 법정기한이 든 정기보고서를 기업마다 하나씩"""
+        bgn, end = params.get('bgn_de', '19000101'), params.get('end_de', '29991231')
+        corps = [params['corp_code']] if params.get('corp_code') else [self.corp_code(i) for i in range(1, self.n + 1)]
+        items = []
+        for year in range(int(bgn[:4]) - 1, int(end[:4]) + 1):
+            for name, month, rcept in [('사업보고서', 12, f'{year + 1}0320'), ('반기보고서', 6, f'{year}0812'),
+                                       ('분기보고서', 3, f'{year}0513'), ('분기보고서', 9, f'{year}1112')]:
+                if not bgn <= rcept <= end or rcept > datetime.now().strftime('%Y%m%d'):
+                    continue
+                for corp_code in corps:
+                    items.append({
+                        'corp_code': corp_code, 'corp_name': f'가상기업{int(corp_code)}',
+                        'stock_code': f'{int(corp_code):06d}', 'report_nm': f'{name} ({year}.{month:02d})',
+                        'rcept_no': f'{rcept}{int(corp_code):06d}', 'rcept_dt': rcept,
+                    })
+        if not items:
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        page_count = int(params.get('page_count', 10))
+        page_no = int(params.get('page_no', 1))
+        total_page = (len(items) + page_count - 1) // page_count
+        return {
+            'status': '000', 'message': '정상', 'page_no': page_no, 'page_count': page_count,
+            'total_count': len(items), 'total_page': total_page,
+            'list': items[(page_no - 1) * page_count:page_no * page_count],
+        }
+
+    def respond(self, endpoint, params):
+        """(HTTP 상태, 본문 bytes)"""
+        if endpoint == 'corpCode.xml':
+            return 200, self.corp_zip()
+        if endpoint == 'company.json':
+            body = self.company(params.get('corp_code', ''))
+        elif endpoint == 'fnlttMultiAcnt.json':
+            body = self.financials(params)
+        elif endpoint == 'list.json':
+            body = self.filings(params)
+        elif endpoint == 'accnutAdtorNmNdAdtOpinion.json':
+            body = self.audit_opinions(params)
+        else:
+            body = {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+        return 200, json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+
+class FixtureStore:
+    """녹화된 응답 디렉터리: corpCode.zip + responses.jsonl (키는 http_cache.cache_key 형식)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.responses = {}
+        jsonl = os.path.join(path, 'responses.jsonl')
+        if os.path.exists(jsonl):
+            with open(jsonl, encoding='utf-8') as f:
+                for line in f:
+                    rec = json.loads(line)
+                    self.responses[rec['key']] = rec['body']
+
+    def get(self, endpoint, params):
+        if endpoint == 'corpCode.xml':
+            zpath = os.path.join(self.path, 'corpCode.zip')
+            if os.path.exists(zpath):
+                with open(zpath, 'rb') as f:
+                    return 200, f.read()
+            return None
+        body = self.responses.get(cache_key(endpoint, params))
+        return None if body is None else (200, json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+    def save(self, endpoint, params, content):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            if endpoint == 'corpCode.xml':
+                with open(os.path.join(self.path, 'corpCode.zip'), 'wb') as f:
+                    f.write(content)
+                return
+            key = cache_key(endpoint, params)
+            body = json.loads(content)
+            self.responses[key] = body
+            with open(os.path.join(self.path, 'responses.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'body': body}, ensure_ascii=False) + '\n')
+
+
+def _split(url):
+    parsed = urlparse(url)
+    return parsed.path.rsplit('/', 1)[-1], dict(parse_qsl(parsed.query))
+
+
+def _make_response(request, status, content):
+    res = requests.Response()
+    res.status_code = status
+    res._content = content
+    res.url = request.url
+    res.request = request
+    res.encoding = 'utf-8'
+    res.headers['Content-Type'] = 'application/zip' if content[:2] == b'PK' else 'application/json'
+    return res
+
+
+class FakeDartAdapter(BaseAdapter):
+    """fixture 우선 재생, 없으면 SyntheticDart로 응답하는 transport adapter"""
+
+    def __init__(self, fixtures=None, synthetic=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, quota_error_rate=0.0, seed=0):
+        super().__init__()
+        self.fixtures = FixtureStore(fixtures) if fixtures else None
+        self.synthetic = synthetic if synthetic is not None else SyntheticDart()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _roll(self):
+        with self._lock:
+            self.calls += 1
+            return self._rng.random(), self._rng.random(), self._rng.random()
+
+    def send(self, request, **kwargs):
+        endpoint, params = _split(request.url)
+        r_err, r_quota, r_jitter = self._roll()
+        delay = self.latency + self.jitter * r_jitter
+        if delay:
+            time.sleep(delay)
+        if r_err < self.error_rate:
+            raise requests.ConnectionError(f"fake DART: 통신 오류 ({endpoint})")
+        if r_quota < self.quota_error_rate and endpoint != 'corpCode.xml':
+            body = {'status': '020', 'message': '요청 제한을 초과하였습니다.'}
+            return _make_response(request, 200, json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+        hit = self.fixtures.get(endpoint, params) if self.fixtures else None
+        status, content = hit if hit is not None else self.synthetic.respond(endpoint, params)
+        return _make_response(request, status, content)
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """실제 DART 응답을 그대로 돌려주면서 fixture 디렉터리에 녹화"""
+
+    def __init__(self, fixtures, **kwargs):
+        super().__init__(**kwargs)
+        self.store = FixtureStore(fixtures)
+
+    def send(self, request, **kwargs):
+        res = super().send(request, **kwargs)
+        if res.status_code == 200:
+            endpoint, params = _split(request.url)
+            self.store.save(endpoint, params, res.content)
+        return res
+
+
+def install(adapter=None, **kwargs):
+    """공유 세션의 DART 호스트에 adapter 장착 (기본: FakeDartAdapter(**kwargs))"""
+    from .dart_client import session
+    adapter = adapter or FakeDartAdapter(**kwargs)
+    session.mount(DART_PREFIX, adapter)
+    return adapter
+
+
+def uninstall():
+    """원래 HTTP adapter로 되돌리기"""
+    from .dart_client import session
+    session.adapters.pop(DART_PREFIX, None)
@@ -0,0 +1,58 @@
+"""정기보고서 제출 일정 (12월 결산 기준 법정 기한)
+
+- 1분기(11013): 5/15, 반기(11012): 8/14, 3분기(11014): 11/14, 사업보고서(11011): 다음 해 3/31
+- 보고 기간이 끝나기 전에는 절대 나올 수 없으니 그런 보고서는 조회 후보에서 뺀다
+"""
+from datetime import datetime
+
+# reprt_code -> (기간 종료 월/일, 제출 기한 (연도 가산, 월, 일))
+SCHEDULE = {
+    '11013': ((3, 31), (0, 5, 15)),
+    '11012': ((6, 30), (0, 8, 14)),
+    '11014': ((9, 30), (0, 11, 14)),
+    '11011': ((12, 31), (1, 3, 31)),
+}
+
+# 같은 사업연도 안에서 최신 순
+REPORT_ORDER = ['11014', '11012', '11013', '11011']
+
+
+def deadline(year, reprt_code):
+    plus, month, day = SCHEDULE[reprt_code][1]
+    return datetime(year + plus, month, day)
+
+
+def period_ended(year, reprt_code, today=None):
+    """보고 기간이 끝났는지 (안 끝났으면 아직 제출될 수 없음)"""
+    month, day = SCHEDULE[reprt_code][0]
+    return (today or datetime.now()) > datetime(year, month, day)
+
+
+def is_due(year, reprt_code, today=None):
+    """법정 제출 기한이 지났는지"""
+    return (today or datetime.now()) > deadline(year, reprt_code)
+
+
+def candidates(years, today=None):
+    """조회할 가치가 있는 (year, reprt_code) 후보 - 최신 순, 기간이 안 끝난 보고서는 제외"""
+    return [
+        (year, code)
+        for year in sorted(years, reverse=True)
+        for code in REPORT_ORDER
+        if period_ended(year, code, today)
+    ]
+
+
+def predict_latest(years, filed=(), today=None):
+    """가장 최신으로 제출됐을 보고서 순서대로 정렬한 후보 목록
+
+    filed: 공시 목록(list.json)에서 확인한 (year, reprt_code) 집합 - 있으면 그걸 먼저,
+    없으면 법정 기한이 지난 보고서를 먼저 두고 나머지는 뒤에 (예측이 빗나갔을 때 대비)
+    """
+    probes = candidates(years, today)
+    filed = set(filed)
+    if filed:
+        first = [p for p in probes if p in filed]
+    else:
+        first = [p for p in probes if is_due(*p, today=today)]
+    return first + [p for p in probes if p not in first]
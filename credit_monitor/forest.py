@@ -0,0 +1,124 @@
+"""랜덤포레스트 -> numpy 배열(.npz) 변환 + sklearn 없이 predict_proba
+
+- export_forest: 학습된 RandomForestClassifier의 트리들을 한 줄로 펼쳐서 .npz로 저장
+- NumpyForest: .npz만 읽어서 sklearn과 같은 predict_proba 계산 (pickle/sklearn import 불필요)
+- verify_parity: 비율 격자 + 트리 분기값 경계에서 sklearn 결과와 비교
+"""
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def export_forest(model, path):
+    """RandomForestClassifier -> .npz (트리 노드 배열을 이어붙이고 트리별 시작 위치를 roots에 기록)"""
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    for est in model.estimators_:
+        t = est.tree_
+        roots.append(offset)
+        feature.append(t.feature)
+        threshold.append(t.threshold)
+        # 자식 인덱스를 전체 배열 기준으로 (리프는 -1 유지)
+        left.append(np.where(t.children_left >= 0, t.children_left + offset, -1))
+        right.append(np.where(t.children_right >= 0, t.children_right + offset, -1))
+        v = t.value[:, 0, :]
+        value.append(v / v.sum(axis=1, keepdims=True))
+        offset += t.node_count
+    np.savez_compressed(
+        path,
+        format_version=FORMAT_VERSION,
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        value=np.concatenate(value).astype(np.float64),
+        roots=np.asarray(roots, dtype=np.int32),
+        classes=np.asarray(model.classes_),
+        feature_names=np.asarray(getattr(model, 'feature_names_in_', []), dtype=str),
+    )
+
+
+class NumpyForest:
+    """export_forest로 만든 .npz 기반 예측기 (sklearn predict_proba와 같은 값)"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, feature_names=()):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            if int(z['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 모델 파일 형식: {path}")
+            return cls(z['feature'], z['threshold'], z['left'], z['right'], z['value'], z['roots'],
+                       z['classes'], z['feature_names'])
+
+    def apply(self, X):
+        """(N, F) -> 트리별 도착 리프 노드 (N, n_estimators)"""
+        # sklearn 트리는 입력을 float32로 바꿔서 비교하므로 똑같이 맞춰야 경계값 결과가 같음
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n = len(X)
+        node = np.tile(self.roots, n)                    # (N * T,) 샘플별로 트리 T개
+        sample = np.repeat(np.arange(n), self.n_estimators)
+        active = np.flatnonzero(self.left[node] >= 0)
+        while len(active):
+            cur = node[active]
+            go_left = X[sample[active], self.feature[cur]] <= self.threshold[cur]
+            nxt = np.where(go_left, self.left[cur], self.right[cur])
+            node[active] = nxt
+            active = active[self.left[nxt] >= 0]
+        return node.reshape(n, self.n_estimators)
+
+    def predict_proba(self, X):
+        if len(X) == 0:
+            return np.empty((0, len(self.classes_)))
+        leaves = self.apply(X)
+        # sklearn처럼 트리 순서대로 더한 뒤 트리 수로 나눔
+        proba = self.value[leaves[:, 0]].copy()
+        for t in range(1, self.n_estimators):
+            proba += self.value[leaves[:, t]]
+        return proba / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def parity_grid(forest=None, steps=15):
+    """비교용 입력: 비율 격자 + (forest가 있으면) 트리 분기값 바로 위/아래/그 값"""
+    axes = [
+        np.linspace(0, 1000, steps),     # 부채비율
+        np.linspace(-100, 100, steps),   # 영업이익률
+        np.linspace(-100, 100, steps),   # 순이익률
+        np.linspace(-50, 50, steps),     # ROA
+    ]
+    grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 4)
+    if forest is None:
+        return grid
+    extra = []
+    rng = np.random.default_rng(0)
+    for f in range(4):
+        th = forest.threshold[forest.feature == f]
+        for v in (th, np.nextafter(th, -np.inf), np.nextafter(th, np.inf)):
+            rows = grid[rng.integers(0, len(grid), len(v))].copy()
+            rows[:, f] = v
+            extra.append(rows)
+    return np.vstack([grid] + extra)
+
+
+def verify_parity(model, forest, X=None, atol=1e-12):
+    """sklearn 모델과 NumpyForest의 predict_proba 비교 -> (통과 여부, 최대 오차, 비교 건수)"""
+    import pandas as pd
+
+    X = parity_grid(forest) if X is None else np.asarray(X, dtype=float)
+    names = list(getattr(model, 'feature_names_in_', [])) or None
+    expected = model.predict_proba(pd.DataFrame(X, columns=names) if names else X)
+    actual = forest.predict_proba(X)
+    diff = float(np.abs(expected - actual).max()) if len(X) else 0.0
+    return diff <= atol, diff, len(X)
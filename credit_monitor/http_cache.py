@@ -0,0 +1,151 @@
+"""OpenDART JSON 응답 디스크 캐시 (SQLite, 보고서 종류별 TTL + LRU 용량 제한)
+
+Streamlit 세션끼리, 서버 재시작 후에도 공유된다.
+- 지난 연도 정기보고서 재무제표: 이미 제출이 끝난 보고서라 사실상 영구 보관
+  (여러 기업 묶음 조회는 제출 기한 + 유예 기간이 지나야 영구 - 그 전에는 일부 기업만 들어 있을 수 있음)
+- 올해 보고서 조회, '013 조회된 데이터 없음' 응답: 곧 바뀔 수 있으니 짧게
+- 기업개황(company.json): 하루
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from .filing_calendar import SCHEDULE, is_due
+from .storage import connect
+
+CACHE_DB = 'http_cache.db'
+MAX_BYTES = int(os.getenv('DART_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+HOUR = 3600
+DAY = 24 * HOUR
+FOREVER = 10 * 365 * DAY
+
+# LRU용 접근 시각은 이 간격(초)보다 오래됐을 때만 갱신 (캐시 적중마다 쓰기+commit 하지 않도록)
+TOUCH_INTERVAL = 60
+
+# 제출 기한 뒤에도 늦게 내는 기업(기한 연장 등)을 기다리는 기간
+FILING_GRACE = timedelta(days=14)
+
+# 이 키들은 캐시 키에서 제외 (API 키가 바뀌어도 같은 응답)
+_IGNORED_PARAMS = {'crtfc_key'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key         TEXT PRIMARY KEY,
+    endpoint    TEXT,
+    body        BLOB,
+    size        INTEGER,
+    expires     REAL,
+    last_access REAL
+)
+"""
+
+_local = threading.local()
+_put_count = 0
+_count_lock = threading.Lock()
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = connect(CACHE_DB)
+        conn.execute(_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_http_cache_access ON http_cache(last_access)")
+        _local.conn = conn
+    return conn
+
+
+def cache_key(endpoint, params):
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in _IGNORED_PARAMS)
+    return endpoint + '?' + '&'.join(f"{k}={v}" for k, v in items)
+
+
+def ttl_for(endpoint, params, data):
+    """응답 성격에 맞는 보관 기간(초). 0이면 캐시하지 않음"""
+    status = data.get('status')
+    if status == '013':
+        return HOUR                     # 아직 제출 전 -> 곧 다시 확인
+    if status != '000':
+        return 0                        # 020(한도 초과), 키 오류 등은 저장하지 않음
+
+    if endpoint.startswith('fnltt'):
+        year = str(params.get('bsns_year', ''))
+        if not year.isdigit() or int(year) >= datetime.now().year:
+            return 6 * HOUR             # 올해 분기 보고서
+        reprt_code = params.get('reprt_code')
+        batched = ',' in str(params.get('corp_code', ''))
+        if batched and reprt_code in SCHEDULE and not is_due(int(year), reprt_code, datetime.now() - FILING_GRACE):
+            return 6 * HOUR             # 기한 전 묶음 응답 -> 아직 안 낸 기업이 곧 채워짐
+        return FOREVER                  # 지난 연도 보고서는 바뀌지 않음
+    if endpoint == 'company.json':
+        return DAY
+    if endpoint == 'list.json':
+        return HOUR
+    return HOUR
+
+
+def get(endpoint, params):
+    """캐시된 응답 (없거나 만료되면 None)"""
+    key = cache_key(endpoint, params)
+    conn = _conn()
+    row = conn.execute("SELECT body, expires, last_access FROM http_cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    now = time.time()
+    if row[1] < now:
+        conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+        conn.commit()
+        return None
+    if now - row[2] > TOUCH_INTERVAL:
+        conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+    return json.loads(zlib.decompress(row[0]))
+
+
+def put(endpoint, params, data):
+    """응답 저장 (TTL이 0인 응답은 무시)"""
+    global _put_count
+    ttl = ttl_for(endpoint, params, data)
+    if ttl <= 0:
+        return
+    body = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+    now = time.time()
+    conn = _conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?)",
+        (cache_key(endpoint, params), endpoint, body, len(body), now + ttl, now),
+    )
+    conn.commit()
+
+    with _count_lock:
+        _put_count += 1
+        check = _put_count % 100 == 0
+    if check:
+        evict()
+
+
+def evict(max_bytes=MAX_BYTES):
+    """만료 항목 삭제 후, 용량 초과 시 오래 안 쓴 항목부터 삭제 (LRU)"""
+    conn = _conn()
+    conn.execute("DELETE FROM http_cache WHERE expires < ?", (time.time(),))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+    if total > max_bytes:
+        target = total - int(max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+    conn.commit()
+
+
+def clear():
+    conn = _conn()
+    conn.execute("DELETE FROM http_cache")
+    conn.commit()
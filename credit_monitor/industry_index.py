@@ -0,0 +1,149 @@
+"""corp_code -> 업종코드(KSIC)/기업명/종목코드 로컬 인덱스
+
+company.json을 기업마다 한 번씩만 조회해서 SQLite에 저장하고,
+메모리에 올린 인덱스로 동종 업계 후보(peer_buckets.PeerBuckets)를 네트워크 호출 없이 찾는다.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from .dart_client import background, dart_get_many
+from .storage import connect
+
+INDEX_DB = 'industry_index.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corp_industry (
+    corp_code   TEXT PRIMARY KEY,
+    stock_code  TEXT,
+    corp_name   TEXT,
+    induty_code TEXT,
+    induty_nm   TEXT,
+    updated_at  TEXT
+)
+"""
+
+_lock = threading.Lock()
+
+
+def _open():
+    conn = connect(INDEX_DB)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def save_company(corp_code, stock_code, corp_name, company_json):
+    """company.json 응답 하나를 인덱스에 반영 (다른 화면에서 받아온 응답도 재활용)"""
+    if not company_json or company_json.get('status') != '000':
+        return
+    with _lock:
+        conn = _open()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO corp_industry VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    corp_code,
+                    stock_code,
+                    corp_name,
+                    (company_json.get('induty_code') or '').strip(),
+                    company_json.get('induty_nm') or '',
+                    datetime.now().isoformat(timespec='seconds'),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def apply_corp_changes(diff):
+    """상장사 변경분만 인덱스에 반영 (상장폐지 삭제, 이름/종목코드 변경 수정) - 신규 상장은 다음 인덱스 갱신 때 조회"""
+    if not diff:
+        return
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany("DELETE FROM corp_industry WHERE corp_code = ?", [(r['dart'],) for r in diff['removed']])
+            conn.executemany(
+                "UPDATE corp_industry SET stock_code = ?, corp_name = ? WHERE corp_code = ?",
+                [(r['code'], r['name'], r['dart']) for r in diff['renamed']],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+@background()
+def build_industry_index(api_key, corp_map_df, max_age_days=90, progress=None):
+    """corp_map 기준으로 인덱스를 일괄 구축 / 증분 갱신
+
+    - 인덱스에 없는 기업, max_age_days보다 오래된 기업만 company.json 조회
+    - corp_map에서 사라진 기업(상장폐지 등)은 인덱스에서 삭제
+    반환값: 새로 조회한 기업 수
+    """
+    conn = _open()
+    try:
+        existing = dict(conn.execute("SELECT corp_code, updated_at FROM corp_industry"))
+        listed = set(corp_map_df['dart'])
+        stale = [c for c in existing if c not in listed]
+        if stale:
+            conn.executemany("DELETE FROM corp_industry WHERE corp_code = ?", [(c,) for c in stale])
+            conn.commit()
+    finally:
+        conn.close()
+
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='seconds')
+    todo = corp_map_df[[existing.get(c, '') < cutoff for c in corp_map_df['dart']]]
+
+    # 100개씩 묶어서 병렬 조회
+    rows = list(todo.itertuples(index=False))
+    fetched = 0
+    for start in range(0, len(rows), 100):
+        chunk = rows[start:start + 100]
+        responses = dart_get_many(
+            [("company.json", {'crtfc_key': api_key, 'corp_code': row.dart}) for row in chunk]
+        )
+        for row, data in zip(chunk, responses):
+            # 오류 응답(한도 초과 등)은 저장하지 않고 다음 실행에서 다시 조회
+            if isinstance(data, dict) and data.get('status') == '000':
+                save_company(row.dart, row.code, row.name, data)
+                fetched += 1
+        if progress:
+            progress(start + len(chunk), len(rows))
+    return fetched
+
+
+class IndustryIndex:
+    """corp_code -> 업종 정보 (메모리 상주, 업종별 후보는 PeerBuckets가 묶음)"""
+
+    def __init__(self, rows):
+        self._by_corp = {}
+        for corp_code, stock_code, corp_name, induty_code, induty_nm in rows:
+            rec = {
+                'dart': corp_code,
+                'code': stock_code,
+                'name': corp_name,
+                'induty_code': induty_code,
+                'induty_nm': induty_nm,
+            }
+            self._by_corp[corp_code] = rec
+
+    @classmethod
+    def load(cls):
+        conn = _open()
+        try:
+            rows = conn.execute(
+                "SELECT corp_code, stock_code, corp_name, induty_code, induty_nm "
+                "FROM corp_industry WHERE induty_code != '' ORDER BY stock_code"
+            ).fetchall()
+        finally:
+            conn.close()
+        return cls(rows)
+
+    def __len__(self):
+        return len(self._by_corp)
+
+    def __iter__(self):
+        return iter(self._by_corp.values())
+
+    def industry_of(self, corp_code):
+        """기업의 업종 정보 (없으면 None)"""
+        return self._by_corp.get(corp_code)
@@ -0,0 +1,176 @@
+"""요청/단계별 소요시간 계측 (사이드바 성능 패널, JSON 로그, Prometheus 텍스트)
+
+- 엔드포인트별: 요청 수, 지연시간, HTTP 상태, DART status('000', '013', '020' 등), 재시도, 캐시 적중, 응답 바이트
+- 단계별: corp_map / fetch / extract / score / render 등의 실행 시간
+CREDIT_MONITOR_JSON_LOG=1 이면 요청/단계마다 JSON 한 줄씩 로그를 남긴다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger('credit_monitor.metrics')
+JSON_LOG = os.getenv('CREDIT_MONITOR_JSON_LOG') == '1'
+
+# 분위수 계산용으로 최근 값만 보관
+_WINDOW = 1000
+
+
+class _Series:
+    """최근 _WINDOW개 값 + 누적 합계/건수"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=_WINDOW)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0, 'total': 0.0, 'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        arr = np.fromiter(self.recent, dtype=float)
+        return {
+            'count': self.count,
+            'total': self.total,
+            'avg': self.total / self.count,
+            'p50': float(np.percentile(arr, 50)),
+            'p95': float(np.percentile(arr, 95)),
+            'max': float(arr.max()),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = defaultdict(_Series)          # endpoint -> 초
+            self.http_status = defaultdict(int)           # (endpoint, code)
+            self.dart_status = defaultdict(int)           # (endpoint, status)
+            self.cache_hits = defaultdict(int)            # endpoint
+            self.retries = defaultdict(int)               # endpoint
+            self.bytes = defaultdict(int)                 # endpoint
+            self.errors = defaultdict(int)                # 위치(함수명 등)
+            self.stages = defaultdict(_Series)            # stage -> 초
+
+    def _log(self, record):
+        if JSON_LOG:
+            logger.info(json.dumps(record, ensure_ascii=False))
+
+    def record_request(self, endpoint, latency, http_status=None, dart_status=None, nbytes=0):
+        with self._lock:
+            self.latency[endpoint].add(latency)
+            if http_status is not None:
+                self.http_status[(endpoint, http_status)] += 1
+            if dart_status is not None:
+                self.dart_status[(endpoint, dart_status)] += 1
+            self.bytes[endpoint] += nbytes
+        self._log({'event': 'request', 'endpoint': endpoint, 'latency_ms': round(latency * 1000, 1),
+                   'http_status': http_status, 'dart_status': dart_status, 'bytes': nbytes})
+
+    def record_cache_hit(self, endpoint):
+        with self._lock:
+            self.cache_hits[endpoint] += 1
+        self._log({'event': 'cache_hit', 'endpoint': endpoint})
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self.retries[endpoint] += 1
+
+    def record_error(self, where, exc):
+        with self._lock:
+            self.errors[where] += 1
+        logger.warning("%s 실패: %s", where, exc)
+        self._log({'event': 'error', 'where': where, 'error': repr(exc)})
+
+    def record_stage(self, name, seconds, sink=None):
+        """단계 시간 기록 (sink dict가 있으면 거기에도 누적 - 진단 1회분 표시용)"""
+        with self._lock:
+            self.stages[name].add(seconds)
+        if sink is not None:
+            sink[name] = sink.get(name, 0.0) + seconds
+        self._log({'event': 'stage', 'stage': name, 'ms': round(seconds * 1000, 1)})
+
+    @contextmanager
+    def stage(self, name, sink=None):
+        """with metrics.stage('fetch'): ... -> 단계 시간 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start, sink)
+
+    def quota_errors(self):
+        """DART 한도 초과('020') 응답 수"""
+        with self._lock:
+            return sum(n for (_, status), n in self.dart_status.items() if status == '020')
+
+    def snapshot(self):
+        """현재까지 누적 지표 dict (JSON으로 바로 직렬화 가능)"""
+        with self._lock:
+            endpoints = set(self.latency) | set(self.cache_hits)
+            return {
+                'endpoints': {
+                    ep: {
+                        'latency': self.latency[ep].summary() if ep in self.latency else _Series().summary(),
+                        'http_status': {str(c): n for (e, c), n in self.http_status.items() if e == ep},
+                        'dart_status': {str(s): n for (e, s), n in self.dart_status.items() if e == ep},
+                        'cache_hits': self.cache_hits.get(ep, 0),
+                        'retries': self.retries.get(ep, 0),
+                        'bytes': self.bytes.get(ep, 0),
+                    }
+                    for ep in sorted(endpoints)
+                },
+                'stages': {name: s.summary() for name, s in sorted(self.stages.items())},
+                'errors': dict(self.errors),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 포맷 덤프"""
+        snap = self.snapshot()
+        lines = [
+            '# TYPE dart_requests_total counter',
+            '# TYPE dart_request_seconds summary',
+            '# TYPE dart_cache_hits_total counter',
+            '# TYPE dart_retries_total counter',
+            '# TYPE dart_response_bytes_total counter',
+            '# TYPE dart_status_total counter',
+            '# TYPE stage_seconds summary',
+            '# TYPE errors_total counter',
+        ]
+        for ep, m in snap['endpoints'].items():
+            lat = m['latency']
+            lines.append(f'dart_requests_total{{endpoint="{ep}"}} {lat["count"]}')
+            lines.append(f'dart_request_seconds_sum{{endpoint="{ep}"}} {lat["total"]:.6f}')
+            lines.append(f'dart_request_seconds_count{{endpoint="{ep}"}} {lat["count"]}')
+            for q in ('p50', 'p95'):
+                lines.append(f'dart_request_seconds{{endpoint="{ep}",quantile="0.{q[1:]}"}} {lat[q]:.6f}')
+            lines.append(f'dart_cache_hits_total{{endpoint="{ep}"}} {m["cache_hits"]}')
+            lines.append(f'dart_retries_total{{endpoint="{ep}"}} {m["retries"]}')
+            lines.append(f'dart_response_bytes_total{{endpoint="{ep}"}} {m["bytes"]}')
+            for status, n in m['dart_status'].items():
+                lines.append(f'dart_status_total{{endpoint="{ep}",status="{status}"}} {n}')
+        for name, s in snap['stages'].items():
+            lines.append(f'stage_seconds_sum{{stage="{name}"}} {s["total"]:.6f}')
+            lines.append(f'stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        for where, n in snap['errors'].items():
+            lines.append(f'errors_total{{where="{where}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 전체에서 공유하는 기본 인스턴스
+metrics = Metrics()
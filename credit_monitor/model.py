@@ -0,0 +1,59 @@
+"""DART API 키 / 부도 예측 모델 로드
+
+기본은 numpy 배열로 변환한 모델(.npz)을 읽는다 - sklearn/pickle 없이 바로 로드.
+.npz가 없으면 원본 pickle(.pkl)을 joblib으로 읽는다.
+(.npz는 python -m credit_monitor export-model 로 pkl에서 다시 만들 수 있음)
+
+CREDIT_MONITOR_VERIFY_MODEL=1이면 .npz를 읽을 때 pkl 모델과 고정 격자(forest.parity_grid)에서
+predict_proba를 비교하고, 다르면 ModelParityError로 시작을 멈춤 (배포/CI에서 켜 두는 용도, sklearn 필요)
+"""
+import os
+
+from dotenv import load_dotenv
+
+from .forest import NumpyForest, verify_parity
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(_ROOT, 'bankruptcy_model_final_ratio.pkl')
+COMPACT_MODEL_PATH = os.path.join(_ROOT, 'bankruptcy_model_final_ratio.npz')
+VERIFY_MODEL = os.getenv('CREDIT_MONITOR_VERIFY_MODEL') == '1'
+
+
+class ModelParityError(ValueError):
+    """.npz 모델의 예측값이 원본 pkl 모델과 다름 (export-model로 다시 변환 필요)"""
+
+
+def load_api_key():
+    """.env 또는 환경변수의 DART_API_KEY"""
+    load_dotenv()
+    return os.getenv('DART_API_KEY')
+
+
+def load_sklearn_model(path=MODEL_PATH):
+    import joblib  # sklearn import가 무거워서 pkl이 필요할 때만
+    return joblib.load(path)
+
+
+def check_parity(forest, pkl_path=MODEL_PATH):
+    """.npz 모델을 pkl 모델과 고정 격자에서 비교 -> 비교 건수 (pkl이 없으면 0, 다르면 ModelParityError)"""
+    if not os.path.exists(pkl_path):
+        return 0
+    ok, diff, n = verify_parity(load_sklearn_model(pkl_path), forest)
+    if not ok:
+        raise ModelParityError(f"npz 모델 예측값이 pkl과 다름 (최대 오차 {diff:.3g}, {n:,}건) - export-model로 다시 변환하세요")
+    return n
+
+
+def load_model(path=None, verify=None):
+    """path를 안 주면 .npz 우선, 없으면 .pkl
+
+    verify(기본: CREDIT_MONITOR_VERIFY_MODEL)가 켜져 있으면 .npz는 pkl과 예측값을 비교한 뒤 반환
+    """
+    if path is None:
+        path = COMPACT_MODEL_PATH if os.path.exists(COMPACT_MODEL_PATH) else MODEL_PATH
+    if path.endswith('.npz'):
+        forest = NumpyForest.load(path)
+        if VERIFY_MODEL if verify is None else verify:
+            check_parity(forest)
+        return forest
+    return load_sklearn_model(path)
@@ -0,0 +1,132 @@
+"""동종 업계 후보 기업 (업종 버킷 + 규모 구간, 결정적 선택)
+
+- 업종 인덱스를 KSIC 5자리(세분류) / 3자리(소분류) / 2자리(중분류) 버킷으로 미리 묶어 둠
+- 세분류부터 보고 후보가 모자랄 때만 3자리 -> 2자리로 넓힘
+- 위험 스냅샷의 자산(없으면 매출) 규모로 시장 전체를 5구간으로 나누고,
+  대상 기업과 규모가 가까운 기업부터 고름 (대상 규모를 모르면 구간마다 골고루)
+- 무작위 추출 대신 종목코드 CRC 순서로 섞어서 같은 업종이면 항상 같은 후보, 업종별로 한 번만 계산
+"""
+import math
+import threading
+import zlib
+
+BUCKET_LEVELS = (5, 3, 2)
+SIZE_BANDS = 5
+MIN_PEERS = 5
+MAX_CANDIDATES = 20
+
+
+def stable_key(code):
+    """종목코드 -> 실행마다 같은 섞기 순서 (hash()는 프로세스마다 달라서 CRC 사용)"""
+    return zlib.crc32(str(code).encode())
+
+
+def stable_sample(corp_map_df, n, exclude=None):
+    """DataFrame.sample 대신 쓰는 재현 가능한 추출 (종목코드 CRC 순 앞에서 n개)"""
+    df = corp_map_df if exclude is None else corp_map_df[corp_map_df['name'] != exclude]
+    order = df['code'].map(stable_key).sort_values(kind='stable').index
+    return df.loc[order[:n]]
+
+
+def _log_size(rec):
+    """스냅샷 레코드 -> log10(자산), 자산이 없으면 log10(매출), 둘 다 없으면 None"""
+    if not rec:
+        return None
+    for col in ('assets', 'sales'):
+        value = rec.get(col)
+        if value and value > 0:
+            return math.log10(value)
+    return None
+
+
+class PeerBuckets:
+    """업종 버킷 + 규모 구간 -> 업종별 후보 목록 (메모리 상주, 업종별 결과 재사용)"""
+
+    def __init__(self, industry_index, snapshot):
+        self.snapshot = snapshot
+        self._buckets = {level: {} for level in BUCKET_LEVELS}
+        self._size = {}
+        self._all = sorted(industry_index, key=lambda r: stable_key(r['code']))
+        for rec in self._all:
+            self._size[rec['code']] = _log_size(snapshot.get(rec['code']))
+            induty = rec['induty_code']
+            for level in BUCKET_LEVELS:
+                if len(induty) >= level:
+                    self._buckets[level].setdefault(induty[:level], []).append(rec)
+        # 시장 전체 규모 분위수 -> 구간 경계
+        sizes = sorted(s for s in self._size.values() if s is not None)
+        self._edges = [sizes[len(sizes) * k // SIZE_BANDS] for k in range(1, SIZE_BANDS)] if sizes else []
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._size)
+
+    def size_band(self, code):
+        """종목코드 -> 규모 구간 (0: 소형 ~ SIZE_BANDS-1: 대형, 모르면 None)"""
+        size = self._size.get(code)
+        if size is None:
+            size = _log_size(self.snapshot.get(code))
+        if size is None or not self._edges:
+            return None
+        return sum(size >= edge for edge in self._edges)
+
+    def resolve(self, industry_code, exclude=None, need=MIN_PEERS):
+        """세분류 -> 소분류 -> 중분류 순으로 넓히며 후보가 need개 이상인 첫 (접두어, 기업 목록)
+
+        어느 단계도 모자라면 가장 넓은 단계 결과를 그대로 반환 (업종 정보가 없으면 ('', []))
+        """
+        prefix, recs = '', []
+        for level in BUCKET_LEVELS:
+            if len(industry_code or '') < level:
+                continue
+            prefix = industry_code[:level]
+            recs = [
+                r for r in self._buckets[level].get(prefix, [])
+                if exclude is None or exclude not in (r['code'], r['dart'], r['name'])
+            ]
+            if len(recs) >= need:
+                break
+        return prefix, recs
+
+    def candidates(self, industry_code, exclude=None, code=None, limit=MAX_CANDIDATES):
+        """(접두어, 후보 목록) - 대상 기업(code)과 규모가 가까운 순, 같은 업종/규모 구간이면 결과 재사용
+
+        업종 정보가 없으면 접두어 ''로 시장 전체에서 고름
+        """
+        band = self.size_band(code) if code else None
+        prefix, _ = self.resolve(industry_code, exclude)
+        key = (prefix, band)
+        with self._lock:
+            ranked = self._memo.get(key)
+        if ranked is None:
+            ranked = self._rank(self._buckets[len(prefix)].get(prefix, []) if prefix else self._all, band)
+            with self._lock:
+                self._memo[key] = ranked
+        out = [r for r in ranked if exclude is None or exclude not in (r['code'], r['dart'], r['name'])]
+        return prefix, out[:limit]
+
+    def remember(self, prefix, recs):
+        """업종 인덱스에 없어서 company.json으로 찾은 후보를 업종별로 보관 (다음 요청부터 재사용)"""
+        with self._lock:
+            self._memo[(prefix, 'scan')] = list(recs)
+
+    def recalled(self, prefix):
+        with self._lock:
+            return self._memo.get((prefix, 'scan'))
+
+    def _rank(self, recs, band):
+        """규모 구간 기준 정렬 - 대상 구간이 있으면 가까운 구간부터, 없으면 구간을 돌아가며 하나씩"""
+        by_band = {}
+        for rec in recs:
+            by_band.setdefault(self.size_band(rec['code']), []).append(rec)
+        if band is not None:
+            # 규모를 모르는 기업은 가장 먼 구간 취급
+            order = sorted(by_band, key=lambda b: (SIZE_BANDS if b is None else abs(b - band), b is None, b or 0))
+            return [rec for b in order for rec in by_band[b]]
+        # 구간별로 돌아가며 뽑아 규모가 한쪽으로 몰리지 않게
+        queues = [by_band[b] for b in sorted(by_band, key=lambda b: (b is None, b or 0))]
+        out = []
+        for i in range(max((len(q) for q in queues), default=0)):
+            out.extend(q[i] for q in queues if i < len(q))
+        return out
@@ -0,0 +1,128 @@
+"""동일 업종 내 안정성 높은 기업 추천"""
+from datetime import datetime
+
+import pandas as pd
+
+from .accounts import extract_accounts_batch
+from .dart_client import TransportError, dart_get_many
+from .industry_index import save_company
+from .peer_buckets import stable_sample
+from .scoring import score_frame
+from .statements import REPORT_CODES, fetch_statements, latest_statements, to_report_frame
+
+
+def get_similar_recommends(api_key, model, corp_map_df, current_corp_name, current_industry_code,
+                           buckets, limit=4, current_code=None):
+    """같은 업종 코드 기업 중 안정성 높은 기업 추천 (세분류 5자리 -> 3자리 -> 2자리 순으로 넓혀가며 매칭)
+
+    화면 출력 없이 (추천 목록, 안내 메시지 [(종류, 문구), ...])를 반환한다.
+    백그라운드 스레드에서 돌릴 수 있도록 업종 버킷(PeerBuckets)은 호출하는 쪽에서 넘겨준다.
+    후보는 규모(자산/매출 구간)가 비슷한 기업부터 고르고, 같은 업종이면 항상 같은 후보가 나온다.
+    후보 조회에 통신 오류가 나면 TransportError (빈/일부 추천을 결과처럼 캐시하지 않도록)
+    """
+    notes = []
+    snapshot = buckets.snapshot
+    known = bool(current_industry_code) and current_industry_code != '알수없음'
+    
+    # ✅ 미리 묶어 둔 업종 버킷에서 후보 선택 (업종 정보가 없으면 시장 전체)
+    industry_prefix, indexed = buckets.candidates(
+        current_industry_code if known else None, exclude=current_corp_name, code=current_code
+    )
+    
+    # ✅ 후보가 전부 스냅샷에 있으면 재계산 없이 바로 순위 반환
+    ranked = sorted((r for r in map(snapshot.get, [c['code'] for c in indexed]) if r), key=lambda r: r['prob'])
+    if known and len(indexed) >= 5 and len(ranked) == len(indexed):
+        notes.append(('success', f"✅ 업종코드 {industry_prefix} 위험 스냅샷 기준 추천 ({snapshot.last_run} 갱신)"))
+        return [{'name': r['name'], 'code': r['code'], 'prob': r['prob'], 'debt': r['부채비율']} for r in ranked[:limit]], notes
+    
+    if not known:
+        notes.append(('info', "🔍 업종 정보가 없어 전체 기업에서 추천합니다."))
+        candidates = pd.DataFrame(indexed) if indexed else stable_sample(corp_map_df, 15, exclude=current_corp_name)
+    elif len(indexed) >= 5:
+        notes.append(('success', f"✅ 유사 업종 기업 {len(indexed)}개 발견 (업종코드 {industry_prefix}, 로컬 인덱스)"))
+        candidates = pd.DataFrame(indexed)
+    else:
+        # 업종 인덱스가 비어 있을 때만 company.json으로 직접 검색 (업종별로 한 번 찾은 결과는 재사용)
+        industry_prefix = current_industry_code[:2]
+        same_industry = buckets.recalled(industry_prefix)
+        if same_industry is None:
+            same_industry = _scan_industry(api_key, corp_map_df, current_corp_name, industry_prefix, notes)
+            buckets.remember(industry_prefix, same_industry)
+        same_industry = [r for r in same_industry if r['name'] != current_corp_name]
+        if len(same_industry) >= 5:
+            notes.append(('success', f"✅ 유사 업종 기업 {len(same_industry)}개 발견 (업종코드 {industry_prefix}XX)"))
+            candidates = pd.DataFrame(same_industry)
+        else:
+            notes.append(('warning', f"⚠️ 유사 업종 기업이 {len(same_industry)}개뿐이어서 전체에서 추천합니다."))
+            _, market = buckets.candidates(None, exclude=current_corp_name, code=current_code)
+            candidates = pd.DataFrame(market) if market else stable_sample(corp_map_df, 20, exclude=current_corp_name)
+    
+    # 재무 분석 (후보 전체를 쉼표로 묶어 보고서 8종만 조회 -> 기업별 최신 보고서 골라서 계정 추출/비율 계산 한 번에)
+    current_year = datetime.now().year
+    years = [current_year, current_year - 1]
+    frame, failed = fetch_statements(api_key, candidates['dart'], years, [code for code, _ in REPORT_CODES])
+    if failed:
+        raise TransportError(f"추천 후보 {len(failed)}개 재무제표 조회 통신 오류")
+    latest, _ = latest_statements(frame, years)
+    if latest.empty:
+        return [], notes
+    
+    acc = extract_accounts_batch(to_report_frame(latest), keys=['corp_code'], amount_col='amount')
+    acc = acc[(acc['equity'] != 0) & (acc['assets'] != 0) & (acc['sales'] != 0)]
+    if acc.empty:
+        return [], notes
+    acc = score_frame(model, acc)  # 후보 전체를 predict_proba 한 번으로 채점
+    
+    info = candidates.drop_duplicates('dart').set_index('dart')
+    recom_results = [
+        {
+            'name': info.loc[corp, 'name'],
+            'code': info.loc[corp, 'code'],
+            'prob': prob,
+            'debt': debt
+        }
+        for corp, prob, debt in zip(acc['corp_code'], acc['prob'], acc['부채비율'])
+    ]
+    
+    return sorted(recom_results, key=lambda x: x['prob'])[:limit], notes
+
+
+def _scan_industry(api_key, corp_map_df, current_corp_name, industry_prefix, notes, max_found=20):
+    """company.json을 종목코드 CRC 순서로 150개까지 조회해서 업종 대분류가 같은 기업 찾기
+
+    한 묶음이 전부 통신 오류면 TransportError (일부만 찾은 목록을 업종별 결과로 남기지 않음)
+    """
+    notes.append(('info', f"🔍 업종 대분류 {industry_prefix}로 시작하는 기업을 검색 중..."))
+    same_industry = []
+    
+    # 샘플 150개로 확대 (앞 2자리만 매칭하니 더 많이 체크)
+    sample_corps = stable_sample(corp_map_df, min(150, len(corp_map_df) - 1), exclude=current_corp_name)
+    
+    # 30개씩 묶어서 병렬 조회
+    checked_count = 0
+    rows = sample_corps[['dart', 'code', 'name']].to_dict('records')
+    for start in range(0, len(rows), 30):
+        if len(same_industry) >= max_found:
+            break
+        chunk = rows[start:start + 30]
+        responses = dart_get_many(
+            [("company.json", {'crtfc_key': api_key, 'corp_code': row['dart']}) for row in chunk],
+            timeout=2
+        )
+        if all(isinstance(data, Exception) for data in responses):
+            raise TransportError(f"업종 {industry_prefix} 기업개황 조회 통신 오류")
+        for row, data in zip(chunk, responses):
+            if isinstance(data, Exception):
+                continue
+            save_company(row['dart'], row['code'], row['name'], data)  # 조회한 김에 인덱스도 채움
+            checked_count += 1
+            
+            if data.get('status') == '000':
+                induty_code = data.get('induty_code', '')
+                
+                # ✅ 앞 2자리만 비교
+                if induty_code and induty_code[:2] == industry_prefix and len(same_industry) < max_found:
+                    same_industry.append(row)
+    
+    notes.append(('info', f"📊 {checked_count}개 검색 완료 (발견: {len(same_industry)}개)"))
+    return same_industry
@@ -0,0 +1,70 @@
+"""진단 결과 공유 캐시 (세션 간, 메모리)
+
+키는 (corp_code, 사업연도, reprt_code) - 그 기업의 가장 최신 정기보고서 기준.
+값은 진단 단계별 Future 묶음 (fetch / corp_info / audit / trend / peers ...)
+- 같은 기업을 여러 사용자가 동시에 진단해도 단계마다 계산은 한 번만 돌고 나머지는 같은 Future를 기다림 (single-flight)
+- 끝난 결과는 메모리에서 바로 반환
+- 새 보고서가 공시되면 키가 바뀌고, 그 기업의 예전 키는 지움
+- 예외로 끝난 단계는 다음 요청 때 다시 계산 (단계 함수는 통신 오류를 TransportError로 올려서
+  '데이터 없음' 결과와 구분하므로, 일시적인 장애 결과가 캐시에 남지 않음)
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .dart import filed_reports
+from .filing_calendar import predict_latest
+from .metrics import metrics
+
+
+def diagnosis_key(api_key, dart_code, today=None):
+    """(corp_code, year, reprt_code) - 공시 목록 기준 가장 최신 정기보고서 (list.json은 HTTP 캐시 재사용)"""
+    today = today or datetime.now()
+    probes = predict_latest([today.year, today.year - 1], filed_reports(api_key, dart_code, today), today)
+    year, code = probes[0] if probes else (None, None)
+    return dart_code, year, code
+
+
+class DiagnosisCache:
+    def __init__(self, max_entries=500, ttl=6 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {'created': ts, 'futures': {stage: Future}}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry['created'] > self.ttl:
+            entry = None
+        if entry is None:
+            # 같은 기업의 예전 보고서 기준 결과는 버림
+            for old in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[old]
+            entry = {'created': time.time(), 'futures': {}}
+            self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def get_or_submit(self, key, stage, submit):
+        """stage 결과 Future 반환 - 없거나 실패했으면 submit()으로 새로 시작"""
+        with self._lock:
+            futures = self._entry(key)['futures']
+            future = futures.get(stage)
+            if future is not None and not (future.done() and future.exception() is not None):
+                metrics.record_cache_hit(f'diagnosis:{stage}')
+                return future
+            future = submit()
+            futures[stage] = future
+            return future
+
+    def invalidate(self, dart_code=None):
+        """기업 하나(또는 전체) 결과 삭제"""
+        with self._lock:
+            for key in [k for k in self._entries if dart_code is None or k[0] == dart_code]:
+                del self._entries[key]
@@ -0,0 +1,52 @@
+"""부도 확률 일괄 채점 (bankruptcy_model_final_ratio.pkl)
+
+N개 기업의 비율 4개를 (N, 4) 배열 하나로 받아 predict_proba를 한 번만 호출한다.
+신호등 등급 기준: 10% 미만 안전, 70% 미만 주의, 그 이상 위험
+"""
+import numpy as np
+import pandas as pd
+
+from .accounts import FEATURES, add_ratios
+
+SAFE_LIMIT = 10.0
+DANGER_LIMIT = 70.0
+BANDS = ('안전', '주의', '위험')
+
+
+def band_of(prob):
+    """부도 확률(%) -> 안전/주의/위험"""
+    if prob < SAFE_LIMIT:
+        return '안전'
+    if prob < DANGER_LIMIT:
+        return '주의'
+    return '위험'
+
+
+def bands(probs):
+    """부도 확률(%) 배열 -> 등급 배열"""
+    probs = np.asarray(probs, dtype=float)
+    return np.select([probs < SAFE_LIMIT, probs < DANGER_LIMIT], ['안전', '주의'], '위험')
+
+
+def score_ratios(model, X):
+    """(N, 4) 비율 배열(FEATURES 순서) -> 부도 확률(%) 배열"""
+    X = np.asarray(X, dtype=float).reshape(-1, len(FEATURES))
+    if len(X) == 0:
+        return np.empty(0)
+    # 학습 때 컬럼명이 있어서 이름 붙인 프레임으로 한 번만 감싸서 호출
+    proba = model.predict_proba(pd.DataFrame(X, columns=list(FEATURES)))
+    return proba[:, 1] * 100
+
+
+def score_frame(model, acc):
+    """계정 프레임(extract_accounts_batch 결과) -> 비율 + prob + band 컬럼 추가"""
+    out = add_ratios(acc)
+    out['prob'] = score_ratios(model, out[list(FEATURES)].to_numpy())
+    out['band'] = bands(out['prob'])
+    return out
+
+
+def score_one(model, ratios):
+    """비율 dict 한 건 -> (부도 확률 %, 등급)"""
+    prob = float(score_ratios(model, [[ratios[f] for f in FEATURES]])[0])
+    return prob, band_of(prob)
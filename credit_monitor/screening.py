@@ -0,0 +1,53 @@
+"""여러 기업 일괄 진단 (최신 보고서 조회 -> 계정 추출 -> 일괄 채점)"""
+from datetime import datetime
+
+import pandas as pd
+
+from .accounts import ACCOUNTS, FEATURES, extract_accounts_batch
+from .audit import latest_opinions
+from .dart_client import run_parallel
+from .scoring import score_frame
+from .statements import MAX_CORPS_PER_CALL, REPORT_CODES, empty_frame, fetch_statements, latest_statements, to_report_frame
+
+RESULT_COLUMNS = ['code', 'dart', 'name', 'year', 'report'] + list(ACCOUNTS) + list(FEATURES) + ['prob', 'band', 'audit', 'error']
+
+
+def screen_companies(api_key, model, companies, max_workers=8):
+    """companies: code/dart/name 컬럼 프레임 -> 기업별 진단 결과 프레임 (RESULT_COLUMNS)
+
+    조회는 100개씩 묶어서 병렬로, 계정 추출과 채점은 모아서 한 번에 처리한다.
+    재무제표를 못 찾은 기업도 error 컬럼을 채워서 결과에 남긴다.
+    감사의견(audit)은 로컬 감사의견 테이블에서만 읽는다 (없으면 빈 값, 채우기는 audit 배치).
+    """
+    rows = companies[['code', 'dart', 'name']].drop_duplicates('dart')
+    current_year = datetime.now().year
+    years = [current_year, current_year - 1]
+    darts = rows['dart'].tolist()
+    chunks = [darts[i:i + MAX_CORPS_PER_CALL] for i in range(0, len(darts), MAX_CORPS_PER_CALL)]
+
+    # 100개씩 묶어서 보고서 8종 조회 (묶음끼리는 병렬)
+    def fetch(chunk):
+        return fetch_statements(api_key, chunk, years, [code for code, _ in REPORT_CODES])
+
+    frames, failed = [], set()
+    for chunk, res in zip(chunks, run_parallel(fetch, chunks, max_workers=max_workers)):
+        if res is None:
+            failed.update(chunk)
+            continue
+        frame, bad = res
+        frames.append(frame)
+        failed |= bad
+    frame = pd.concat(frames) if frames else empty_frame()
+    latest, picks = latest_statements(frame, years)
+
+    out = rows.merge(picks.rename(columns={'corp_code': 'dart'})[['dart', 'year', 'report']], on='dart', how='left')
+    found = out['report'].notna()
+    out['error'] = ''
+    out.loc[~found, 'error'] = ['조회 실패' if d in failed else '재무제표 없음' for d in out.loc[~found, 'dart']]
+    if not latest.empty:
+        acc = extract_accounts_batch(to_report_frame(latest), keys=['corp_code'], amount_col='amount')
+        scored = score_frame(model, acc).rename(columns={'corp_code': 'dart'})
+        out = out.merge(scored, on='dart', how='left')
+    opinions = latest_opinions(out['dart'], current_year)
+    out['audit'] = [opinions[d]['opinion'] if d in opinions else '' for d in out['dart']]
+    return out.reindex(columns=RESULT_COLUMNS)
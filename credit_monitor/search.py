@@ -0,0 +1,173 @@
+"""사이드바 종목 검색 인덱스 (이름/초성/종목코드)
+
+상장사 목록을 불러올 때 한 번 만들어 두고 키 입력마다 재사용한다.
+- 1~2글자 n-gram 역색인으로 후보를 좁힌 뒤 순위 매김
+- 순위: 정확히 일치 > 앞부분 일치 > 부분 일치 > 초성 앞부분 > 초성 부분 > 오타 허용(편집거리)
+- 'ㅅㅅㅈㅈ' 같은 초성 입력, '삼숭전자' 같은 한두 글자 오타도 찾음
+"""
+import heapq
+from collections import defaultdict
+
+_CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+
+# 순위 (작을수록 위)
+EXACT, PREFIX, SUBSTRING, CHOSUNG_PREFIX, CHOSUNG_SUBSTRING, TYPO = range(6)
+MATCH_LABELS = {
+    EXACT: '일치', PREFIX: '앞부분', SUBSTRING: '포함',
+    CHOSUNG_PREFIX: '초성', CHOSUNG_SUBSTRING: '초성', TYPO: '비슷한 이름',
+}
+
+
+def normalize(text):
+    return str(text).replace(' ', '').lower()
+
+
+def chosung(text):
+    """'삼성전자' -> 'ㅅㅅㅈㅈ' (한글 음절이 아닌 글자는 그대로)"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(_CHOSUNG[code // 588] if 0 <= code < 11172 else ch)
+    return ''.join(out)
+
+
+def is_chosung_query(text):
+    """초성이 하나 이상 있고 완성된 한글 음절은 없는 검색어 ('ㅅㅅㅈㅈ', 'ㅅㅅsdi' 등)"""
+    return any(ch in _CHOSUNG for ch in text) and not any('가' <= ch <= '힣' for ch in text)
+
+
+def _grams(text):
+    """1글자 + 2글자 n-gram"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _edit_distance(a, b, limit):
+    """편집거리 (limit 넘으면 limit + 1로 조기 종료)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class CorpSearchIndex:
+    """corp_map(code/dart/name) -> 이름/초성/코드 n-gram 역색인"""
+
+    def __init__(self, corp_map_df):
+        self.codes = corp_map_df['code'].tolist()
+        self.darts = corp_map_df['dart'].tolist()
+        self.names = corp_map_df['name'].tolist()
+        self.keys = [normalize(n) for n in self.names]
+        self.chosungs = [chosung(k) for k in self.keys]
+        self._name_grams = defaultdict(set)
+        self._code_grams = defaultdict(set)
+        for i, (key, cho, code) in enumerate(zip(self.keys, self.chosungs, self.codes)):
+            for g in _grams(key) | _grams(cho):
+                self._name_grams[g].add(i)
+            for g in _grams(code):
+                self._code_grams[g].add(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _candidates(self, postings, text):
+        """text의 n-gram을 모두 가진 행 (부분 일치 후보)"""
+        grams = sorted(_grams(text), key=lambda g: len(postings.get(g, ())))
+        if not grams:
+            return set()
+        found = set(postings.get(grams[0], ()))
+        for g in grams[1:]:
+            if not found:
+                break
+            found &= postings.get(g, set())
+        return found
+
+    def _typo_candidates(self, text):
+        """2글자 n-gram이 절반 이상 겹치는 행"""
+        bigrams = [text[i:i + 2] for i in range(len(text) - 1)]
+        hits = defaultdict(int)
+        for g in bigrams:
+            for i in self._name_grams.get(g, ()):
+                hits[i] += 1
+        need = max(1, len(bigrams) // 2)
+        return [i for i, n in hits.items() if n >= need]
+
+    def search(self, query, limit=10):
+        """검색어 -> [{'code', 'dart', 'name', 'match'}] (순위순)"""
+        q = normalize(query)
+        if not q:
+            return []
+        ranked = {}
+
+        def add(i, rank):
+            if rank < ranked.get(i, TYPO + 1):
+                ranked[i] = rank
+
+        if q.isdigit():
+            for i in self._candidates(self._code_grams, q):
+                code = self.codes[i]
+                if code == q.zfill(6):
+                    add(i, EXACT)
+                elif code.startswith(q):
+                    add(i, PREFIX)
+                elif q in code:
+                    add(i, SUBSTRING)
+        elif is_chosung_query(q):
+            for i in self._candidates(self._name_grams, q):
+                cho = self.chosungs[i]
+                if cho.startswith(q):
+                    add(i, CHOSUNG_PREFIX)
+                elif q in cho:
+                    add(i, CHOSUNG_SUBSTRING)
+        else:
+            for i in self._candidates(self._name_grams, q):
+                key = self.keys[i]
+                if key == q:
+                    add(i, EXACT)
+                elif key.startswith(q):
+                    add(i, PREFIX)
+                elif q in key:
+                    add(i, SUBSTRING)
+            # 결과가 모자라면 오타 허용 (2~4글자는 1글자, 그 이상은 2글자까지)
+            if len(ranked) < limit and len(q) >= 2:
+                limit_dist = 1 if len(q) <= 4 else 2
+                for i in self._typo_candidates(q):
+                    if i in ranked:
+                        continue
+                    key = self.keys[i]
+                    # 이름 전체 또는 같은 길이의 앞부분과 비교
+                    if min(_edit_distance(q, key, limit_dist), _edit_distance(q, key[:len(q)], limit_dist)) <= limit_dist:
+                        add(i, TYPO)
+
+        order = heapq.nsmallest(limit, ranked, key=lambda i: (ranked[i], len(self.keys[i]), self.keys[i]))
+        return [
+            {'code': self.codes[i], 'dart': self.darts[i], 'name': self.names[i], 'match': MATCH_LABELS[ranked[i]]}
+            for i in order
+        ]
+
+    def resolve(self, queries):
+        """종목코드/종목명 목록 -> (찾은 기업 [{'code', 'dart', 'name', 'match'}], 못 찾은 검색어)
+
+        종목코드는 정확히 일치할 때만, 이름은 가장 순위가 높은 한 건으로 (중복은 한 번만)
+        """
+        found, missing, seen = [], [], set()
+        for query in queries:
+            hits = self.search(query, limit=1)
+            if not hits or (normalize(query).isdigit() and hits[0]['match'] != MATCH_LABELS[EXACT]):
+                missing.append(query)
+                continue
+            if hits[0]['code'] not in seen:
+                seen.add(hits[0]['code'])
+                found.append(hits[0])
+        return found, missing
+
+
+def split_queries(text):
+    """'005930, SK하이닉스\n현대차' -> ['005930', 'SK하이닉스', '현대차'] (쉼표/줄바꿈/탭 구분)"""
+    return [q.strip() for q in text.replace('\n', ',').replace('\t', ',').split(',') if q.strip()]
@@ -0,0 +1,185 @@
+"""상장사 전체 부도 위험 스냅샷 (야간 배치용)
+
+- 상장사 전체를 한 번 진단해서 SQLite 테이블(risk_snapshot)에 저장
+- 다음 실행부터는 지난 실행 이후 정기보고서(list.json)를 새로 제출한 기업만 다시 진단
+- 화면에서는 RiskSnapshot으로 종목코드별 조회를 메모리에서 바로 처리 (업종별 후보는 PeerBuckets)
+"""
+import threading
+from datetime import datetime
+
+from .accounts import ACCOUNTS, FEATURES
+from .audit import refresh_audit_opinions
+from .dart import fetch_filings, periodic_report_code
+from .dart_client import background
+from .industry_index import IndustryIndex
+from .screening import screen_companies
+from .storage import connect
+
+SNAPSHOT_DB = 'risk_snapshot.db'
+
+_COLUMNS = ['code', 'dart', 'name', 'induty_code', 'year', 'report'] + list(ACCOUNTS) + list(FEATURES) + ['prob', 'band']
+
+_SELECT = "SELECT " + ', '.join(f'"{c}"' for c in _COLUMNS) + ", updated_at FROM risk_snapshot"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS risk_snapshot (
+    code        TEXT PRIMARY KEY,
+    dart        TEXT,
+    name        TEXT,
+    induty_code TEXT,
+    induty2     TEXT,
+    year        INTEGER,
+    report      TEXT,
+    {', '.join(f'"{c}" REAL' for c in list(ACCOUNTS) + list(FEATURES))},
+    prob        REAL,
+    band        TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_risk_snapshot_induty2 ON risk_snapshot(induty2);
+CREATE INDEX IF NOT EXISTS ix_risk_snapshot_dart ON risk_snapshot(dart);
+CREATE TABLE IF NOT EXISTS snapshot_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_lock = threading.Lock()
+
+
+def _open():
+    conn = connect(SNAPSHOT_DB)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM snapshot_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def changed_corps(api_key, since, until=None):
+    """since(YYYYMMDD) 이후 정기보고서를 제출한 기업 corp_code 집합 (시장 전체 list.json 몇 번으로 확인)"""
+    until = until or datetime.now().strftime('%Y%m%d')
+    filings = fetch_filings(api_key, since, until, pblntf_ty='A')
+    return {
+        f['corp_code'] for f in filings
+        if periodic_report_code(f.get('report_nm', ''), f.get('rcept_dt', '')) is not None
+    }
+
+
+def save_results(result, industry_index=None):
+    """screen_companies 결과를 스냅샷 테이블에 반영 (재무제표 없는 기업은 건너뜀)"""
+    ok = result[result['error'].fillna('') == '']
+    if ok.empty:
+        return 0
+    now = datetime.now().isoformat(timespec='seconds')
+    rows = []
+    for rec in ok.to_dict('records'):
+        info = industry_index.industry_of(rec['dart']) if industry_index is not None else None
+        induty = info['induty_code'] if info else ''
+        rows.append(
+            [rec['code'], rec['dart'], rec['name'], induty, induty[:2], int(rec['year']), rec['report']]
+            + [float(rec[c]) for c in list(ACCOUNTS) + list(FEATURES)]
+            + [float(rec['prob']), rec['band'], now]
+        )
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO risk_snapshot VALUES ({', '.join('?' * len(rows[0]))})", rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return len(rows)
+
+
+def apply_corp_changes(diff):
+    """상장사 변경분만 스냅샷에 반영 (상장폐지 삭제, 이름/종목코드 변경 수정) - 신규 상장은 다음 증분 갱신 때 진단"""
+    if not diff:
+        return
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany("DELETE FROM risk_snapshot WHERE dart = ?", [(r['dart'],) for r in diff['removed']])
+            conn.executemany(
+                "UPDATE OR REPLACE risk_snapshot SET code = ?, name = ? WHERE dart = ?",
+                [(r['code'], r['name'], r['dart']) for r in diff['renamed']],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+@background()
+def build_snapshot(api_key, model, corp_map, full=False, batch=100, progress=None):
+    """스냅샷 구축/증분 갱신 -> 다시 진단한 기업 수
+
+    - 처음이거나 full=True면 상장사 전체
+    - 그 외에는 (지난 실행 이후 정기보고서 제출 기업) + (스냅샷에 아직 없는 기업)만
+    - 상장폐지되어 corp_map에서 빠진 기업은 삭제
+    """
+    conn = _open()
+    try:
+        last_run = _get_meta(conn, 'last_run')
+        have = {row[0] for row in conn.execute("SELECT code FROM risk_snapshot")}
+        gone = have - set(corp_map['code'])
+        if gone:
+            conn.executemany("DELETE FROM risk_snapshot WHERE code = ?", [(c,) for c in gone])
+            conn.commit()
+    finally:
+        conn.close()
+
+    today = datetime.now().strftime('%Y%m%d')
+    if full or not last_run:
+        todo = corp_map
+    else:
+        # 지난 실행일 당일 제출분까지 다시 확인 (실행 이후 같은 날 제출된 보고서 포함)
+        changed = changed_corps(api_key, last_run, today)
+        todo = corp_map[corp_map['dart'].isin(changed) | ~corp_map['code'].isin(have)]
+
+    industry_index = IndustryIndex.load()
+    done = 0
+    for start in range(0, len(todo), batch):
+        chunk = todo.iloc[start:start + batch]
+        # 다시 진단하는 기업은 직전 사업연도 감사의견도 같이 채워 둠 (테이블에 있으면 호출 없음)
+        refresh_audit_opinions(api_key, chunk['dart'], [int(today[:4]) - 1])
+        result = screen_companies(api_key, model, chunk)
+        save_results(result, industry_index)
+        done += len(result)
+        if progress:
+            progress(done, len(todo))
+
+    conn = _open()
+    try:
+        conn.execute("INSERT OR REPLACE INTO snapshot_meta VALUES ('last_run', ?)", (today,))
+        conn.commit()
+    finally:
+        conn.close()
+    return done
+
+
+class RiskSnapshot:
+    """스냅샷 테이블을 메모리에 올려 종목코드로 바로 조회 (업종별 후보는 PeerBuckets가 묶음)"""
+
+    last_run = None
+
+    def __init__(self, records):
+        self._by_code = {rec['code']: rec for rec in records}
+
+    @classmethod
+    def load(cls):
+        conn = _open()
+        try:
+            cur = conn.execute(_SELECT)
+            names = [d[0] for d in cur.description]
+            records = [dict(zip(names, row)) for row in cur]
+            last_run = _get_meta(conn, 'last_run')
+        finally:
+            conn.close()
+        snap = cls(records)
+        snap.last_run = last_run
+        return snap
+
+    def __len__(self):
+        return len(self._by_code)
+
+    def get(self, code):
+        return self._by_code.get(code)
@@ -0,0 +1,246 @@
+"""여러 기업 x 여러 연도 재무제표 일괄 조회 -> long 프레임
+
+fnlttMultiAcnt.json은 corp_code를 쉼표로 묶어 최대 100개까지 받고,
+사업보고서 응답에는 당기/전기/전전기 금액이 같이 들어 있다.
+그래서 기업 100개 x 3개 연도를 요청 한 번으로 받을 수 있다.
+결과는 (corp_code, year, reprt_code, fs_div, account) 인덱스 + amount(int64) 컬럼의 long 프레임.
+계정 추출에 쓰는 계정 행만 남기고, 보고서 한 건짜리는 Statement로 들고 다닌다.
+"""
+import numpy as np
+import pandas as pd
+
+from .accounts import ACCOUNTS, extract_accounts_batch, is_relevant
+from .dart_client import dart_get_many
+from .filing_calendar import period_ended
+
+MAX_CORPS_PER_CALL = 100
+INDEX = ['corp_code', 'year', 'reprt_code', 'fs_div', 'account']
+
+# 최신 보고서 우선순위 (fetch_financial_data와 같은 순서)
+REPORT_CODES = [
+    ('11014', '3분기보고서'),
+    ('11012', '반기보고서'),
+    ('11013', '1분기보고서'),
+    ('11011', '사업보고서'),
+]
+REPORT_NAMES = dict(REPORT_CODES)
+
+# 사업보고서 금액 컬럼 -> 사업연도보다 몇 년 전 값인지
+# (분기/반기보고서의 전기 금액은 기준 시점이 섞여 있어서 당기만 사용)
+_PERIOD_COLUMNS = (('thstrm_amount', 0), ('frmtrm_amount', 1), ('bfefrmtrm_amount', 2))
+
+
+def empty_frame():
+    return pd.DataFrame({'amount': np.empty(0, np.int64)}, index=pd.MultiIndex.from_arrays([[]] * len(INDEX), names=INDEX))
+
+
+def parse_amounts(values):
+    """'1,234,567' 문자열들 -> (int64 금액 배열, 값이 있었는지 배열) - 빈 값/파싱 불가는 0"""
+    amount = np.zeros(len(values), np.int64)
+    valid = np.zeros(len(values), bool)
+    for i, v in enumerate(values):
+        v = str(v or '').replace(',', '').strip()
+        try:
+            amount[i] = int(v)
+        except ValueError:
+            try:
+                amount[i] = round(float(v))
+            except (ValueError, OverflowError):
+                continue
+        valid[i] = True
+    return amount, valid
+
+
+def _relevant_rows(data):
+    """응답 list 중 계정 추출에 쓰는 계정(자산총계, 매출액 등) 행만 - 나머지는 프레임으로 만들지 않음"""
+    return [r for r in data.get('list', []) if is_relevant(r.get('account_nm') or '')]
+
+
+class Statement:
+    """보고서 한 건(기업 1곳)의 재무제표 - 응답 DataFrame 대신 쓰는 가벼운 형태
+
+    계정명/재무제표 구분(CFS/OFS)은 범주형 코드, 금액은 int64 배열로 한 번만 파싱해 두고
+    계정 추출에 쓰는 행만 남긴다.
+    """
+
+    __slots__ = ('corp_code', 'year', 'reprt_code', 'fs_div', 'account', 'amount')
+
+    def __init__(self, corp_code, year, reprt_code, fs_div, account, amount):
+        self.corp_code = corp_code
+        self.year = year
+        self.reprt_code = reprt_code
+        self.fs_div = fs_div
+        self.account = account
+        self.amount = amount
+
+    @classmethod
+    def from_response(cls, data, corp_code, year, reprt_code):
+        """fnlttMultiAcnt 응답(기업 1곳) -> Statement (당기 금액 기준)"""
+        rows = _relevant_rows(data)
+        amount, _ = parse_amounts([r.get('thstrm_amount') for r in rows])
+        return cls(
+            corp_code, int(year), reprt_code,
+            pd.Categorical([r.get('fs_div') or '' for r in rows]),
+            pd.Categorical([r.get('account_nm') or '' for r in rows]),
+            amount,
+        )
+
+    def __len__(self):
+        return len(self.amount)
+
+    @property
+    def empty(self):
+        return len(self.amount) == 0
+
+    def to_frame(self):
+        """extract_accounts_batch 입력 형태 (account_nm, fs_div, amount 컬럼)"""
+        return pd.DataFrame({'fs_div': self.fs_div, 'account_nm': self.account, 'amount': self.amount})
+
+    def accounts(self):
+        """{'assets': ..., 'liabilities': ..., ...} - 연결(CFS)이 있으면 연결 기준"""
+        return extract_accounts_batch(self.to_frame(), amount_col='amount').iloc[0][list(ACCOUNTS)].astype(float).to_dict()
+
+
+def _normalize(data, bsns_year, reprt_code):
+    """fnlttMultiAcnt 응답 하나 -> long 행들 (source_year/ord는 중복 정리용)"""
+    rows = _relevant_rows(data)
+    if not rows:
+        return []
+    periods = _PERIOD_COLUMNS if reprt_code == '11011' else _PERIOD_COLUMNS[:1]
+    corp = np.array([r.get('corp_code') for r in rows], dtype=object)
+    fs_div = np.array([r.get('fs_div') or '' for r in rows], dtype=object)
+    account = np.array([r.get('account_nm') or '' for r in rows], dtype=object)
+    # 원래 응답 안에서의 순서 (별칭 우선순위가 같으면 먼저 나온 행 채택)
+    order = np.arange(len(rows))
+    parts = []
+    for col, back in periods:
+        if not any(col in r for r in rows):
+            continue
+        amount, valid = parse_amounts([r.get(col) for r in rows])
+        # 당기 금액이 비어 있으면 0 (기존 계정 추출과 같은 규칙), 전기/전전기는 빈 값이면 버림
+        keep = np.ones(len(rows), bool) if back == 0 else valid
+        parts.append(pd.DataFrame({
+            'corp_code': corp[keep],
+            'year': bsns_year - back,
+            'reprt_code': reprt_code,
+            'fs_div': fs_div[keep],
+            'account': account[keep],
+            'amount': amount[keep],
+            'source_year': bsns_year,
+            'ord': order[keep],
+        }))
+    return parts
+
+
+def _build(parts):
+    if not parts:
+        return empty_frame()
+    frame = pd.concat(parts, ignore_index=True)
+    # 같은 (기업, 연도, 계정)이 여러 보고서에 있으면 가장 최근 보고서 값(재작성 반영)을 사용
+    frame = frame.sort_values(['source_year', 'ord'], ascending=[False, True], kind='stable')
+    frame = frame.drop_duplicates(INDEX, keep='first')
+    frame = frame.sort_values(INDEX[:3] + ['ord'], kind='stable')
+    return frame.drop(columns=['source_year', 'ord']).set_index(INDEX)
+
+
+def fetch_statements(api_key, corp_codes, years, reprt_codes=('11011',), timeout=10):
+    """기업 목록 x 사업연도 x 보고서 일괄 조회
+
+    요청 수 = ceil(기업 수 / 100) x 연도 수 x 보고서 수 (보고 기간이 끝난 것만)
+    반환값: (long 프레임, 통신 오류가 난 요청에 포함된 corp_code 집합)
+    """
+    corp_codes = list(dict.fromkeys(corp_codes))
+    chunks = [corp_codes[i:i + MAX_CORPS_PER_CALL] for i in range(0, len(corp_codes), MAX_CORPS_PER_CALL)]
+    # 보고 기간이 아직 안 끝난 보고서는 있을 수 없으니 요청하지 않음
+    probes = [(chunk, int(year), code) for chunk in chunks for year in years for code in reprt_codes
+              if period_ended(int(year), code)]
+    responses = dart_get_many([
+        ("fnlttMultiAcnt.json", {
+            'crtfc_key': api_key,
+            'corp_code': ','.join(chunk),
+            'bsns_year': str(year),
+            'reprt_code': code
+        })
+        for chunk, year, code in probes
+    ], timeout=timeout)
+
+    parts, failed = [], set()
+    for (chunk, year, code), data in zip(probes, responses):
+        if isinstance(data, Exception):
+            failed.update(chunk)
+        elif data.get('status') == '000':
+            parts.extend(_normalize(data, year, code))
+    return _build(parts), failed
+
+
+def annual_statements(api_key, corp_codes, years, timeout=10):
+    """사업보고서 기준 연도별 재무제표 (요청 한 번에 3개 연도씩)
+
+    사업연도가 끝나지 않은 연도는 사업보고서가 있을 수 없으니 처음부터 뺀다.
+    빠진 연도 중 가장 최근 연도부터 그 연도를 덮는 사업연도(끝난 것만)를 골라 한 라운드에 같이 보내고,
+    사업보고서가 아직 없는 연도는 다음 라운드에 더 이전 사업연도로 다시 채운다.
+    """
+    years = sorted({int(y) for y in years if period_ended(int(y), '11011')}, reverse=True)
+    corp_codes = list(dict.fromkeys(corp_codes))
+    parts, tried, failed, have = [], set(), set(), set()
+    for _ in range(3):
+        missing_years = [y for y in years if any((c, y) not in have for c in corp_codes)]
+        # 빠진 연도 중 가장 최근부터 3년씩 덮도록 사업연도 선택 (이미 요청했거나 안 끝난 사업연도는 제외)
+        picks, covered = [], set()
+        for y in missing_years:
+            if y in covered:
+                continue
+            pick = next((b for b in (y, y + 1, y + 2) if b not in tried and period_ended(b, '11011')), None)
+            if pick is None:
+                continue
+            picks.append(pick)
+            covered.update((pick, pick - 1, pick - 2))
+        if not picks:
+            break
+        tried.update(picks)
+        targets = [c for c in corp_codes if any((c, y) not in have for y in missing_years)]
+        frame, bad = fetch_statements(api_key, targets, picks, timeout=timeout)
+        failed |= bad
+        if not frame.empty:
+            have.update(zip(frame.index.get_level_values('corp_code'), frame.index.get_level_values('year')))
+            parts.append(frame.reset_index())
+    if not parts:
+        return empty_frame(), failed
+    frame = pd.concat(parts, ignore_index=True)
+    frame = frame[frame['year'].isin(years)].drop_duplicates(INDEX, keep='first')
+    return frame.set_index(INDEX), failed
+
+
+def latest_statements(frame, years):
+    """기업별로 가장 최신 보고서(연도 내림차순 -> 3분기/반기/1분기/사업보고서 순) 하나만 남김
+
+    반환값: (남긴 long 프레임, corp_code/year/reprt_code/report 표)
+    """
+    order = {(int(y), code): rank for rank, (y, code) in
+             enumerate((y, code) for y in sorted(years, reverse=True) for code, _ in REPORT_CODES)}
+    if frame.empty:
+        return frame, pd.DataFrame(columns=['corp_code', 'year', 'reprt_code', 'report'])
+    avail = frame.index.droplevel(['fs_div', 'account']).unique().to_frame(index=False)
+    avail['rank'] = [order.get((y, c), len(order)) for y, c in zip(avail['year'], avail['reprt_code'])]
+    picks = avail.sort_values('rank', kind='stable').drop_duplicates('corp_code')
+    picks = picks[picks['rank'] < len(order)].drop(columns='rank')
+    picks['report'] = picks['reprt_code'].map(REPORT_NAMES)
+    keys = pd.MultiIndex.from_frame(picks[['corp_code', 'year', 'reprt_code']])
+    chosen = frame[frame.index.droplevel(['fs_div', 'account']).isin(keys)]
+    return chosen, picks.reset_index(drop=True)
+
+
+def to_report_frame(frame):
+    """long 프레임 -> extract_accounts_batch 입력 형태 (account_nm, fs_div, amount 컬럼)
+
+    계정명/재무제표 구분은 인덱스의 코드를 그대로 쓰는 범주형으로 (행마다 문자열을 다시 만들지 않음)
+    """
+    idx = frame.index
+    out = {}
+    for i, name in enumerate(INDEX):
+        if name in ('fs_div', 'account'):
+            out['account_nm' if name == 'account' else name] = pd.Categorical.from_codes(idx.codes[i], idx.levels[i])
+        else:
+            out[name] = idx.get_level_values(i)
+    out['amount'] = frame['amount'].to_numpy()
+    return pd.DataFrame(out)
@@ -0,0 +1,23 @@
+"""로컬 저장소(인덱스, 캐시 등) 경로와 SQLite 연결 헬퍼"""
+import os
+import sqlite3
+
+# 기본 저장 위치: 프로젝트 루트의 .credit_cache (환경변수로 변경 가능)
+DATA_DIR = os.getenv(
+    'CREDIT_MONITOR_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.credit_cache'),
+)
+
+
+def data_path(filename):
+    """저장소 디렉터리 안의 파일 경로 (디렉터리가 없으면 생성)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect(filename):
+    """여러 Streamlit 세션/스레드에서 같이 쓸 수 있는 SQLite 연결"""
+    conn = sqlite3.connect(data_path(filename), timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
@@ -0,0 +1,95 @@
+"""비율 what-if / 스트레스 테스트 (모델 입력 비율 4개를 흔들어 보는 격자)
+
+현재 부채비율/영업이익률/순이익률/ROA 주변으로 충격 격자(약 3만 개)를 만들고 predict_proba 한 번으로 전부 채점한다.
+화면에서는 채점된 격자만 인덱싱해서 슬라이더/히트맵/최소 변화량을 보여주므로
+슬라이더를 움직여도 모델이나 DART를 다시 부르지 않는다.
+"""
+import numpy as np
+
+from .accounts import FEATURES
+from .scoring import DANGER_LIMIT, SAFE_LIMIT, score_ratios
+
+# 비율별 격자 점 수 (25 x 25 x 7 x 7 = 30,625 + 현재값 포함)
+STEPS = (25, 25, 7, 7)
+
+# 현재값 기준 흔드는 폭 (%p) - 부채비율은 현재값의 크기에 비례해서 넓힘
+SPANS = {'부채비율': 150.0, '영업이익률': 20.0, '순이익률': 20.0, 'ROA': 10.0}
+
+# 비율 하나만 바꿀 때 쓰는 세밀한 선의 점 수
+LINE_STEPS = 401
+
+THRESHOLDS = (SAFE_LIMIT, DANGER_LIMIT)
+
+
+def build_axes(ratios, steps=STEPS):
+    """현재 비율 dict -> 비율별 격자 값 배열 4개 (현재값은 항상 격자에 포함)"""
+    axes = []
+    for feature, n in zip(FEATURES, steps):
+        cur = float(ratios[feature])
+        span = max(SPANS[feature], abs(cur)) if feature == '부채비율' else SPANS[feature]
+        lo = max(0.0, cur - span) if feature == '부채비율' else cur - span
+        axes.append(np.union1d(np.linspace(lo, cur + span, n), [cur]))
+    return axes
+
+
+def score_grid(model, axes, ratios, line_steps=LINE_STEPS):
+    """격자 + 비율별 1차원 세밀한 선을 predict_proba 한 번으로 채점
+
+    반환값: (격자 부도 확률(%) 배열 - shape = 비율별 격자 점 수,
+             {비율: (값 배열, 부도 확률 배열)} - 나머지 비율은 현재값에 고정)
+    """
+    mesh = np.meshgrid(*axes, indexing='ij')
+    parts = [np.stack([m.ravel() for m in mesh], axis=1)]
+    base = np.array([float(ratios[f]) for f in FEATURES])
+    line_values = []
+    for d, axis in enumerate(axes):
+        values = np.union1d(np.linspace(axis.min(), axis.max(), line_steps), [base[d]])
+        rows = np.tile(base, (len(values), 1))
+        rows[:, d] = values
+        parts.append(rows)
+        line_values.append(values)
+    probs = score_ratios(model, np.vstack(parts))
+    grid = probs[:mesh[0].size].reshape(mesh[0].shape)
+    lines, start = {}, mesh[0].size
+    for feature, values in zip(FEATURES, line_values):
+        lines[feature] = (values, probs[start:start + len(values)])
+        start += len(values)
+    return grid, lines
+
+
+def current_index(axes, ratios):
+    """현재 비율이 격자에서 놓인 위치 (비율별 인덱스 튜플)"""
+    return tuple(int(np.argmin(np.abs(axis - float(ratios[f])))) for axis, f in zip(axes, FEATURES))
+
+
+def minimal_changes(axes, probs, lines, ratios, threshold):
+    """threshold(%)의 반대편으로 넘어가는 데 필요한 최소 변화량 (현재값 대비 %p)
+
+    반환값: {'single': {비율: 변화량 또는 None}, 'combined': {비율: 변화량, 'prob': 확률} 또는 None,
+             'direction': 'down'(내려가야 함) / 'up'(올라가면 넘어감)}
+    - single: 나머지 비율은 그대로 두고 그 비율 하나만 바꿀 때 (세밀한 선 기준)
+    - combined: 네 비율을 같이 바꿀 때 (비율별 격자 폭으로 나눈 거리가 가장 가까운 격자 점)
+    """
+    idx = current_index(axes, ratios)
+    below = probs[idx] < threshold
+
+    single = {}
+    for feature in FEATURES:
+        values, line = lines[feature]
+        delta = values - float(ratios[feature])
+        hits = np.flatnonzero(line >= threshold if below else line < threshold)
+        single[feature] = float(delta[hits[np.argmin(np.abs(delta[hits]))]]) if len(hits) else None
+
+    combined = None
+    target = probs >= threshold if below else probs < threshold
+    if target.any():
+        deltas = [axis - axis[i] for axis, i in zip(axes, idx)]
+        scale = [max(np.ptp(axis) / 2, 1e-9) for axis in axes]
+        dist = sum(
+            (np.abs(delta) / s).reshape([-1 if k == d else 1 for k in range(len(axes))])
+            for d, (delta, s) in enumerate(zip(deltas, scale))
+        )
+        best = np.unravel_index(np.argmin(np.where(target, dist, np.inf)), probs.shape)
+        combined = {f: float(deltas[d][best[d]]) for d, f in enumerate(FEATURES)}
+        combined['prob'] = float(probs[best])
+    return {'single': single, 'combined': combined, 'direction': 'up' if below else 'down'}
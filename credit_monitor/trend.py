@@ -0,0 +1,54 @@
+"""최근 N개년 사업보고서 재무 추이 + 연도별 부도 확률 궤적"""
+from .accounts import FEATURES, extract_accounts_batch
+from .dart_client import TransportError
+from .scoring import score_frame
+from .statements import annual_statements, to_report_frame
+
+# 부도 확률이 이만큼 연속으로 오르면 악화 추세로 표시 (3개년 연속 상승)
+STREAK_ALERT = 2
+
+
+def fetch_trend(api_key, dart_code, found_year, years=5, model=None):
+    """found_year부터 과거 years개년 사업보고서 -> [{'year', 'sales', 'equity', 'debt', ...}] (단위: 억원)
+
+    model을 주면 연도별 비율 4개와 부도 확률(prob, band)도 같이 계산 (predict_proba 한 번, 추가 조회 없음)
+    통신 오류가 난 요청이 있으면 TransportError (빠진 연도를 '데이터 없음'으로 굳히지 않음)
+    """
+    years_to_check = [found_year - i for i in range(0, years)]
+    
+    # 사업보고서 한 건에 당기/전기/전전기가 같이 들어 있어서 5개년도 보통 요청 2번이면 끝남
+    frame, failed = annual_statements(api_key, [dart_code], years_to_check)
+    if failed:
+        raise TransportError(f"{dart_code} 재무 추이 조회 통신 오류")
+    if frame.empty:
+        return []
+    
+    # 연도별 계정을 한 번에 추출
+    ts_acc = extract_accounts_batch(to_report_frame(frame), keys=['year'], amount_col='amount')
+    if model is not None:
+        ts_acc = score_frame(model, ts_acc)  # 연도 전체를 한 번에 채점
+    ts_acc = ts_acc.sort_values('year', ascending=False)
+    results = []
+    for r in ts_acc.to_dict('records'):
+        item = {
+            'year': int(r['year']),
+            'sales': r['sales'] / 100000000,
+            'equity': r['equity'] / 100000000,
+            'debt': r['liabilities'] / 100000000
+        }
+        if model is not None:
+            item.update({f: float(r[f]) for f in FEATURES})
+            item.update(prob=float(r['prob']), band=str(r['band']))
+        results.append(item)
+    return results
+
+
+def risk_streak(ts_results):
+    """가장 최근 연도까지 부도 확률이 몇 년 연속 올랐는지 (연도 간격이 빠진 곳에서 끊음)"""
+    scored = sorted((r for r in ts_results if 'prob' in r), key=lambda r: r['year'], reverse=True)
+    streak = 0
+    for newer, older in zip(scored, scored[1:]):
+        if newer['year'] - older['year'] != 1 or newer['prob'] <= older['prob']:
+            break
+        streak += 1
+    return streak
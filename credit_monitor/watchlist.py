@@ -0,0 +1,267 @@
+"""관심 기업 감시 (조기경보)
+
+- 관심 기업 목록(수천 개 가능)의 마지막 진단 결과를 SQLite(watchlist.db)에 보관
+- 주기마다 지난 확인일 이후 시장 전체 공시 목록(list.json)만 조회 (정기공시 + 외부감사 공시)
+- 관심 기업의 새 정기보고서/감사보고서가 있을 때만 그 보고서 재무제표를 받아 다시 채점
+- 등급이 바뀌면(안전→주의→위험 등) 이벤트를 sink(JSONL 파일, 큐, 웹훅)로 내보냄
+재무제표가 아직 API에 안 올라온 공시는 다음 주기에 다시 확인한다 (접수일부터 PENDING_DAYS일까지만).
+"""
+import json
+import queue
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+
+from .accounts import extract_accounts_batch
+from .dart import fetch_filings, periodic_report_code
+from .filing_calendar import REPORT_ORDER, SCHEDULE
+from .scoring import score_frame
+from .statements import REPORT_NAMES, fetch_statements, latest_statements, to_report_frame
+from .storage import connect
+
+WATCHLIST_DB = 'watchlist.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch (
+    code       TEXT PRIMARY KEY,
+    dart       TEXT NOT NULL,
+    name       TEXT,
+    year       INTEGER,
+    report     TEXT,
+    prob       REAL,
+    band       TEXT,
+    rcept_no   TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_watch_dart ON watch(dart);
+CREATE TABLE IF NOT EXISTS watch_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# 정기공시(A) + 외부감사관련(F: 감사보고서 등)
+FILING_TYPES = ('A', 'F')
+
+# 재무제표가 안 올라온 공시를 기다리는 기간 - 지나면 처리한 것으로 보고 조회 시작일을 더 붙잡지 않음
+# (재무제표 API에 끝내 안 나오는 공시 하나 때문에 시장 전체 공시 목록 조회 범위가 계속 늘어나지 않게)
+PENDING_DAYS = 3
+
+_lock = threading.Lock()
+
+
+def _open():
+    conn = connect(WATCHLIST_DB)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class JsonlSink:
+    """이벤트를 JSON 한 줄씩 파일에 추가"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, event):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class QueueSink:
+    """같은 프로세스의 다른 스레드로 넘길 때 (queue.Queue)"""
+
+    def __init__(self, q=None):
+        self.queue = q if q is not None else queue.Queue()
+
+    def emit(self, event):
+        self.queue.put(event)
+
+
+class WebhookSink:
+    """웹훅 URL로 POST (실패해도 감시는 계속)"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, event):
+        try:
+            requests.post(self.url, json=event, timeout=self.timeout)
+        except requests.RequestException:
+            pass
+
+
+def report_of(filing):
+    """공시 -> 다시 채점할 (사업연도, reprt_code) (정기보고서/감사보고서가 아니면 None)"""
+    report_nm = filing.get('report_nm', '')
+    rcept_dt = filing.get('rcept_dt', '')
+    found = periodic_report_code(report_nm, rcept_dt)
+    if found is not None or '감사보고서' not in report_nm:
+        return found
+    # 감사보고서는 해당 사업연도 사업보고서 기준으로 채점 (보고서명에 기간이 없으면 접수 전년도)
+    period = report_nm[report_nm.find('(') + 1:report_nm.find(')')] if '(' in report_nm else ''
+    year = int(period[:4]) if period[:4].isdigit() else int(rcept_dt[:4]) - 1
+    return year, '11011'
+
+
+def period_key(year, reprt_code):
+    """(사업연도, reprt_code) -> 보고 기간 끝 기준 비교 키 (1분기 < 반기 < 3분기 < 사업보고서)"""
+    return int(year), SCHEDULE[reprt_code][0]
+
+
+_REPORT_CODES = {name: code for code, name in REPORT_NAMES.items()}
+
+
+def set_watchlist(corp_map, codes):
+    """관심 기업 목록 교체 (새로 추가된 기업만 등록, 빠진 기업은 삭제) -> 등록된 기업 수"""
+    rows = corp_map[corp_map['code'].isin(codes)]
+    with _lock:
+        conn = _open()
+        try:
+            keep = set(rows['code'])
+            have = {r[0] for r in conn.execute("SELECT code FROM watch")}
+            conn.executemany("DELETE FROM watch WHERE code = ?", [(c,) for c in have - keep])
+            conn.executemany(
+                "INSERT OR IGNORE INTO watch (code, dart, name) VALUES (?, ?, ?)",
+                list(rows[['code', 'dart', 'name']].itertuples(index=False, name=None)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return len(rows)
+
+
+def load_watch():
+    """관심 기업 현재 상태 프레임"""
+    conn = _open()
+    try:
+        return pd.read_sql_query("SELECT * FROM watch", conn)
+    finally:
+        conn.close()
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM watch_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def score_reports(api_key, model, targets):
+    """[(corp_code, year, reprt_code)] -> 그 보고서 기준 채점 프레임 (corp_code, year, reprt_code, prob, band ...)
+
+    None인 year는 가장 최신 보고서 기준 (처음 등록된 기업 기준선 잡을 때)
+    반환값: (채점 프레임, 통신 오류가 난 corp_code 집합 - 이 기업들은 결과를 믿을 수 없으니 다음 주기에 다시)
+    """
+    frames, failed = [], set()
+    exact = pd.DataFrame([t for t in targets if t[1] is not None], columns=['corp_code', 'year', 'reprt_code'])
+    # 같은 (연도, 보고서)끼리 묶어서 100개씩 한 번에 조회
+    for (year, code), group in exact.groupby(['year', 'reprt_code']):
+        frame, bad = fetch_statements(api_key, group['corp_code'], [int(year)], [code])
+        failed |= bad
+        if frame.empty:
+            continue
+        keys = pd.MultiIndex.from_frame(group.astype({'year': int}))
+        frames.append(frame[frame.index.droplevel(['fs_div', 'account']).isin(keys)])
+    latest = [t[0] for t in targets if t[1] is None]
+    if latest:
+        now = datetime.now().year
+        frame, bad = fetch_statements(api_key, latest, [now, now - 1], list(REPORT_NAMES))
+        failed |= bad
+        frames.append(latest_statements(frame, [now, now - 1])[0])
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=['corp_code', 'year', 'reprt_code', 'prob', 'band']), failed
+    acc = extract_accounts_batch(to_report_frame(pd.concat(frames)), keys=['corp_code', 'year', 'reprt_code'],
+                                 amount_col='amount')
+    # 한 기업에 보고서가 여러 건이면 가장 최근 것 하나만
+    acc['rank'] = acc['reprt_code'].map(REPORT_ORDER.index)
+    acc = acc.sort_values(['year', 'rank'], ascending=[False, True]).drop_duplicates('corp_code').drop(columns='rank')
+    return score_frame(model, acc), failed
+
+
+def poll(api_key, model, sink=None, today=None, lookback_days=7):
+    """한 주기 감시 -> 등급이 바뀐 이벤트 리스트
+
+    조회 기간: 지난 확인일 ~ 오늘 (첫 실행은 lookback_days 전부터)
+    처음 등록된 기업(등급 없음)은 최신 보고서로 기준선만 잡고 이벤트는 내지 않음
+    """
+    today = today or datetime.now()
+    until = today.strftime('%Y%m%d')
+    conn = _open()
+    try:
+        since = _get_meta(conn, 'next_since') or (today - timedelta(days=lookback_days)).strftime('%Y%m%d')
+        watch = pd.read_sql_query("SELECT * FROM watch", conn)
+    finally:
+        conn.close()
+    if watch.empty:
+        return []
+
+    by_dart = watch.set_index('dart')
+    filings = [f for ty in FILING_TYPES for f in fetch_filings(api_key, since, until, pblntf_ty=ty, use_cache=False)]
+
+    # 관심 기업의 아직 처리 안 한 공시만 (기업별 마지막 rcept_no 이후)
+    todo = {}
+    for f in filings:
+        corp, rcept_no = f.get('corp_code'), f.get('rcept_no', '')
+        last = by_dart.at[corp, 'rcept_no'] if corp in by_dart.index else None
+        if corp not in by_dart.index or rcept_no <= (last if isinstance(last, str) else ''):
+            continue
+        report = report_of(f)
+        if report is None:
+            continue
+        # 이미 반영한 보고서보다 이전 기간의 공시(지난 보고서 정정 등)는 지금 등급을 덮어쓰지 않음
+        old = by_dart.loc[corp]
+        stored = _REPORT_CODES.get(old['report'])
+        if stored and pd.notna(old['year']) and period_key(*report) < period_key(old['year'], stored):
+            continue
+        # 같은 기업 공시가 여러 건이면 가장 최근 기간, 같은 기간이면 가장 최근 접수분 기준
+        if corp not in todo or (period_key(*report), rcept_no) > (period_key(*todo[corp][0]), todo[corp][1]):
+            todo[corp] = (report, rcept_no, f.get('rcept_dt', until))
+    baseline = [d for d in by_dart.index[by_dart['band'].isna()] if d not in todo]
+
+    targets = [(corp, year, code) for corp, ((year, code), _, _) in todo.items()] + [(d, None, None) for d in baseline]
+    scored, failed = score_reports(api_key, model, targets) if targets else (pd.DataFrame(columns=['corp_code']), set())
+    # 통신 오류가 난 기업은 채점 결과도 반영하지 않음 (공시도 처리 안 한 것으로 두고 다음 주기에 다시)
+    scored = scored[~scored['corp_code'].isin(failed)]
+
+    events, updates = [], []
+    now = datetime.now().isoformat(timespec='seconds')
+    for rec in scored.to_dict('records'):
+        corp = rec['corp_code']
+        old = by_dart.loc[corp]
+        rcept_no = todo[corp][1] if corp in todo else old['rcept_no']
+        report = REPORT_NAMES.get(rec['reprt_code'], rec['reprt_code'])
+        updates.append((int(rec['year']), report, float(rec['prob']), rec['band'], rcept_no, now, corp))
+        if isinstance(old['band'], str) and old['band'] != rec['band']:
+            events.append({
+                'time': now, 'code': old['code'], 'dart': corp, 'name': old['name'],
+                'old_band': old['band'], 'new_band': rec['band'],
+                'old_prob': float(old['prob']), 'new_prob': float(rec['prob']),
+                'year': int(rec['year']), 'report': report, 'rcept_no': rcept_no,
+            })
+
+    # 재무제표가 아직 안 올라와서 못 채점한 공시는 다음 주기에 다시 보도록 시작일을 당겨 둠
+    # PENDING_DAYS가 지난 공시는 그 기업의 마지막 처리 공시로만 기록 (등급은 그대로)
+    # 통신 오류가 난 기업은 기간과 상관없이 계속 붙잡아 둠 (장애 때문에 공시를 놓치지 않게)
+    done = set(scored['corp_code'])
+    cutoff = (today - timedelta(days=PENDING_DAYS)).strftime('%Y%m%d')
+    waiting = [c for c in todo if c not in done]
+    next_since = min([todo[c][2] for c in waiting if todo[c][2] >= cutoff or c in failed] + [until])
+    expired = [(todo[c][1], now, c) for c in waiting if todo[c][2] < cutoff and c not in failed]
+
+    with _lock:
+        conn = _open()
+        try:
+            conn.executemany(
+                "UPDATE watch SET year = ?, report = ?, prob = ?, band = ?, rcept_no = ?, updated_at = ? WHERE dart = ?",
+                updates,
+            )
+            conn.executemany("UPDATE watch SET rcept_no = ?, updated_at = ? WHERE dart = ?", expired)
+            conn.execute("INSERT OR REPLACE INTO watch_meta VALUES ('next_since', ?)", (next_since,))
+            conn.execute("INSERT OR REPLACE INTO watch_meta VALUES ('last_poll', ?)", (now,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    if sink is not None:
+        for event in events:
+            sink.emit(event)
+    return events